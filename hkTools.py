@@ -5,6 +5,7 @@
 
 import os
 import re
+import sys
 
 try:
     from maya import mel
@@ -56,6 +57,45 @@ def getShelfDir():
     return shelfDir
 
 
+def getScriptsDir():
+    scriptsDir = os.path.join(getCurrentDir(), "scripts")
+    return scriptsDir
+
+
+def getPluginDir():
+    pluginDir = os.path.join(getCurrentDir(), "plug-ins")
+    return pluginDir
+
+
+def getModuleDir():
+    moduleDir = os.path.join(cmds.internalVar(userAppDir=True), "modules")
+    return moduleDir
+
+
+def createUpdateModule():
+    """
+    Writes "hkTools.mod" to the user's "modules" folder.
+    Maya then adds this folder's "scripts"(e.g. hkLib) to the Python path and "plug-ins" to the plug-in path on every launch.
+    Both paths are added to the current session as well, so there is no need to restart Maya.
+    """
+    moduleDir = getModuleDir()
+    if not os.path.exists(moduleDir):
+        os.makedirs(moduleDir)
+
+    modulePath = os.path.join(moduleDir, "hkTools.mod")
+    with open(modulePath, "w") as f:
+        f.write("+ hkTools 1.0 {}\n".format(os.path.abspath(getCurrentDir()).replace("\\", "/")))
+
+    scriptsDir = os.path.abspath(getScriptsDir())
+    if scriptsDir not in sys.path:
+        sys.path.append(scriptsDir)
+
+    pluginDir = os.path.abspath(getPluginDir())
+    pluginPathList = [path for path in os.environ.get("MAYA_PLUG_IN_PATH", "").split(os.pathsep) if path]
+    if pluginDir not in pluginPathList:
+        os.environ["MAYA_PLUG_IN_PATH"] = os.pathsep.join(pluginPathList + [pluginDir])
+
+
 def createUpdateRunTimeCommand():
     runTimeCommandNamePathLangs = getNamePathLang(getRunTimeCommandDir())
     runTimeCommandNamePathLangs.sort()
@@ -197,6 +237,7 @@ def createUpdateHotkey():
 
 
 def main():
+    createUpdateModule()
     createUpdateRunTimeCommand()
     createUpdateShelf()
     createUpdateHotkey()
@@ -0,0 +1,402 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Nodes used by hkTools. Written with Maya Python API 2.0.
+# "plug-ins" is added to MAYA_PLUG_IN_PATH by the hkTools Maya module(hkTools.mod).
+#
+# Nodes:
+# zlocProjector - Computes every ZLOC position of one camera in a single evaluation.
+# zlocRays - Draws every ZLOC projection ray of one camera in the viewport(Viewport 2.0).
+# hkScreenLocator - Locator drawn at a constant size in pixels, however far it is or however it is scaled(Viewport 2.0).
+#
+# Commands:
+# hkBulkEdit - One undo step for a bulk edit done with hkLib.bulk_edit. Not meant to be run by hand.
+#
+# Usage:
+"""
+import maya.cmds as mc
+mc.loadPlugin("hkToolsNodes", quiet=True)
+"""
+
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaRender as omr
+import maya.api.OpenMayaUI as omui
+
+
+def maya_useNewAPI():
+    pass
+
+
+class ZlocProjector(om.MPxNode):
+    """
+    One node per camera. Replaces the two "alwaysEvaluate" expressions each ZLOC used to have.
+    Same math as the expressions:
+    tx = hfa * 2.54 * tz / (fl / 10) * -1 * (U + OffsetU)
+    ty = vfa * 2.54 * tz / (fl / 10) * -1 * (V + OffsetV)
+    """
+    typeName = "zlocProjector"
+    typeId = om.MTypeId(0x0007F7A0)
+
+    horizontalFilmAperture = None
+    verticalFilmAperture = None
+    focalLength = None
+    track = None
+    trackU = None
+    trackV = None
+    trackOffsetU = None
+    trackOffsetV = None
+    trackDepth = None
+    outTranslate = None
+    outTranslateX = None
+    outTranslateY = None
+
+    @classmethod
+    def creator(cls):
+        return cls()
+
+    @classmethod
+    def initialize(cls):
+        nAttr = om.MFnNumericAttribute()
+        uAttr = om.MFnUnitAttribute()
+        cAttr = om.MFnCompoundAttribute()
+
+        cls.horizontalFilmAperture = nAttr.create("horizontalFilmAperture", "hfa", om.MFnNumericData.kDouble, 1.0)
+        cls.verticalFilmAperture = nAttr.create("verticalFilmAperture", "vfa", om.MFnNumericData.kDouble, 1.0)
+        cls.focalLength = nAttr.create("focalLength", "fl", om.MFnNumericData.kDouble, 35.0)
+
+        cls.trackU = nAttr.create("trackU", "tu", om.MFnNumericData.kDouble, 0.0)
+        cls.trackV = nAttr.create("trackV", "tv", om.MFnNumericData.kDouble, 0.0)
+        cls.trackOffsetU = nAttr.create("trackOffsetU", "tou", om.MFnNumericData.kDouble, 0.0)
+        cls.trackOffsetV = nAttr.create("trackOffsetV", "tov", om.MFnNumericData.kDouble, 0.0)
+        cls.trackDepth = uAttr.create("trackDepth", "td", om.MFnUnitAttribute.kDistance, -10.0) # ZLOC's "tz".
+        cls.track = cAttr.create("track", "tr")
+        for child in (cls.trackU, cls.trackV, cls.trackOffsetU, cls.trackOffsetV, cls.trackDepth):
+            cAttr.addChild(child)
+        cAttr.array = True
+
+        cls.outTranslateX = uAttr.create("outTranslateX", "otx", om.MFnUnitAttribute.kDistance, 0.0)
+        uAttr.writable = False
+        uAttr.storable = False
+        cls.outTranslateY = uAttr.create("outTranslateY", "oty", om.MFnUnitAttribute.kDistance, 0.0)
+        uAttr.writable = False
+        uAttr.storable = False
+        cls.outTranslate = cAttr.create("outTranslate", "ot")
+        cAttr.addChild(cls.outTranslateX)
+        cAttr.addChild(cls.outTranslateY)
+        cAttr.array = True
+        cAttr.usesArrayDataBuilder = True
+        cAttr.writable = False
+        cAttr.storable = False
+
+        for attr in (cls.horizontalFilmAperture, cls.verticalFilmAperture, cls.focalLength, cls.track, cls.outTranslate):
+            cls.addAttribute(attr)
+
+        for attr in (cls.horizontalFilmAperture, cls.verticalFilmAperture, cls.focalLength,
+                     cls.track, cls.trackU, cls.trackV, cls.trackOffsetU, cls.trackOffsetV, cls.trackDepth):
+            cls.attributeAffects(attr, cls.outTranslate)
+            cls.attributeAffects(attr, cls.outTranslateX)
+            cls.attributeAffects(attr, cls.outTranslateY)
+
+    def compute(self, plug, data):
+        cls = ZlocProjector
+        if plug.attribute() not in (cls.outTranslate, cls.outTranslateX, cls.outTranslateY):
+            return None
+
+        hfa = data.inputValue(cls.horizontalFilmAperture).asDouble()
+        vfa = data.inputValue(cls.verticalFilmAperture).asDouble()
+        fl = data.inputValue(cls.focalLength).asDouble()
+
+        # Everything that does not change per ZLOC is computed once.
+        if fl == 0.0:
+            scaleU = scaleV = 0.0
+        else:
+            scaleU = hfa * 2.54 / (fl / 10.0) * -1.0
+            scaleV = vfa * 2.54 / (fl / 10.0) * -1.0
+
+        trackArrayHandle = data.inputArrayValue(cls.track)
+        outArrayHandle = data.outputArrayValue(cls.outTranslate)
+        builder = outArrayHandle.builder()
+
+        for i in range(len(trackArrayHandle)):
+            trackArrayHandle.jumpToPhysicalElement(i)
+            index = trackArrayHandle.elementLogicalIndex()
+            trackHandle = trackArrayHandle.inputValue()
+
+            u = trackHandle.child(cls.trackU).asDouble() + trackHandle.child(cls.trackOffsetU).asDouble()
+            v = trackHandle.child(cls.trackV).asDouble() + trackHandle.child(cls.trackOffsetV).asDouble()
+            depth = trackHandle.child(cls.trackDepth).asDistance().asUnits(om.MDistance.kCentimeters)
+
+            outHandle = builder.addElement(index)
+            outHandle.child(cls.outTranslateX).setMDistance(om.MDistance(scaleU * depth * u, om.MDistance.kCentimeters))
+            outHandle.child(cls.outTranslateY).setMDistance(om.MDistance(scaleV * depth * v, om.MDistance.kCentimeters))
+
+        outArrayHandle.set(builder)
+        outArrayHandle.setAllClean()
+        data.setClean(plug)
+
+
+class ZlocRays(omui.MPxLocatorNode):
+    """
+    One node per camera. Replaces the curve, aimConstraint and transform each ZLOC used to have for its projection ray.
+    Draws a line from the origin(camera) through each "point" for "rayLength", in the matching "color".
+    Nothing is computed here. Points are only pulled while the node is drawn, so a hidden node costs nothing.
+    """
+    typeName = "zlocRays"
+    typeId = om.MTypeId(0x0007F7A1)
+    drawDbClassification = "drawdb/geometry/hkTools/zlocRays"
+    drawRegistrantId = "hkToolsZlocRays"
+
+    point = None
+    color = None
+    rayLength = None
+
+    @classmethod
+    def creator(cls):
+        return cls()
+
+    @classmethod
+    def initialize(cls):
+        nAttr = om.MFnNumericAttribute()
+
+        cls.point = nAttr.createPoint("point", "pt") # ZLOC's translate, in camera space.
+        nAttr.array = True
+        cls.color = nAttr.createColor("color", "clr")
+        nAttr.array = True
+        cls.rayLength = nAttr.create("rayLength", "rl", om.MFnNumericData.kDouble, 1000.0)
+        nAttr.setMin(0.0)
+
+        for attr in (cls.point, cls.color, cls.rayLength):
+            cls.addAttribute(attr)
+
+    def isBounded(self):
+        return True
+
+    def boundingBox(self):
+        rayLength = om.MPlug(self.thisMObject(), ZlocRays.rayLength).asDouble()
+        return om.MBoundingBox(om.MPoint(-rayLength, -rayLength, -rayLength), om.MPoint(rayLength, rayLength, rayLength))
+
+
+class ZlocRaysData(om.MUserData):
+    def __init__(self):
+        try:
+            om.MUserData.__init__(self, False) # Keep the data between draws.
+        except TypeError:
+            om.MUserData.__init__(self) # Maya 2022 and above.
+        self.lineDict = {} # {(r, g, b): MPointArray of start & end points}
+
+
+class ZlocRaysDrawOverride(omr.MPxDrawOverride):
+    @staticmethod
+    def creator(obj):
+        return ZlocRaysDrawOverride(obj)
+
+    def __init__(self, obj):
+        omr.MPxDrawOverride.__init__(self, obj, None, False)
+
+    def supportedDrawAPIs(self):
+        return omr.MRenderer.kAllDevices
+
+    def hasUIDrawables(self):
+        return True
+
+    def isBounded(self, objPath, cameraPath):
+        return True
+
+    def boundingBox(self, objPath, cameraPath):
+        rayLength = om.MPlug(objPath.node(), ZlocRays.rayLength).asDouble()
+        return om.MBoundingBox(om.MPoint(-rayLength, -rayLength, -rayLength), om.MPoint(rayLength, rayLength, rayLength))
+
+    def prepareForDraw(self, objPath, cameraPath, frameContext, oldData):
+        data = oldData if isinstance(oldData, ZlocRaysData) else ZlocRaysData()
+        data.lineDict = {}
+
+        node = objPath.node()
+        rayLength = om.MPlug(node, ZlocRays.rayLength).asDouble()
+        pointArrayPlug = om.MPlug(node, ZlocRays.point)
+        colorArrayPlug = om.MPlug(node, ZlocRays.color)
+
+        for index in pointArrayPlug.getExistingArrayAttributeIndices():
+            pointPlug = pointArrayPlug.elementByLogicalIndex(index)
+            if not pointPlug.isDestination: # ZLOC was deleted.
+                continue
+            direction = om.MVector(pointPlug.child(0).asDouble(), pointPlug.child(1).asDouble(), pointPlug.child(2).asDouble())
+            if direction.length() == 0.0:
+                continue
+
+            colorPlug = colorArrayPlug.elementByLogicalIndex(index)
+            color = (colorPlug.child(0).asFloat(), colorPlug.child(1).asFloat(), colorPlug.child(2).asFloat())
+
+            lineArray = data.lineDict.setdefault(color, om.MPointArray())
+            lineArray.append(om.MPoint(0.0, 0.0, 0.0))
+            lineArray.append(om.MPoint(direction.normal() * rayLength))
+
+        return data
+
+    def addUIDrawables(self, objPath, drawManager, frameContext, data):
+        if not isinstance(data, ZlocRaysData):
+            return
+
+        drawManager.beginDrawable()
+        for color, lineArray in data.lineDict.items():
+            drawManager.setColor(om.MColor(color))
+            drawManager.mesh(omr.MUIDrawManager.kLines, lineArray)
+        drawManager.endDrawable()
+
+
+class ScreenLocator(omui.MPxLocatorNode):
+    """
+    A cross drawn "pixelSize" pixels wide, centered on the node. Used by TLOC, ZLOC and Center3D.
+    The viewport keeps it the same size on screen, so no expression has to rescale it every frame.
+    """
+    typeName = "hkScreenLocator"
+    typeId = om.MTypeId(0x0007F7A2)
+    drawDbClassification = "drawdb/geometry/hkTools/hkScreenLocator"
+    drawRegistrantId = "hkToolsScreenLocator"
+
+    pixelSize = None
+
+    @classmethod
+    def creator(cls):
+        return cls()
+
+    @classmethod
+    def initialize(cls):
+        nAttr = om.MFnNumericAttribute()
+        cls.pixelSize = nAttr.create("pixelSize", "psz", om.MFnNumericData.kDouble, 20.0)
+        nAttr.setMin(1.0)
+        nAttr.keyable = True
+        cls.addAttribute(cls.pixelSize)
+
+    def isBounded(self):
+        return False # Its size in world space depends on the view.
+
+
+class ScreenLocatorData(om.MUserData):
+    def __init__(self):
+        try:
+            om.MUserData.__init__(self, False) # Keep the data between draws.
+        except TypeError:
+            om.MUserData.__init__(self) # Maya 2022 and above.
+        self.position = om.MPoint()
+        self.halfSize = 10.0
+        self.color = om.MColor()
+
+
+class ScreenLocatorDrawOverride(omr.MPxDrawOverride):
+    @staticmethod
+    def creator(obj):
+        return ScreenLocatorDrawOverride(obj)
+
+    def __init__(self, obj):
+        omr.MPxDrawOverride.__init__(self, obj, None, False)
+
+    def supportedDrawAPIs(self):
+        return omr.MRenderer.kAllDevices
+
+    def hasUIDrawables(self):
+        return True
+
+    def isBounded(self, objPath, cameraPath):
+        return False
+
+    def prepareForDraw(self, objPath, cameraPath, frameContext, oldData):
+        data = oldData if isinstance(oldData, ScreenLocatorData) else ScreenLocatorData()
+        matrix = objPath.inclusiveMatrix()
+        data.position = om.MPoint(matrix[12], matrix[13], matrix[14])
+        data.halfSize = om.MPlug(objPath.node(), ScreenLocator.pixelSize).asDouble() * 0.5
+        data.color = omr.MGeometryUtilities.wireframeColor(objPath) # Override color, or the selection highlight.
+        return data
+
+    def addUIDrawables(self, objPath, drawManager, frameContext, data):
+        if not isinstance(data, ScreenLocatorData):
+            return
+
+        # World >> viewport pixels. Returns (x, y), or (x, y, z) in newer versions.
+        screen = frameContext.worldToViewport(data.position)
+        x, y = screen[0], screen[1]
+        size = data.halfSize
+
+        drawManager.beginDrawable()
+        drawManager.setColor(data.color)
+        drawManager.line2d(om.MPoint(x - size, y), om.MPoint(x + size, y))
+        drawManager.line2d(om.MPoint(x, y - size), om.MPoint(x, y + size))
+        drawManager.circle2d(om.MPoint(x, y), size * 0.4)
+        drawManager.endDrawable()
+
+
+class BulkEditCommand(om.MPxCommand):
+    """
+    Puts the last committed hkLib.bulk_edit.BulkEdit in the undo queue.
+    The edits are already done when this runs, so doIt only takes them. Undo and redo replay the stored deltas
+    (created curves & connections, changed keys), instead of thousands of recorded commands.
+    """
+    commandName = "hkBulkEdit"
+
+    def __init__(self):
+        om.MPxCommand.__init__(self)
+        self.edit = None
+
+    @classmethod
+    def creator(cls):
+        return cls()
+
+    def doIt(self, args):
+        from hkLib import bulk_edit # "scripts" is on sys.path through hkTools.mod.
+        self.edit = bulk_edit.take_pending()
+
+    def redoIt(self):
+        self.edit.redo_it()
+
+    def undoIt(self):
+        self.edit.undo_it()
+
+    def isUndoable(self):
+        return self.edit is not None
+
+
+def initializePlugin(plugin):
+    pluginFn = om.MFnPlugin(plugin, "Hyuk Ko", "1.0", "Any")
+    pluginFn.registerNode(ZlocProjector.typeName, ZlocProjector.typeId, ZlocProjector.creator, ZlocProjector.initialize, om.MPxNode.kDependNode)
+    pluginFn.registerNode(ZlocRays.typeName, ZlocRays.typeId, ZlocRays.creator, ZlocRays.initialize, om.MPxNode.kLocatorNode, ZlocRays.drawDbClassification)
+    omr.MDrawRegistry.registerDrawOverrideCreator(ZlocRays.drawDbClassification, ZlocRays.drawRegistrantId, ZlocRaysDrawOverride.creator)
+    pluginFn.registerNode(ScreenLocator.typeName, ScreenLocator.typeId, ScreenLocator.creator, ScreenLocator.initialize, om.MPxNode.kLocatorNode, ScreenLocator.drawDbClassification)
+    omr.MDrawRegistry.registerDrawOverrideCreator(ScreenLocator.drawDbClassification, ScreenLocator.drawRegistrantId, ScreenLocatorDrawOverride.creator)
+    pluginFn.registerCommand(BulkEditCommand.commandName, BulkEditCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    pluginFn = om.MFnPlugin(plugin)
+    pluginFn.deregisterCommand(BulkEditCommand.commandName)
+    omr.MDrawRegistry.deregisterDrawOverrideCreator(ScreenLocator.drawDbClassification, ScreenLocator.drawRegistrantId)
+    pluginFn.deregisterNode(ScreenLocator.typeId)
+    omr.MDrawRegistry.deregisterDrawOverrideCreator(ZlocRays.drawDbClassification, ZlocRays.drawRegistrantId)
+    pluginFn.deregisterNode(ZlocRays.typeId)
+    pluginFn.deregisterNode(ZlocProjector.typeId)
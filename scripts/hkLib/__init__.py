@@ -0,0 +1,4 @@
+# Shared modules for hkTools.
+#
+# Modules in this package are imported by the shelf and run time command scripts.
+# "scripts" is added to sys.path by the hkTools Maya module(hkTools.mod), which is written by the installer.
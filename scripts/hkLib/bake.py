@@ -0,0 +1,333 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Direct bake engine shared by the bake tools. Needs Maya(maya.api), unlike the other hkLib modules.
+#
+# Instead of constraining a target and stepping the whole scene with bakeResults, the source's world matrix and
+# the target's parent inverse matrix are sampled in a DG context per frame. Nothing redraws and the current time never changes.
+# Each sample is decomposed with the target's rotate order, euler filtered, and written with one addKeys call per curve.
+# "bake_targets" does this BAKE_CHUNK_SIZE frames at a time, with a progress window that can be cancelled(Esc).
+# Its edits are one "hkBulkEdit" in the undo queue(hkLib.bulk_edit), so undo and redo are instant after long bakes.
+#
+# Sampling:
+# SAMPLE_STEP - Every "step" frames from start to end. 1 is every frame, 2 is on twos, 0.5 adds a sub-frame between frames.
+# SAMPLE_KEYS - Only the key times of the sources and their parents(plus start and end).
+# "skip_unchanged" drops samples whose matrix is identical to the ones before and after it. Holds keep their first and last key.
+#
+# Usage:
+"""
+from hkLib import bake
+frames = bake.get_sample_frames(1001, 1100, bake.SAMPLE_STEP, step=1.0)
+cancelled = False
+mc.undoInfo(openChunk=True)
+try:
+    bake.bake_targets([("|pCube1", "|bakerLoc_1", frames, 0, bake.CHANNEL_LIST, True)], title="Loc Baker")
+except bake.BakeCancelled:
+    cancelled = True
+finally:
+    mc.undoInfo(closeChunk=True)
+if cancelled:
+    mc.undo() # Removes the baked keys and the created nodes.
+"""
+
+import math
+from array import array
+
+import maya.cmds as mc
+import maya.api.OpenMaya as om2
+
+from hkLib import bulk_edit
+
+
+CHANNEL_LIST = ["tx", "ty", "tz", "rx", "ry", "rz", "sx", "sy", "sz"]
+
+SAMPLE_STEP = "step"
+SAMPLE_KEYS = "keys"
+
+FRAME_TOLERANCE = 1e-6 # Frames closer than this are the same frame.
+
+BAKE_CHUNK_SIZE = 250 # Frames sampled and keyed at a time. Memory stays the same however long the range is.
+
+
+class BakeCancelled(Exception):
+    """
+    Raised when a bake is cancelled from its progress window.
+    """
+
+
+class Progress(object):
+    """
+    Interruptable progress window. "step" raises BakeCancelled once Esc is pressed.
+    Does nothing in batch mode(mayapy).
+    """
+    def __init__(self, title, total):
+        self.enabled = not mc.about(batch=True)
+        if self.enabled:
+            mc.progressWindow(title=title, status=title, progress=0, maxValue=max(1, int(total)), isInterruptable=True)
+
+    def step(self, status=None):
+        if not self.enabled:
+            return
+        if mc.progressWindow(q=True, isCancelled=True):
+            raise BakeCancelled()
+        if status is None:
+            mc.progressWindow(e=True, step=1)
+        else:
+            mc.progressWindow(e=True, step=1, status=status)
+
+    def close(self):
+        if self.enabled:
+            mc.progressWindow(endProgress=True)
+
+
+def get_chunks(frames, chunk_size=BAKE_CHUNK_SIZE):
+    """
+    Splits "frames" into lists of "chunk_size" frames. The last one can be shorter, never empty.
+    """
+    return [frames[start:start + chunk_size] for start in range(0, len(frames), chunk_size)]
+
+
+def get_chunk_count(frames, chunk_size=BAKE_CHUNK_SIZE):
+    return len(get_chunks(frames, chunk_size))
+
+
+def get_sample_frames(start, end, mode=SAMPLE_STEP, step=1.0, source_list=()):
+    """
+    Returns the sorted frames to sample between "start" and "end". Both are always included.
+    """
+    frame_set = set([float(start), float(end)])
+    if mode == SAMPLE_KEYS:
+        node_list = []
+        for source in source_list:
+            node = source
+            while node: # Parents move the source too.
+                node_list.append(node)
+                parent = mc.listRelatives(node, parent=True, fullPath=True)
+                node = parent[0] if parent else None
+        key_times = mc.keyframe(node_list, q=True, timeChange=True, time=(start, end)) if node_list else None
+        frame_set.update(key_times or [])
+    else:
+        if step <= 0:
+            raise ValueError("Sample step must be greater than 0.")
+        count = int(math.floor((end - start) / float(step) + FRAME_TOLERANCE))
+        frame_set.update(round(start + i * step, 6) for i in range(count + 1))
+
+    frame_list = []
+    for frame in sorted(frame_set):
+        if not frame_list or frame - frame_list[-1] > FRAME_TOLERANCE:
+            frame_list.append(frame)
+    return frame_list
+
+
+def get_plug(name):
+    sel = om2.MSelectionList()
+    sel.add(name)
+    return sel.getPlug(0)
+
+
+def plug_value(plug, *context):
+    # Matrix plugs return 16 floats(row-major), numeric plugs return a float.
+    if plug.attribute().hasFn(om2.MFn.kTypedAttribute):
+        return tuple(om2.MFnMatrixData(plug.asMObject(*context)).matrix())
+    return plug.asDouble(*context)
+
+
+def sample_plugs(plug_list, frames, reader_list=None):
+    """
+    Returns [[value at each frame] for each plug].
+    Every plug is evaluated in a DG context per frame, so the current time never changes and nothing redraws.
+    "reader_list" has a "reader(plug, *context)" per plug, for plugs "plug_value" does not read(e.g. meshes). Defaults to "plug_value".
+    """
+    if reader_list is None:
+        reader_list = [plug_value] * len(plug_list)
+
+    uiUnit = om2.MTime.uiUnit()
+    sample_list = [[] for _ in plug_list]
+    for frame in frames:
+        context = om2.MDGContext(om2.MTime(frame, uiUnit))
+        if hasattr(om2, "MDGContextGuard"): # Maya 2019 and above. Passing a context to MPlug is obsolete.
+            guard = om2.MDGContextGuard(context)
+            try:
+                for samples, plug, reader in zip(sample_list, plug_list, reader_list):
+                    samples.append(reader(plug))
+            finally:
+                del guard
+        else:
+            for samples, plug, reader in zip(sample_list, plug_list, reader_list):
+                samples.append(reader(plug, context))
+    return sample_list
+
+
+def decompose_matrices(matrices, rotate_order, channel_list, previous=None):
+    """
+    Returns {channel: array("d")} of "channel_list" for each matrix(16 floats, in the target's parent space),
+    and the last rotation(MEulerRotation), to continue the euler filter on the next chunk.
+    "rotate_order" is Maya's rotateOrder value(0: xyz ... 5: zyx). Rotations are in radians, Maya's internal unit.
+    Each rotation is set to the closest solution of the previous one, so curves do not flip(euler filter).
+    """
+    channel_dict = dict((channel, array("d")) for channel in channel_list)
+    translate_list = [(i, channel_dict[channel]) for i, channel in enumerate(("tx", "ty", "tz")) if channel in channel_dict]
+    rotate_list = [(i, channel_dict[channel]) for i, channel in enumerate(("rx", "ry", "rz")) if channel in channel_dict]
+    scale_list = [(i, channel_dict[channel]) for i, channel in enumerate(("sx", "sy", "sz")) if channel in channel_dict]
+
+    for matrix in matrices:
+        xform = om2.MTransformationMatrix(om2.MMatrix(matrix))
+        if translate_list:
+            translate = xform.translation(om2.MSpace.kTransform)
+            for i, values in translate_list:
+                values.append(translate[i])
+        if rotate_list:
+            xform.reorderRotation(rotate_order + 1) # MTransformationMatrix.kXYZ is 1.
+            rotation = xform.rotation()
+            if previous is not None:
+                rotation.setToClosestSolution(previous)
+            previous = rotation
+            for i, values in rotate_list:
+                values.append(rotation[i])
+        if scale_list:
+            scale = xform.scale(om2.MSpace.kTransform)
+            for i, values in scale_list:
+                values.append(scale[i])
+    return channel_dict, previous
+
+
+def multiply_matrices(a_list, b_list):
+    """
+    Returns [a * b] for each pair of 16 float matrices.
+    """
+    return [tuple(om2.MMatrix(a) * om2.MMatrix(b)) for a, b in zip(a_list, b_list)]
+
+
+def iter_channel_chunks(source, target, frames, rotate_order, channel_list, skip_unchanged=False, chunk_size=BAKE_CHUNK_SIZE):
+    """
+    Samples "source"'s world matrix and "target"'s parent inverse matrix, "chunk_size" frames at a time, and yields
+    (frames, channels) "target" needs to match "source" in world space. Same result as point, orient & scale constraints with bakeResults.
+    "target" None is a child of the world.
+    Yields once per chunk of "get_chunks", so "get_chunk_count" is the number of progress steps.
+    "skip_unchanged" drops samples identical to both neighbours. A chunk can then have fewer frames(or none).
+    """
+    plug_list = [get_plug(source + ".worldMatrix[0]")]
+    if target is not None:
+        plug_list.append(get_plug(target + ".parentInverseMatrix[0]"))
+
+    rotation = None
+    previous_sample = current_sample = None
+    chunk_list = get_chunks(frames, chunk_size)
+    for index, chunk_frames in enumerate(chunk_list):
+        sample_list = sample_plugs(plug_list, chunk_frames)
+        matrices = sample_list[0] if target is None else multiply_matrices(*sample_list)
+
+        if skip_unchanged:
+            kept_frames, kept_matrices = [], []
+            for sample in zip(chunk_frames, matrices):
+                if current_sample is not None and (previous_sample is None or not (previous_sample[1] == current_sample[1] == sample[1])):
+                    kept_frames.append(current_sample[0])
+                    kept_matrices.append(current_sample[1])
+                previous_sample, current_sample = current_sample, sample
+            if index == len(chunk_list) - 1: # Last sample is always kept.
+                kept_frames.append(current_sample[0])
+                kept_matrices.append(current_sample[1])
+            chunk_frames, matrices = kept_frames, kept_matrices
+
+        channel_dict, rotation = decompose_matrices(matrices, rotate_order, channel_list, rotation)
+        yield chunk_frames, channel_dict
+
+
+def sample_channels(source, target, frames, rotate_order, channel_list, skip_unchanged=False, progress=None):
+    """
+    Same as "iter_channel_chunks", in one piece. Returns (frames, channels).
+    "frames" are fewer than given if "skip_unchanged" dropped some. "progress"(Progress) is stepped per chunk.
+    """
+    frame_list = []
+    channel_dict = dict((channel, array("d")) for channel in channel_list)
+    for chunk_frames, chunk_dict in iter_channel_chunks(source, target, frames, rotate_order, channel_list, skip_unchanged):
+        if progress is not None:
+            progress.step()
+        frame_list += chunk_frames
+        for channel in channel_list:
+            channel_dict[channel].extend(chunk_dict[channel])
+    return frame_list, channel_dict
+
+
+def set_channels(node, channel_dict, edit):
+    """
+    Sets each channel of "node" to the first value of its samples, through "edit"(bulk_edit.BulkEdit). For single frame bakes.
+    """
+    for channel in CHANNEL_LIST:
+        if channel in channel_dict:
+            edit.set_value(get_plug(node + "." + channel), channel_dict[channel][0])
+
+
+def write_channels(node, frames, channel_dict, edit, keep_existing=False):
+    """
+    Keys each channel of "node" at "frames" through "edit"(bulk_edit.BulkEdit). One addKeys call per curve.
+    Existing keys are replaced, unless "keep_existing"(used to append chunks).
+    Missing curves are created by "edit" too, so they are undone with the keys.
+    """
+    if not frames:
+        return
+    for channel in CHANNEL_LIST:
+        if channel in channel_dict:
+            edit.set_keys(get_plug(node + "." + channel), frames, channel_dict[channel], keep_existing)
+
+
+def bake_targets(job_list, title="Bake", chunk_size=BAKE_CHUNK_SIZE):
+    """
+    Bakes [(source, target, frames, rotate_order, channel_list, skip_unchanged)] chunk by chunk, with an interruptable progress window.
+    Only one chunk of samples is in memory at a time. Each chunk is keyed as soon as it is decomposed.
+    A single frame sets the channels instead of keying them.
+
+    All curves, keys and values are undone and redone as one "hkBulkEdit", whatever the number of targets and frames.
+    If cancelled, what was baked so far is still committed and BakeCancelled is raised.
+    Undo the caller's undo chunk on BakeCancelled to remove it with the created nodes.
+    """
+    progress = Progress(title, sum(get_chunk_count(job[2], chunk_size) for job in job_list if job[2] and job[4]))
+    try:
+        with bulk_edit.BulkEdit() as edit:
+            for source, target, frames, rotate_order, channel_list, skip_unchanged in job_list:
+                if not frames or not channel_list:
+                    continue
+
+                status = "{0}: {1}".format(title, target.split("|")[-1])
+                if len(frames) == 1:
+                    progress.step(status)
+                    frames, channel_dict = sample_channels(source, target, frames, rotate_order, channel_list)
+                    set_channels(target, channel_dict, edit)
+                    continue
+
+                keep_existing = False
+                for chunk_frames, channel_dict in iter_channel_chunks(source, target, frames, rotate_order, channel_list, skip_unchanged, chunk_size):
+                    progress.step(status)
+                    if chunk_frames:
+                        write_channels(target, chunk_frames, channel_dict, edit, keep_existing)
+                        keep_existing = True
+    finally:
+        progress.close()
@@ -0,0 +1,174 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Headless bake worker for "Offload" bakes. Runs in mayapy, opens a scene snapshot and bakes its slice of the objects with hkLib.bake.
+# The result is written to a compact curve file, which the artist's session reads back and merges.
+#
+# About Job File(.json)
+# {"scene": <snapshot path>, "output": <curve file path>, "frames": [frame, ...], "channels": ["tx", ...],
+#  "skip_unchanged": <bool>, "pairs": [[<source>, <target>, <target rotate order>], ...]}
+#
+# About Curve File(.hkcurve, little-endian)
+# Header:      "HKCURVE\0" | uint32 version | uint32 curve count
+# Curve Table: (uint32 name length | utf-8 "<node>.<channel>" | uint64 key count) per curve
+# Samples:     (float64 frames[key count] | float64 values[key count]) per curve, in table order.
+#              Samples start on an 8 byte boundary. Values are in Maya's internal units(cm, radians).
+#
+# Usage:
+# mayapy -m hkLib.bake_worker job.json
+"""
+from hkLib import bake_worker
+curve_list = bake_worker.read_curves("/tmp/bake/worker_0.hkcurve") # [("|bakerLoc_1", "tx", frames, values), ...]
+"""
+
+import json
+import struct
+import sys
+from array import array
+
+
+CURVE_MAGIC = b"HKCURVE\0"
+CURVE_VERSION = 1
+CURVE_HEADER = struct.Struct("<8sII")
+CURVE_NAME_LENGTH = struct.Struct("<I")
+CURVE_KEY_COUNT = struct.Struct("<Q") # Follows "uint32 name length | utf-8 name".
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _to_bytes(column):
+    column = array("d", column)
+    if sys.byteorder != "little":
+        column.byteswap()
+    if sys.version_info[0] < 3:
+        return column.tostring()
+    return column.tobytes()
+
+
+def _from_bytes(buf):
+    column = array("d")
+    if sys.version_info[0] < 3:
+        column.fromstring(buf)
+    else:
+        column.frombytes(buf)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+def write_curves(path, curve_list):
+    """
+    Writes [(node, channel, frames, values)] to a curve file.
+    """
+    with open(path, "wb") as f:
+        f.write(CURVE_HEADER.pack(CURVE_MAGIC, CURVE_VERSION, len(curve_list)))
+        offset = CURVE_HEADER.size
+        for node, channel, frames, values in curve_list:
+            name = "{0}.{1}".format(node, channel).encode("utf-8")
+            f.write(CURVE_NAME_LENGTH.pack(len(name)) + name + CURVE_KEY_COUNT.pack(len(frames)))
+            offset += CURVE_NAME_LENGTH.size + len(name) + CURVE_KEY_COUNT.size
+        f.write(b"\0" * (_align(offset) - offset))
+
+        for node, channel, frames, values in curve_list:
+            f.write(_to_bytes(frames))
+            f.write(_to_bytes(values))
+
+
+def read_curves(path):
+    """
+    Reads a curve file. Returns [(node, channel, frames, values)].
+    """
+    with open(path, "rb") as f:
+        buf = f.read()
+
+    magic, version, curve_count = CURVE_HEADER.unpack_from(buf, 0)
+    if magic != CURVE_MAGIC:
+        raise ValueError("{0} is not a curve file.".format(path))
+    if version != CURVE_VERSION:
+        raise ValueError("{0} is version {1}. Only version {2} is supported.".format(path, version, CURVE_VERSION))
+
+    offset = CURVE_HEADER.size
+    table = []
+    for _ in range(curve_count):
+        name_length, = CURVE_NAME_LENGTH.unpack_from(buf, offset)
+        offset += CURVE_NAME_LENGTH.size
+        name = buf[offset:offset + name_length].decode("utf-8")
+        offset += name_length
+        key_count, = CURVE_KEY_COUNT.unpack_from(buf, offset)
+        offset += CURVE_KEY_COUNT.size
+        table.append((name, key_count))
+
+    offset = _align(offset)
+    if len(buf) < offset + sum(16 * key_count for name, key_count in table):
+        raise ValueError("{0} is truncated.".format(path))
+
+    curve_list = []
+    for name, key_count in table:
+        size = 8 * key_count
+        node, channel = name.rsplit(".", 1)
+        curve_list.append((node, channel, _from_bytes(buf[offset:offset + size]), _from_bytes(buf[offset + size:offset + 2 * size])))
+        offset += 2 * size
+    return curve_list
+
+
+def run_job(job_path):
+    """
+    Bakes one job file. Must run in mayapy.
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    try:
+        import maya.cmds as mc
+        from hkLib import bake
+
+        with open(job_path, "r") as f:
+            job = json.load(f)
+
+        mc.file(job["scene"], open=True, force=True)
+
+        curve_list = []
+        for source, target, rotate_order in job["pairs"]:
+            frames, channel_dict = bake.sample_channels(source, target, job["frames"], rotate_order, job["channels"], job["skip_unchanged"])
+            for channel in bake.CHANNEL_LIST:
+                if channel in channel_dict:
+                    curve_list.append((target, channel, frames, channel_dict[channel]))
+
+        write_curves(job["output"], curve_list)
+    finally:
+        maya.standalone.uninitialize()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: mayapy -m hkLib.bake_worker <job.json>")
+    run_job(sys.argv[1])
@@ -0,0 +1,161 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Bulk scene edits that are undone and redone as one "hkBulkEdit" command(hkToolsNodes plug-in). Needs Maya(maya.api).
+#
+# Edits go through an MDGModifier(curve creation, connections, plug values) and an MAnimCurveChange(keys).
+# Only these deltas are kept for undo, instead of one recorded command per key, attribute or node.
+# Undo and redo take about as long as copying the key arrays, however many curves were written.
+#
+# Usage:
+"""
+from hkLib import bulk_edit
+with bulk_edit.BulkEdit() as edit:
+    edit.set_keys(plug, [1001, 1002, 1003], [0.0, 0.5, 1.0])
+# One "hkBulkEdit" in the undo queue. Inside an undo chunk it is undone with the rest of the chunk.
+"""
+
+import maya.cmds as mc
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+
+from hkLib import nodes
+
+
+_pending_list = [] # Committed edits waiting for "hkBulkEdit" to take them.
+
+
+def take_pending():
+    """
+    Called by "hkBulkEdit". Returns the edit committed last, or None if there is none(run by hand).
+    """
+    if not _pending_list:
+        return None
+    return _pending_list.pop()
+
+
+class BulkEdit(object):
+    """
+    Collects edits made with its methods. "commit"(or leaving the "with" block) puts them in the undo queue as one step.
+    Edits are done right away, so the scene can be read between them.
+    """
+    def __init__(self):
+        self.modifier = om2.MDGModifier()
+        self.curve_change = oma2.MAnimCurveChange()
+        self.committed = False
+        self.finish_func = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.commit() # Also on errors, so whatever was done can be undone.
+        return False
+
+    def get_curve(self, plug):
+        """
+        Returns the MFnAnimCurve of "plug". A curve is created and connected if there is none.
+        """
+        curve_list = oma2.MAnimUtil.findAnimation(plug)
+        if curve_list:
+            return oma2.MFnAnimCurve(curve_list[0])
+
+        curve = oma2.MFnAnimCurve()
+        curve.create(plug, modifier=self.modifier) # Curve type follows the plug(linear, angular, unitless).
+        self.modifier.doIt() # Only runs what was not done yet.
+        return curve
+
+    def rename(self, node, name):
+        """
+        Renames "node"(MObject), e.g. a curve returned by "get_curve".
+        """
+        self.modifier.renameNode(node, name)
+        self.modifier.doIt()
+
+    def set_keys(self, plug, times, values, keep_existing=False, tangent_type=oma2.MFnAnimCurve.kTangentGlobal):
+        """
+        Keys "plug" with all times(frames in the UI unit) and values(internal units) at once.
+        Existing keys are replaced, unless "keep_existing".
+        """
+        if len(times) == 0:
+            return
+        uiUnit = om2.MTime.uiUnit()
+        self.get_curve(plug).addKeys(om2.MTimeArray([om2.MTime(t, uiUnit) for t in times]), om2.MDoubleArray(values),
+                                     tangent_type, tangent_type,
+                                     keep_existing, self.curve_change)
+
+    def set_value(self, plug, value):
+        """
+        Sets a numeric plug(internal units).
+        """
+        self.modifier.newPlugValueDouble(plug, value)
+        self.modifier.doIt()
+
+    def set_string(self, plug, value):
+        """
+        Sets a string plug.
+        """
+        self.modifier.newPlugValueString(plug, value)
+        self.modifier.doIt()
+
+    def defer(self, finish_func):
+        """
+        Marks the edit as unfinished: more edits(e.g. keys filled in idle time) are added to it after "commit".
+        "finish_func" makes all of them right away. It is called before undo, so undo always covers the whole edit.
+        Call with None once the edit is finished(or the rest is dropped).
+        """
+        self.finish_func = finish_func
+
+    def undo_it(self):
+        if self.finish_func is not None:
+            finish_func, self.finish_func = self.finish_func, None
+            finish_func()
+        self.curve_change.undoIt()
+        self.modifier.undoIt()
+
+    def redo_it(self):
+        self.modifier.doIt()
+        self.curve_change.redoIt()
+
+    def commit(self):
+        """
+        Puts the edits in the undo queue as one "hkBulkEdit". Does nothing the second time.
+        """
+        if self.committed:
+            return
+        self.committed = True
+        nodes.load_plugin()
+        _pending_list.append(self)
+        try:
+            mc.hkBulkEdit()
+        finally:
+            if self in _pending_list: # Not taken if the command failed.
+                _pending_list.remove(self)
@@ -0,0 +1,103 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Center3D film offset, shared by the "center3d" and "tloc" hotkeys.
+# The Center3D camera is a child of the shot camera whose film offset keeps a locator in the middle of the frame.
+# Point in shot camera space(x, y, z):
+# horizontalFilmOffset = x * fl / (25.4 * -z)
+# verticalFilmOffset = y * fl / (25.4 * -z)
+#
+# "create_center3d_network" needs Maya. "compute_center3d_offsets" does not.
+#
+# Usage:
+"""
+from hkLib import film_offset
+node_list = film_offset.create_center3d_network(center3d_loc, shot_cam_trans, shot_cam_shape, center3d_cam_shape)
+hfo_list, vfo_list = film_offset.compute_center3d_offsets(cam_inverse_matrices, focal_lengths, centroid_matrices)
+"""
+
+from hkLib import projection
+
+
+def create_center3d_network(center3d_loc, shot_cam_trans, shot_cam_shape, center3d_cam_shape):
+    """
+    Drives the Center3D camera's film offset with utility nodes, so it centers on "center3d_loc".
+    Same result as the old "World Space to Image Space" expression, without any MEL or Python per frame.
+    Returns the created nodes.
+    """
+    import maya.cmds as mc
+
+    # World >> Shot Camera Space
+    point_matrix_mult = mc.createNode('pointMatrixMult', name=center3d_loc + '_pointMatrixMult')
+    mc.connectAttr(center3d_loc + '.translate', point_matrix_mult + '.inPoint')
+    mc.connectAttr(shot_cam_trans + '.worldInverseMatrix[0]', point_matrix_mult + '.inMatrix')
+
+    # x * fl, y * fl
+    focal_mult = mc.createNode('multiplyDivide', name=center3d_loc + '_focalMult')
+    mc.connectAttr(point_matrix_mult + '.outputX', focal_mult + '.input1X')
+    mc.connectAttr(point_matrix_mult + '.outputY', focal_mult + '.input1Y')
+    mc.connectAttr(shot_cam_shape + '.fl', focal_mult + '.input2X')
+    mc.connectAttr(shot_cam_shape + '.fl', focal_mult + '.input2Y')
+
+    # 25.4 * -z (mm to inch)
+    depth_mult = mc.createNode('multiplyDivide', name=center3d_loc + '_depthMult')
+    mc.connectAttr(point_matrix_mult + '.outputZ', depth_mult + '.input1X')
+    mc.setAttr(depth_mult + '.input2X', -projection.MM_PER_INCH)
+
+    # Film Offset
+    film_offset_div = mc.createNode('multiplyDivide', name=center3d_loc + '_filmOffsetDiv')
+    mc.setAttr(film_offset_div + '.operation', 2) # Divide
+    mc.connectAttr(focal_mult + '.outputX', film_offset_div + '.input1X')
+    mc.connectAttr(focal_mult + '.outputY', film_offset_div + '.input1Y')
+    mc.connectAttr(depth_mult + '.outputX', film_offset_div + '.input2X')
+    mc.connectAttr(depth_mult + '.outputX', film_offset_div + '.input2Y')
+    mc.connectAttr(film_offset_div + '.outputX', center3d_cam_shape + '.horizontalFilmOffset')
+    mc.connectAttr(film_offset_div + '.outputY', center3d_cam_shape + '.verticalFilmOffset')
+
+    return [point_matrix_mult, focal_mult, depth_mult, film_offset_div]
+
+
+def compute_center3d_offsets(cam_inverse_matrices, focal_lengths, centroid_matrices):
+    """
+    Same maths as "create_center3d_network", for every sample at once. Returns (horizontal offsets, vertical offsets).
+    Frames where the centroid is behind the camera keep the previous offset.
+    """
+    hfo_list = []
+    vfo_list = []
+    hfo = vfo = 0.0
+    for cam_inverse, focal_length, centroid in zip(cam_inverse_matrices, focal_lengths, centroid_matrices):
+        x, y, z = projection.transform_point(cam_inverse, centroid[12], centroid[13], centroid[14])
+        film = projection.camera_to_film(x, y, z, focal_length)
+        if film is not None:
+            hfo, vfo = film
+        hfo_list.append(hfo)
+        vfo_list.append(vfo)
+    return hfo_list, vfo_list
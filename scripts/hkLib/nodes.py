@@ -0,0 +1,62 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Loads the hkToolsNodes plug-in and creates its nodes. Needs Maya.
+#
+# Usage:
+"""
+from hkLib import nodes
+loc_trans = nodes.create_screen_locator("tloc_#", pixel_size=20.0)
+nodes.load_plugin() # Before creating "zlocProjector", "zlocRays" or running "hkBulkEdit".
+"""
+
+import maya.cmds as mc
+
+
+PLUGIN = "hkToolsNodes" # Provides "zlocProjector", "zlocRays", "hkScreenLocator" & "hkBulkEdit".
+SCREEN_LOCATOR_PIXEL_SIZE = 20.0 # Default "pixelSize" of "hkScreenLocator".
+
+
+def load_plugin():
+    if not mc.pluginInfo(PLUGIN, q=True, loaded=True):
+        mc.loadPlugin(PLUGIN, quiet=True)
+
+
+def create_screen_locator(name, pixel_size=SCREEN_LOCATOR_PIXEL_SIZE):
+    """
+    Creates an "hkScreenLocator" under a new transform, like mc.spaceLocator. Returns the transform.
+    """
+    load_plugin()
+    loc_shape = mc.createNode("hkScreenLocator", skipSelect=True)
+    loc_trans = mc.rename(mc.listRelatives(loc_shape, parent=True)[0], name)
+    loc_shape = mc.rename(mc.listRelatives(loc_trans, shapes=True, fullPath=True)[0], loc_trans + "Shape")
+    mc.setAttr(loc_shape + ".pixelSize", pixel_size)
+    return loc_trans
@@ -0,0 +1,107 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Camera projection maths shared by the ZLOC tools. Does not depend on Maya, so it can be used(and tested) in any Python.
+#
+# Conventions are the ones ZLOC imports with:
+# Matrices are 16 floats, row-major, row vectors(Maya's MMatrix layout, translation in the last row).
+# The camera looks down -Z. U & V are film back positions in inches, before dividing by hfa/vfa.
+# tx = hfa * 2.54 * tz / (fl / 10) * -1 * (U / hfa)  >>  U = x * fl / (25.4 * -z)
+#
+# Usage:
+"""
+from hkLib import projection
+frames, u, v = projection.project_samples(frames, cam_inverse_matrices, focal_lengths, point_matrices)
+"""
+
+from array import array
+
+
+MM_PER_INCH = 25.4
+
+
+def transform_point(matrix, x, y, z):
+    """
+    Returns (x, y, z) * matrix.
+    """
+    m = matrix
+    return (x * m[0] + y * m[4] + z * m[8] + m[12],
+            x * m[1] + y * m[5] + z * m[9] + m[13],
+            x * m[2] + y * m[6] + z * m[10] + m[14])
+
+
+def camera_to_film(x, y, z, focal_length):
+    """
+    Returns the film back position(U, V in inches) of a camera space point, or None if it is not in front of the camera.
+    """
+    if z >= 0.0:
+        return None
+    scale = focal_length / (MM_PER_INCH * -z)
+    return x * scale, y * scale
+
+
+def transform_vector(matrix, x, y, z):
+    """
+    Returns (x, y, z) * matrix, without the translation.
+    """
+    m = matrix
+    return (x * m[0] + y * m[4] + z * m[8],
+            x * m[1] + y * m[5] + z * m[9],
+            x * m[2] + y * m[6] + z * m[10])
+
+
+def film_to_camera(u, v, focal_length):
+    """
+    Inverse of "camera_to_film". Returns the camera space direction(z = -1) through the film back position U, V(inches).
+    """
+    scale = MM_PER_INCH / focal_length
+    return u * scale, v * scale, -1.0
+
+
+def project_samples(frames, cam_inverse_matrices, focal_lengths, point_matrices):
+    """
+    Projects one point through the camera for every sample.
+    "cam_inverse_matrices" and "point_matrices" are world matrices(inverse for the camera), one per frame.
+    The point is the translation of its world matrix.
+    Returns (frames, u, v) as arrays. Samples behind the camera are left out, like 3DE leaves out untracked frames.
+    """
+    out_frames = array("i")
+    out_u = array("d")
+    out_v = array("d")
+    for frame, cam_inverse, focal_length, point_matrix in zip(frames, cam_inverse_matrices, focal_lengths, point_matrices):
+        x, y, z = transform_point(cam_inverse, point_matrix[12], point_matrix[13], point_matrix[14])
+        film = camera_to_film(x, y, z, focal_length)
+        if film is None:
+            continue
+        out_frames.append(frame)
+        out_u.append(film[0])
+        out_v.append(film[1])
+    return out_frames, out_u, out_v
@@ -0,0 +1,101 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Tagged objectSets("hkTools_<tag>_set") that hold the helper nodes a tool created(Center3D, horizonLine, dualImage...).
+# Tools find and clean up their nodes through the set, instead of scanning the scene by name. Needs Maya.
+#
+# Usage:
+"""
+from hkLib import registry
+registry.register_nodes("horizonLine", [horizonLineTrans, horizonLineExp])
+if registry.get_registered_nodes("horizonLine"):
+    registry.delete_registered_nodes("horizonLine")
+"""
+
+import maya.cmds as mc
+
+
+LEGACY_FILE_INFO = "hkToolsRegistry_{0}" # fileInfo key set once a scene was scanned for "tag"'s unregistered nodes.
+
+
+def get_registry_name(tag):
+    return "hkTools_{0}_set".format(tag)
+
+
+def register_nodes(tag, node_list):
+    """
+    Adds nodes to the "hkTools_<tag>_set" objectSet, so they can be found and cleaned up without scanning the scene.
+    """
+    registry = get_registry_name(tag)
+    if not mc.objExists(registry):
+        mc.sets(name=registry, empty=True)
+        mc.addAttr(registry, longName="hkToolsTag", dataType="string")
+        mc.setAttr(registry + ".hkToolsTag", tag, type="string")
+    mc.sets(node_list, addElement=registry)
+
+
+def get_registered_nodes(tag):
+    # Nodes deleted by the user drop out of the set by themselves.
+    registry = get_registry_name(tag)
+    if not mc.objExists(registry):
+        return []
+    return mc.sets(registry, q=True) or []
+
+
+def delete_registered_nodes(tag):
+    """
+    Deletes the nodes registered under "tag" and the registry itself. Nothing else in the scene is touched.
+    """
+    registry = get_registry_name(tag)
+    node_list = mc.ls(get_registered_nodes(tag), long=True)
+    if node_list:
+        mc.delete(node_list)
+    if mc.objExists(registry):
+        mc.delete(registry)
+
+
+def adopt_legacy_nodes(tag, pattern):
+    """
+    Registers the nodes that match "pattern"(what the tool used to glob for, e.g. "*center3d*" or "*.rayFrame") under "tag".
+    For scenes made before the registry existed. The scan runs once per scene, which is then marked in fileInfo.
+    """
+    key = LEGACY_FILE_INFO.format(tag)
+    if mc.fileInfo(key, q=True):
+        return
+    mc.fileInfo(key, "1")
+
+    registry = get_registry_name(tag)
+    node_list = [node for node in mc.ls(pattern, long=True, objectsOnly=True) if node != registry]
+    # Children go with their parents.
+    node_set = set(node_list)
+    node_list = [node for node in node_list if not any(node.startswith(parent + "|") for parent in node_set)]
+    if node_list:
+        register_nodes(tag, node_list)
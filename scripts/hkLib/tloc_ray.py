@@ -0,0 +1,94 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# TLOC rays, shared by "tloc", "tlocMark" and "tlocSolve". Needs Maya.
+#
+# A TLOC lies on the ray it was created on: TLOC GRP's pivot is the camera position at the Reference Frame,
+# and TLOC slides along the ray with "depth". "tlocMark" adds more rays from other frames(or cameras).
+#
+# Usage:
+"""
+from hkLib import tloc_ray
+if tloc_ray.is_tloc(node):
+    origin, direction = tloc_ray.get_reference_ray(node)
+origin, direction = tloc_ray.get_cursor_ray()
+"""
+
+import maya.cmds as mc
+import maya.OpenMaya as om
+import maya.OpenMayaUI as omui
+
+try:
+    from PySide import QtGui
+    import PySide.QtGui as QtWidgets
+except ImportError:
+    from PySide2 import QtGui, QtWidgets
+
+from hkLib import projection
+
+
+def is_tloc(node):
+    shape_list = mc.listRelatives(node, shapes=True, fullPath=True) or []
+    return len(shape_list) == 1 and mc.objectType(shape_list[0]) in ("locator", "hkScreenLocator") and mc.attributeQuery("depth", node=node, exists=True)
+
+
+def get_cursor_ray():
+    """
+    Returns (point on the near clip plane, direction) of the world space ray under the cursor in the active 3D view, as tuples.
+    """
+    cursor_pos = QtGui.QCursor.pos()
+    widget = QtWidgets.QApplication.widgetAt(cursor_pos)
+    relpos = widget.mapFromGlobal(cursor_pos)
+
+    position = om.MPoint()
+    direction = om.MVector()
+    omui.M3dView.active3dView().viewToWorld(
+        relpos.x(),
+        widget.height() - relpos.y(), # The relpos.y() alone returns a mirrored position. Must subtract it from the widget height.
+        position,
+        direction)
+
+    return (position.x, position.y, position.z), (direction.x, direction.y, direction.z)
+
+
+def get_reference_ray(tloc_trans):
+    """
+    Returns (origin, direction) of the ray TLOC was created on, or None if it has no Reference Frame key.
+    """
+    reference_frame = mc.keyframe(tloc_trans + ".rx", q=True) # Just for marking the Reference Frame
+    tloc_grp = mc.listRelatives(tloc_trans, parent=True, fullPath=True)
+    if not reference_frame or not tloc_grp:
+        return None
+
+    tloc_grp_matrix = mc.getAttr(tloc_grp[0] + ".worldMatrix", time=reference_frame[0])
+    origin = projection.transform_point(tloc_grp_matrix, *mc.getAttr(tloc_grp[0] + ".rotatePivot")[0])
+    target = mc.getAttr(tloc_trans + ".worldMatrix", time=reference_frame[0])[12:15]
+    return origin, (target[0] - origin[0], target[1] - origin[1], target[2] - origin[2])
@@ -0,0 +1,202 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Least-squares ray intersection. Does not depend on Maya, so it can be used(and tested) in any Python.
+#
+# A point seen from several cameras(or frames) lies on one ray per observation.
+# "triangulate" returns the point with the smallest sum of squared distances to all rays:
+# sum((I - d d^T)) p = sum((I - d d^T) o), d normalized.
+#
+# Usage:
+"""
+from hkLib import triangulation
+point, residual = triangulation.triangulate([(0, 0, 0), (10, 0, 0)], [(0, 0, -1), (-1, 0, -1)])
+# point ~= (0, 0, -10), residual ~= 0
+
+# 2D track(film back U, V in inches) + camera world matrix & focal length per sample
+point, residual, reprojection_error = triangulation.triangulate_film_track(u, v, cam_matrices, cam_inverse_matrices, focal_lengths)
+"""
+
+import math
+
+from hkLib import projection
+
+MIN_PARALLAX_DEGREES = 0.01 # Smaller angles between the camera positions seen from the point are a nodal pan.
+
+
+def normalize(vector):
+    x, y, z = vector
+    length = math.sqrt(x * x + y * y + z * z)
+    if length == 0.0:
+        raise ValueError("Ray direction has zero length.")
+    return x / length, y / length, z / length
+
+
+def solve3x3(a, b):
+    """
+    Solves a x = b for a 3x3 "a"(row-major, 9 floats) with Cramer's rule. Returns None if "a" is singular.
+    """
+    det = (a[0] * (a[4] * a[8] - a[5] * a[7])
+           - a[1] * (a[3] * a[8] - a[5] * a[6])
+           + a[2] * (a[3] * a[7] - a[4] * a[6]))
+    scale = max(abs(value) for value in a)
+    if scale == 0.0 or abs(det) <= 1e-12 * scale ** 3: # Parallel rays
+        return None
+    x = (b[0] * (a[4] * a[8] - a[5] * a[7])
+         - a[1] * (b[1] * a[8] - a[5] * b[2])
+         + a[2] * (b[1] * a[7] - a[4] * b[2])) / det
+    y = (a[0] * (b[1] * a[8] - a[5] * b[2])
+         - b[0] * (a[3] * a[8] - a[5] * a[6])
+         + a[2] * (a[3] * b[2] - b[1] * a[6])) / det
+    z = (a[0] * (a[4] * b[2] - b[1] * a[7])
+         - a[1] * (a[3] * b[2] - b[1] * a[6])
+         + b[0] * (a[3] * a[7] - a[4] * a[6])) / det
+    return x, y, z
+
+
+def ray_distance(point, origin, direction):
+    """
+    Distance from "point" to the ray("direction" normalized).
+    """
+    vx, vy, vz = point[0] - origin[0], point[1] - origin[1], point[2] - origin[2]
+    t = vx * direction[0] + vy * direction[1] + vz * direction[2]
+    dx, dy, dz = vx - t * direction[0], vy - t * direction[1], vz - t * direction[2]
+    return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+
+def triangulate(origins, directions):
+    """
+    Returns (point, residual) for rays given as lists of origins and directions.
+    "residual" is the RMS distance from the point to the rays, in scene units.
+    Returns (None, None) with fewer than two rays or when the rays are parallel.
+    """
+    if len(origins) < 2:
+        return None, None
+
+    a = [0.0] * 9
+    b = [0.0, 0.0, 0.0]
+    direction_list = []
+    for origin, direction in zip(origins, directions):
+        dx, dy, dz = direction = normalize(direction)
+        direction_list.append(direction)
+        # I - d d^T
+        m = (1.0 - dx * dx, -dx * dy, -dx * dz,
+             -dy * dx, 1.0 - dy * dy, -dy * dz,
+             -dz * dx, -dz * dy, 1.0 - dz * dz)
+        for i in range(9):
+            a[i] += m[i]
+        ox, oy, oz = origin
+        b[0] += m[0] * ox + m[1] * oy + m[2] * oz
+        b[1] += m[3] * ox + m[4] * oy + m[5] * oz
+        b[2] += m[6] * ox + m[7] * oy + m[8] * oz
+
+    point = solve3x3(a, b)
+    if point is None:
+        return None, None
+
+    squared = sum(ray_distance(point, origin, direction) ** 2 for origin, direction in zip(origins, direction_list))
+    return point, math.sqrt(squared / len(origins))
+
+
+def triangulate_batch(ray_list):
+    """
+    Triangulates many points. "ray_list" is [(origins, directions)] per point.
+    Returns [(point, residual)] in the same order.
+    """
+    return [triangulate(origins, directions) for origins, directions in ray_list]
+
+
+def film_track_rays(film_u, film_v, cam_matrices, focal_lengths):
+    """
+    Returns (origins, directions) of the world space rays through a 2D track.
+    "film_u" & "film_v" are film back positions in inches. "cam_matrices" are camera world matrices, one per sample.
+    """
+    origins = []
+    directions = []
+    for u, v, cam_matrix, focal_length in zip(film_u, film_v, cam_matrices, focal_lengths):
+        origins.append((cam_matrix[12], cam_matrix[13], cam_matrix[14]))
+        directions.append(projection.transform_vector(cam_matrix, *projection.film_to_camera(u, v, focal_length)))
+    return origins, directions
+
+
+def get_parallax(point, origins):
+    """
+    Largest angle(degrees) between the first ray origin and any other, seen from "point". 0 when "point" is on an origin.
+    """
+    vectors = []
+    for origin in origins:
+        vector = (origin[0] - point[0], origin[1] - point[1], origin[2] - point[2])
+        if vector == (0.0, 0.0, 0.0):
+            return 0.0
+        vectors.append(normalize(vector))
+    x, y, z = vectors[0]
+    smallest_cos = min(x * vx + y * vy + z * vz for vx, vy, vz in vectors)
+    return math.degrees(math.acos(max(-1.0, min(1.0, smallest_cos))))
+
+
+def reprojection_error(point, film_u, film_v, cam_inverse_matrices, focal_lengths, scales=None):
+    """
+    RMS distance(inches on the film back) between the 2D track and "point" projected through the camera.
+    "scales" multiplies each sample's distance, e.g. pixels per inch(width / hfa) of each sample's filmback for an error in pixels.
+    Samples where the point is behind the camera count as missing and are skipped. Returns None if every sample is.
+    """
+    if scales is None:
+        scales = [1.0] * len(film_u)
+    squared = 0.0
+    count = 0
+    for u, v, cam_inverse, focal_length, scale in zip(film_u, film_v, cam_inverse_matrices, focal_lengths, scales):
+        film = projection.camera_to_film(*(projection.transform_point(cam_inverse, *point) + (focal_length,)))
+        if film is None:
+            continue
+        squared += ((film[0] - u) ** 2 + (film[1] - v) ** 2) * scale * scale
+        count += 1
+    if count == 0:
+        return None
+    return math.sqrt(squared / count)
+
+
+def triangulate_film_track(film_u, film_v, cam_matrices, cam_inverse_matrices, focal_lengths, scales=None, min_parallax=MIN_PARALLAX_DEGREES):
+    """
+    Triangulates one 2D track against a solved camera.
+    Returns (point, residual, reprojection error), or (None, None, None) if the rays do not meet, the point is behind or at
+    the camera on any sample, or the camera barely moved(less than "min_parallax" degrees, e.g. a nodal pan with noisy tracks).
+    The reprojection error is in inches, or scaled per sample by "scales"(see "reprojection_error").
+    """
+    origins, directions = film_track_rays(film_u, film_v, cam_matrices, focal_lengths)
+    point, residual = triangulate(origins, directions)
+    if point is None:
+        return None, None, None
+    for cam_inverse in cam_inverse_matrices:
+        if projection.transform_point(cam_inverse, *point)[2] >= 0.0: # Behind or at the camera
+            return None, None, None
+    if get_parallax(point, origins) < min_parallax:
+        return None, None, None
+    return point, residual, reprojection_error(point, film_u, film_v, cam_inverse_matrices, focal_lengths, scales)
@@ -0,0 +1,333 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation:
+# Reader and writer for the ZLOC file formats. Does not depend on Maya, so it can be used(and tested) in any Python.
+#
+# About ZLOC Format(.zloc, text)
+# <name> <frame> <U> <V> <3DE4_color_index>
+"""
+zloc01 1 0.100000000000000 0.100000000000000 0
+zloc01 2 0.200000000000000 0.200000000000000 0
+zloc02 1 -0.100000000000000 -0.100000000000000 1
+"""
+#
+# About Binary ZLOC Format(.zlocb, little-endian)
+# Header:      "ZLOCBIN\0" | uint32 version | uint32 track count | uint64 sample count
+# Track Table: (uint32 name length | utf-8 name | int32 3DE4 color index | uint64 first sample | uint64 sample count) per track
+# Samples:     int32 frames[sample count] | float64 U[sample count] | float64 V[sample count]
+#              Each array starts on an 8 byte boundary. Samples of a track are contiguous and sorted by frame.
+#
+# Usage:
+"""
+from hkLib import zloc_file
+for track in zloc_file.read("/tmp/quick.zloc"): # .zloc or .zlocb
+    print(track.name, track.color, len(track))
+
+zloc_file.convert("/tmp/quick.zloc", "/tmp/quick.zlocb")
+zloc_file.write("/tmp/export.zloc", track_list) # .zloc or .zlocb, by extension
+"""
+# From a shell:
+# python zloc_file.py quick.zloc quick.zlocb
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+
+BINARY_MAGIC = b"ZLOCBIN\0"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<8sIIQ")
+BINARY_TRACK = struct.Struct("<iQQ") # Follows "uint32 name length | utf-8 name".
+BINARY_NAME_LENGTH = struct.Struct("<I")
+
+TEXT_LINE = "%s %d %.15f %.15f %d\n" # What 3DE writes.
+
+
+class ZlocTrack(object):
+    """
+    All samples of one track, stored column by column in typed arrays.
+    frames: array("i"), u: array("d"), v: array("d"). color is the 3DE4 color index.
+    """
+    __slots__ = ("name", "color", "frames", "u", "v")
+
+    def __init__(self, name, color):
+        self.name = name
+        self.color = color
+        self.frames = array("i")
+        self.u = array("d")
+        self.v = array("d")
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __repr__(self):
+        return "ZlocTrack({0!r}, color={1}, samples={2})".format(self.name, self.color, len(self))
+
+    def append(self, frame, u, v):
+        self.frames.append(frame)
+        self.u.append(u)
+        self.v.append(v)
+
+    def sort(self):
+        """
+        Sorts samples by frame. If a frame appears more than once, the last sample wins.
+        Does nothing for tracks that are already in order, which is what 3DE writes.
+        """
+        frames = self.frames
+        if all(frames[i] < frames[i+1] for i in range(len(frames) - 1)):
+            return
+
+        sample_dict = {}
+        for i in range(len(frames)):
+            sample_dict[frames[i]] = i
+        order = [sample_dict[frame] for frame in sorted(sample_dict)]
+
+        self.frames = array("i", [frames[i] for i in order])
+        self.u = array("d", [self.u[i] for i in order])
+        self.v = array("d", [self.v[i] for i in order])
+
+
+def iter_samples(lines):
+    """
+    Yields (name, frame, u, v, color) for each line. Blank lines are skipped.
+    "lines" is anything that iterates over text lines, e.g. an open file.
+    """
+    for line_number, line in enumerate(lines, 1):
+        words = line.split()
+        if len(words) == 0:
+            continue
+        if len(words) != 5:
+            raise ValueError("Line {0}: expected '<name> <frame> <U> <V> <color>', got {1!r}".format(line_number, line.rstrip()))
+        name, frame, u, v, color = words
+        yield name, int(frame), float(u), float(v), int(color)
+
+
+def read_lines(lines):
+    """
+    Reads ZLOC lines into a list of ZlocTrack, sorted by name.
+    Each line is parsed once and goes straight into its track's arrays.
+    """
+    track_dict = {}
+    for name, frame, u, v, color in iter_samples(lines):
+        try:
+            track = track_dict[name]
+        except KeyError:
+            track = track_dict[name] = ZlocTrack(name, color)
+        track.append(frame, u, v)
+
+    track_list = [track_dict[name] for name in sorted(track_dict)]
+    for track in track_list:
+        track.sort()
+    return track_list
+
+
+def read_text(path):
+    """
+    Reads a .zloc file into a list of ZlocTrack, sorted by name.
+    """
+    with open(path, "r") as f:
+        return read_lines(f)
+
+
+def write_text(path, track_list):
+    """
+    Writes a list of ZlocTrack to a .zloc file. Lines are written as they are formatted, track by track.
+    """
+    with open(path, "w") as f:
+        for track in track_list:
+            name = track.name
+            color = track.color
+            f.writelines(TEXT_LINE % (name, frame, u, v, color) for frame, u, v in zip(track.frames, track.u, track.v))
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _column(buf, offset, count, typecode):
+    """
+    Returns a copy of "count" items of "typecode" starting at "offset" of "buf", as an array.
+    A copy, so nothing refers to the mapping once it is closed(or the file is rewritten).
+    """
+    size = array(typecode).itemsize * count
+    column = array(typecode)
+    if sys.version_info[0] < 3:
+        column.fromstring(buf[offset:offset + size])
+    else:
+        column.frombytes(buf[offset:offset + size])
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+def read_binary(path):
+    """
+    Reads a .zlocb file into a list of ZlocTrack, in file order(sorted by name).
+    The file is memory-mapped and each column is copied out in one go, so nothing is parsed.
+    The mapping is closed before returning, so the file can be rewritten while the tracks are in use.
+    """
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return _read_binary(path, buf)
+    finally:
+        buf.close()
+
+
+def _read_binary(path, buf):
+    magic, version, track_count, sample_count = BINARY_HEADER.unpack_from(buf, 0)
+    if magic != BINARY_MAGIC:
+        raise ValueError("{0} is not a binary ZLOC file.".format(path))
+    if version != BINARY_VERSION:
+        raise ValueError("{0} is version {1}. Only version {2} is supported.".format(path, version, BINARY_VERSION))
+
+    offset = BINARY_HEADER.size
+    table = []
+    for _ in range(track_count):
+        name_length, = BINARY_NAME_LENGTH.unpack_from(buf, offset)
+        offset += BINARY_NAME_LENGTH.size
+        name = buf[offset:offset + name_length].decode("utf-8")
+        offset += name_length
+        color, first, count = BINARY_TRACK.unpack_from(buf, offset)
+        offset += BINARY_TRACK.size
+        table.append((name, color, first, count))
+
+    frames_offset = _align(offset)
+    u_offset = _align(frames_offset + 4 * sample_count)
+    v_offset = u_offset + 8 * sample_count
+    if len(buf) < v_offset + 8 * sample_count:
+        raise ValueError("{0} is truncated.".format(path))
+
+    frames = _column(buf, frames_offset, sample_count, "i")
+    u = _column(buf, u_offset, sample_count, "d")
+    v = _column(buf, v_offset, sample_count, "d")
+
+    track_list = []
+    for name, color, first, count in table:
+        track = ZlocTrack(name, color)
+        track.frames = frames[first:first + count]
+        track.u = u[first:first + count]
+        track.v = v[first:first + count]
+        track_list.append(track)
+    return track_list
+
+
+def write_binary(path, track_list):
+    """
+    Writes a list of ZlocTrack to a .zlocb file. Tracks must be sorted by frame(ZlocTrack.sort).
+    Written to a temporary file next to "path" first, then moved onto it. Readers never see a half written file.
+    """
+    sample_count = sum(len(track) for track in track_list)
+
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".zlocb", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _write_binary(f, track_list, sample_count)
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask) # mkstemp makes it private.
+        _replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _replace(src, dst):
+    if hasattr(os, "replace"):
+        os.replace(src, dst)
+    else: # Python 2.
+        if os.name == "nt" and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+def _write_binary(f, track_list, sample_count):
+    f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(track_list), sample_count))
+    offset = BINARY_HEADER.size
+
+    first = 0
+    for track in track_list:
+        name = track.name.encode("utf-8")
+        f.write(BINARY_NAME_LENGTH.pack(len(name)) + name + BINARY_TRACK.pack(track.color, first, len(track)))
+        offset += BINARY_NAME_LENGTH.size + len(name) + BINARY_TRACK.size
+        first += len(track)
+
+    for typecode, attr in (("i", "frames"), ("d", "u"), ("d", "v")):
+        f.write(b"\0" * (_align(offset) - offset))
+        offset = _align(offset)
+        for track in track_list:
+            column = array(typecode, getattr(track, attr))
+            if sys.byteorder != "little":
+                column.byteswap()
+            column.tofile(f)
+            offset += column.itemsize * len(column)
+
+
+def is_binary(path):
+    with open(path, "rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def read(path):
+    """
+    Reads a .zloc or .zlocb file into a list of ZlocTrack, sorted by name.
+    The format is detected from the file's content, not its extension.
+    """
+    if is_binary(path):
+        return read_binary(path)
+    return read_text(path)
+
+
+def write(path, track_list):
+    """
+    Writes a list of ZlocTrack. ".zlocb" paths are written as binary, everything else as text.
+    """
+    if os.path.splitext(path)[1].lower() == ".zlocb":
+        write_binary(path, track_list)
+    else:
+        write_text(path, track_list)
+
+
+def convert(text_path, binary_path):
+    """
+    Converts a .zloc file to a .zlocb file.
+    """
+    write_binary(binary_path, read_text(text_path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python zloc_file.py <input.zloc> <output.zlocb>")
+    convert(sys.argv[1], sys.argv[2])
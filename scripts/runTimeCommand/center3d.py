@@ -46,6 +46,17 @@ center3d.main()
 """
 
 # Versions
+# 0.2.2 - Curves keyed at creation go through hkLib.bulk_edit, so undo and redo restore every key.
+# 0.2.1 - Centroids of components are re-keyed when Maya is idle after the mesh or its history(deformers, input meshes) is edited, in Live and Baked modes.
+# 0.2.0 - Center3D locator is created by hkLib.nodes.
+# 0.1.9 - Plugs are sampled by hkLib.bake.
+# 0.1.8 - Registry helpers come from hkLib.registry. Center3Ds of older scenes are found by name once, so the hotkey still removes them.
+# 0.1.7 - Baked Center3Ds re-bake only when curves driving their camera, targets or those nodes' parents are edited. Re-bakes are coalesced.
+# 0.1.6 - Center3D locator is an "hkScreenLocator"(hkToolsNodes plug-in).
+# 0.1.5 - Center3D nodes are registered in "hkTools_center3d_set". The hotkey deletes only those, instead of everything named "*center3d*".
+# 0.1.4 - Accepts vertices, edges and faces. Their centroid is computed from the mesh points for the playback range and keyed.
+# 0.1.3 - Baked mode(toggleCenter3dBaked). Film offsets are baked to curves for the playback range and re-baked when the camera or targets change.
+# 0.1.2 - Film offset is driven by utility nodes instead of an expression. No MEL or Python per frame.
 # 0.1.1 - Added 'if __name__ == "__main__":' statement.
 # 0.1.0 - Initial Release (2020.04.11)
 # 0.0.1 - Project start (2018)
@@ -54,6 +65,26 @@ center3d.main()
 import maya.cmds as mc
 import maya.OpenMaya as om
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+
+from hkLib import bake
+from hkLib import bulk_edit
+from hkLib import film_offset
+from hkLib import nodes
+from hkLib import registry
+
+
+
+CENTER3D_BAKED_OPTIONVAR = "hkToolsCenter3dBaked" # Set by "toggleCenter3dBaked".
+
+# Callbacks of Baked Center3Ds. Stored in globals() so they survive re-running this runTimeCommand.
+if "center3dBakeCallbackDict" not in globals():
+    center3dBakeCallbackDict = {} # {center3dLoc: [callback id]}
+    center3dBakePendingSet = set() # center3dLocs with a re-bake queued.
+if "center3dBakeJobDict" not in globals():
+    center3dBakeJobDict = {} # {center3dLoc: ((center3dLoc, shotCamTrans, shotCamShape, center3dCamShape), set of watched node hash codes, componentList, baked)}
+    center3dCurveCallbackIdList = [] # One anim curve callback, shared by every Baked Center3D.
 
 
 def getActive3dViewCam():
@@ -74,6 +105,241 @@ def getObjectType(sel):
     return objectType
 
 
+def getComponentIndices(componentList):
+    """
+    Returns {mesh shape: [vertex index]} of vertices, edges and faces. Edges and faces are converted to their vertices.
+    """
+    sel = om2.MSelectionList()
+    for vertices in mc.polyListComponentConversion(componentList, toVertex=True) or []:
+        sel.add(vertices)
+
+    indexDict = {}
+    for i in range(sel.length()):
+        dagPath, component = sel.getComponent(i)
+        indexSet = indexDict.setdefault(dagPath.fullPathName(), set())
+        indexSet.update(om2.MFnSingleIndexedComponent(component).getElements())
+    return dict((meshShape, sorted(indexSet)) for meshShape, indexSet in indexDict.items())
+
+
+def sumPointsReader(indexList):
+    # Reader for "bake.sample_plugs". Returns (sum x, sum y, sum z) of the world space points in "indexList".
+    def reader(plug, *context):
+        points = om2.MFnMesh(plug.asMObject(*context)).getPoints()
+        x = y = z = 0.0
+        for i in indexList:
+            point = points[i]
+            x += point.x
+            y += point.y
+            z += point.z
+        return x, y, z
+    return reader
+
+
+def keyComponentCentroid(center3dLoc, componentList, edit=None):
+    """
+    Keys "center3dLoc" on the centroid of the components for the playback range.
+    The points come from each mesh's world space output per frame, so deformers are included without clusters or constraints.
+    Called again on re-bake when the mesh or its history is edited(see "addCenter3dBakeCallbacks"). "edit" as in "writeCurve".
+    """
+    startFrame = int(mc.playbackOptions(q=True, minTime=True))
+    endFrame = int(mc.playbackOptions(q=True, maxTime=True))
+    frames = list(range(startFrame, endFrame + 1))
+
+    indexDict = getComponentIndices(componentList)
+    meshShapeList = sorted(indexDict)
+    plugList = [bake.get_plug(meshShape + '.worldMesh[0]') for meshShape in meshShapeList]
+    readerList = [sumPointsReader(indexDict[meshShape]) for meshShape in meshShapeList]
+    sampleList = bake.sample_plugs(plugList, frames, readerList)
+
+    count = float(sum(len(indexList) for indexList in indexDict.values()))
+    for axis, attr in enumerate(('translateX', 'translateY', 'translateZ')):
+        values = [sum(sums[axis] for sums in frameSums) / count for frameSums in zip(*sampleList)]
+        writeCurve(center3dLoc, attr, frames, values, center3dLoc + '_' + attr, edit)
+
+
+def writeCurve(node, attr, frames, values, curveName, edit=None):
+    """
+    Replaces the animation of "node.attr" with one key per frame, written in one call.
+    With "edit"(bulk_edit.BulkEdit), the curve and its keys are undone and redone with it. Used at creation.
+    """
+    plug = bake.get_plug(node + '.' + attr)
+    if edit is not None:
+        newCurve = not oma2.MAnimUtil.findAnimation(plug)
+        curve = edit.get_curve(plug)
+        if newCurve:
+            edit.rename(curve.object(), curveName)
+        edit.set_keys(plug, frames, values, tangent_type=oma2.MFnAnimCurve.kTangentLinear)
+        return
+
+    # Idle re-bake. Not undoable on purpose: it follows an edit that is in the undo queue itself, and undoing that edit re-bakes again.
+    curveList = oma2.MAnimUtil.findAnimation(plug)
+    if curveList:
+        curve = oma2.MFnAnimCurve(curveList[0])
+    else: # Deleted by hand since creation.
+        curve = oma2.MFnAnimCurve()
+        curve.create(plug)
+        om2.MFnDependencyNode(curve.object()).setName(curveName)
+    uiUnit = om2.MTime.uiUnit()
+    curve.addKeys(om2.MTimeArray([om2.MTime(frame, uiUnit) for frame in frames]), om2.MDoubleArray(values),
+                  oma2.MFnAnimCurve.kTangentLinear, oma2.MFnAnimCurve.kTangentLinear,
+                  False) # Replace every key.
+
+
+def bakeCenter3d(center3dLoc, shotCamTrans, shotCamShape, center3dCamShape, edit=None):
+    """
+    Bakes the Center3D camera's film offset for the playback range.
+    Camera, focal length and centroid are sampled in one pass, then the offsets are written as two curves("edit" as in "writeCurve").
+    Playback is as fast as a plain camera, since nothing is computed per frame.
+    """
+    startFrame = int(mc.playbackOptions(q=True, minTime=True))
+    endFrame = int(mc.playbackOptions(q=True, maxTime=True))
+    frames = list(range(startFrame, endFrame + 1))
+
+    plugList = [bake.get_plug(shotCamTrans + '.worldInverseMatrix[0]'), bake.get_plug(shotCamShape + '.fl'), bake.get_plug(center3dLoc + '.worldMatrix[0]')]
+    camInverseMatrices, focalLengths, centroidMatrices = bake.sample_plugs(plugList, frames)
+    hfoList, vfoList = film_offset.compute_center3d_offsets(camInverseMatrices, focalLengths, centroidMatrices)
+
+    writeCurve(center3dCamShape, 'horizontalFilmOffset', frames, hfoList, center3dLoc + '_hfo', edit)
+    writeCurve(center3dCamShape, 'verticalFilmOffset', frames, vfoList, center3dLoc + '_vfo', edit)
+
+
+def getComponentHistory(componentList):
+    # Mesh shapes of the components and everything upstream of them(deformers, their inputs, input meshes...).
+    meshShapeList = mc.ls(componentList, objectsOnly=True, long=True) or []
+    if not meshShapeList:
+        return []
+    return sorted(set(meshShapeList + (mc.listHistory(meshShapeList) or [])))
+
+
+def getWatchedNodes(nodeList):
+    """
+    Returns {hash code: MObject} of "nodeList" and all their DAG parents. Editing any of them moves the Center3D.
+    """
+    sel = om2.MSelectionList()
+    for node in nodeList:
+        sel.add(node)
+
+    nodeDict = {}
+    for i in range(sel.length()):
+        node = sel.getDependNode(i)
+        if not node.hasFn(om2.MFn.kDagNode): # History node(deformer...). No parents.
+            nodeDict[om2.MObjectHandle(node).hashCode()] = node
+            continue
+        dagPath = sel.getDagPath(i)
+        while dagPath.length() > 0:
+            node = dagPath.node()
+            nodeDict[om2.MObjectHandle(node).hashCode()] = node
+            dagPath.pop()
+    return nodeDict
+
+
+def getDrivenNodes(curve, depth=4):
+    """
+    Returns the hash codes of the nodes "curve" drives, directly or through up to "depth" DG nodes(unitConversion, pairBlend, animBlendNode...).
+    DG nodes are included, so keyed deformer weights are found too.
+    """
+    hashCodeSet = set()
+    nodeList = [curve]
+    for _ in range(depth):
+        nextNodeList = []
+        for node in nodeList:
+            for plug in om2.MFnDependencyNode(node).getConnections():
+                for destination in plug.destinations():
+                    destinationNode = destination.node()
+                    hashCodeSet.add(om2.MObjectHandle(destinationNode).hashCode())
+                    if not destinationNode.hasFn(om2.MFn.kDagNode):
+                        nextNodeList.append(destinationNode)
+        if not nextNodeList:
+            break
+        nodeList = nextNodeList
+    return hashCodeSet
+
+
+def scheduleCenter3dBake(center3dLoc):
+    # Edits are collected and every queued Center3D is re-baked once when Maya is idle, so dragging a key does not bake on every step.
+    if not center3dBakePendingSet:
+        mc.evalDeferred(rebakePendingCenter3ds, lowestPriority=True)
+    center3dBakePendingSet.add(center3dLoc)
+
+
+def rebakePendingCenter3ds():
+    center3dLocList = list(center3dBakePendingSet)
+    center3dBakePendingSet.clear()
+    for center3dLoc in center3dLocList:
+        job = center3dBakeJobDict.get(center3dLoc)
+        if job is None:
+            continue
+        (center3dLoc, shotCamTrans, shotCamShape, center3dCamShape), watchedSet, componentList, baked = job
+        if not all(mc.objExists(node) for node in (center3dLoc, shotCamTrans, center3dCamShape)) or (componentList and not mc.ls(componentList)):
+            removeCenter3dBakeCallbacks(center3dLoc) # Deleted(or undone).
+            continue
+        if componentList:
+            keyComponentCentroid(center3dLoc, componentList)
+        if baked:
+            bakeCenter3d(center3dLoc, shotCamTrans, shotCamShape, center3dCamShape)
+
+
+def center3dCurveEdited(curveArray, clientData):
+    """
+    Queues a re-bake of the Center3Ds whose camera, targets, mesh history or their parents are driven by the edited curves.
+    Edits on any other curve(including the baked film offsets and centroids) are ignored.
+    """
+    drivenSet = set()
+    for i in range(len(curveArray)):
+        drivenSet.update(getDrivenNodes(curveArray[i]))
+    for center3dLoc, (bakeArgs, watchedSet, componentList, baked) in list(center3dBakeJobDict.items()):
+        if not watchedSet.isdisjoint(drivenSet):
+            scheduleCenter3dBake(center3dLoc)
+
+
+def addCenter3dBakeCallbacks(center3dLoc, shotCamTrans, shotCamShape, center3dCamShape, targetList, componentList=None, baked=True):
+    """
+    Re-bakes when the shot camera, a target or one of their parents is edited(keys or static values).
+    With "componentList", the centroid is re-keyed too when the mesh or its history is edited. Not "baked"(Live mode) only does that,
+    since the film offset network follows the camera by itself.
+    Static values are watched with a callback per node. Keys are watched with one anim curve callback for every Center3D,
+    which only looks at the nodes the edited curves drive.
+    """
+    if componentList:
+        nodeList = getComponentHistory(componentList) # Not "center3dLoc": its centroid keys are written by the re-bake itself.
+    else:
+        nodeList = [center3dLoc]
+    if baked:
+        nodeList += [shotCamTrans, shotCamShape] + targetList
+    watchedDict = getWatchedNodes(nodeList)
+
+    def attributeChanged(msg, plug, otherPlug, clientData):
+        if msg & (om2.MNodeMessage.kAttributeSet | om2.MNodeMessage.kConnectionMade | om2.MNodeMessage.kConnectionBroken):
+            scheduleCenter3dBake(center3dLoc)
+
+    center3dBakeCallbackDict[center3dLoc] = [om2.MNodeMessage.addAttributeChangedCallback(node, attributeChanged) for node in watchedDict.values()]
+    center3dBakeJobDict[center3dLoc] = ((center3dLoc, shotCamTrans, shotCamShape, center3dCamShape), set(watchedDict), componentList, baked)
+    if not center3dCurveCallbackIdList:
+        center3dCurveCallbackIdList.append(oma2.MAnimMessage.addAnimCurveEditedCallback(center3dCurveEdited))
+
+
+def removeCenter3dBakeCallbacks(center3dLoc=None):
+    # Removes the callbacks of "center3dLoc", or of every Baked Center3D.
+    center3dLocList = list(center3dBakeCallbackDict) if center3dLoc is None else [center3dLoc]
+    for center3dLoc in center3dLocList:
+        center3dBakeJobDict.pop(center3dLoc, None)
+        center3dBakePendingSet.discard(center3dLoc)
+        for callbackId in center3dBakeCallbackDict.pop(center3dLoc, []):
+            try:
+                om2.MMessage.removeCallback(callbackId)
+            except RuntimeError: # Node already deleted
+                pass
+
+    if not center3dBakeJobDict:
+        for callbackId in center3dCurveCallbackIdList:
+            om2.MMessage.removeCallback(callbackId)
+        del center3dCurveCallbackIdList[:]
+
+
+def isBaked():
+    return mc.optionVar(exists=CENTER3D_BAKED_OPTIONVAR) and mc.optionVar(q=CENTER3D_BAKED_OPTIONVAR) == 1
+
+
 def center3d():
     """
     Centers the viewport to TLOC.
@@ -88,6 +354,17 @@ def center3d():
         mc.warning("Select one or more Transform Nodes")
         return
 
+    # Components(vertices, edges, faces) are centered on their centroid.
+    selComponentList = [sel for sel in selTransformList if "." in sel]
+    if selComponentList:
+        if len(selComponentList) != len(selTransformList):
+            mc.warning("Select either Transform Nodes or components, not both")
+            return
+        if mc.polyListComponentConversion(selComponentList, toVertex=True) is None:
+            mc.warning("Only polygon vertices, edges and faces can be Center3D'd")
+            return
+        selTransformList = sorted(set(mc.listRelatives(mc.ls(selComponentList, objectsOnly=True, long=True), parent=True, fullPath=True)))
+
     # Check if imagePlane is in selection list
     for selTransform in selTransformList:
         objectType = getObjectType(selTransform)
@@ -109,11 +386,15 @@ def center3d():
         mc.imagePlane(active3dViewCamImgPlaneShape, e=True, showInAllViews=True)
 
     # Create Center3D Locator
-    center3dLoc = mc.spaceLocator(name='center3d_#')[0]
+    center3dLoc = nodes.create_screen_locator('center3d_#')
     mc.setAttr(center3dLoc+'.v', 0)
 
-    for selTransform in selTransformList:
-        mc.pointConstraint(selTransform, center3dLoc, maintainOffset=False)
+    if selComponentList:
+        with bulk_edit.BulkEdit() as edit:
+            keyComponentCentroid(center3dLoc, selComponentList, edit)
+    else:
+        for selTransform in selTransformList:
+            mc.pointConstraint(selTransform, center3dLoc, maintainOffset=False)
 
 
     # Create Center3D Camera
@@ -135,62 +416,20 @@ def center3d():
     mc.connectAttr(active3dViewCamShape+'.farClipPlane' , center3DcamShape+'.farClipPlane')
 
 
-    # Center3D Expression
-    exp =  'global proc float[] cTtransformPoint(float $mtx[], float $pt[]) // multiply 4x4 matrix with 4x vector\n'
-    exp += '{\n'
-    exp += '    float $res[] = {};\n'
-    exp += '    if(`size $pt` == 3)\n'
-    exp += '    $pt[3] = 1.0;\n'
-    exp += '    for($i=0;$i<4;$i++){\n'
-    exp += '    float $tmp = 0;\n'
-    exp += '    for($k=0;$k<4;$k++){\n'
-    exp += '        $tmp += $pt[$k] * $mtx[$k * 4 + $i];\n'
-    exp += '    };\n'
-    exp += '    $res[$i] = $tmp;\n'
-    exp += '    };\n'
-    exp += '    return $res;\n'
-    exp += '};\n'
-
-    exp += 'global proc float[] cGetProjectionMatrix(string $shape) //get camera projection matrix\n'
-    exp += '{\n'
-    exp += '    float $res[] = {};\n'
-    exp += '    if(`objExists $shape` && `nodeType $shape` == "camera"){\n'
-    exp += '    python "import maya.OpenMaya as om";\n'
-    exp += '    python "list = om.MSelectionList()";\n'
-    exp += '    python (' + '"' + 'list.add(' + "'"+ '"' + '+ $shape + ' + '"' + "')" + '");\n'
-    exp += '    python "depNode = om.MObject()";\n'
-    exp += '    python "list.getDependNode(0, depNode)";\n'
-    exp += '    python "camFn = om.MFnCamera(depNode)";\n'
-    exp += '    python "pMtx = om.MFloatMatrix()";\n'
-    exp += '    python "pMtx = camFn.projectionMatrix()";\n'
-    exp += '    for($i=0;$i<=3;$i++){\n'
-    exp += '        for($k=0;$k<=3;$k++)\n'
-    exp += '        $res[`size $res`] = `python ("pMtx(" + $i + ", " + $k + ")")`;\n'
-    exp += '    };\n'
-    exp += '    };\n'
-    exp += '    return $res;\n'
-    exp += '};\n'
-
-    exp += 'global proc float[] cWorldSpaceToImageSpace(string $camera, float $worldPt[])\n'
-    exp += '{\n'
-    exp += '    string $camShape[] = `ls -dag -type "camera" $camera`;\n'
-    exp += '    if(! `size $camShape`)\n'
-    exp += '    return {};\n'
-    exp += '    string $cam[] = `listRelatives -p -f $camShape`;\n'
-    exp += '    float $cam_inverseMatrix[] = `getAttr ($cam[0] + ".worldInverseMatrix")`;\n'
-    exp += '    float $cam_projectionMatrix[] = `cGetProjectionMatrix $camShape[0]`;\n'
-    exp += '    float $ptInCamSpace[] = `cTtransformPoint $cam_inverseMatrix $worldPt`;\n'
-    exp += '    float $projectedPoint[] = `cTtransformPoint $cam_projectionMatrix $ptInCamSpace`;\n'
-    exp += '    float $resultX = (($projectedPoint[0] / $projectedPoint[3]));\n'
-    exp += '    float $resultY = (($projectedPoint[1] / $projectedPoint[3]));\n'
-    exp += '    return {$resultX, $resultY};\n'
-    exp += '};\n'
-
-    exp += 'float $xy[] = cWorldSpaceToImageSpace("' + active3dViewCamTrans +'", {'+ center3dLoc +'.translateX,'+center3dLoc+'.translateY,'+center3dLoc+'.translateZ});\n'
-    exp += center3DcamShape + '.horizontalFilmOffset = ($xy[0] *' + active3dViewCamShape + '.hfa)/2 ;\n'
-    exp += center3DcamShape + '.verticalFilmOffset = ($xy[1] *'+ active3dViewCamShape + '.vfa)/2 ;\n'
-
-    mc.expression(s=exp ,object=center3DcamShape)
+    # Center3D Film Offset
+    if isBaked():
+        with bulk_edit.BulkEdit() as edit:
+            bakeCenter3d(center3dLoc, active3dViewCamTrans, active3dViewCamShape, center3DcamShape, edit)
+        addCenter3dBakeCallbacks(center3dLoc, active3dViewCamTrans, active3dViewCamShape, center3DcamShape, selTransformList, selComponentList)
+        networkNodeList = []
+    else:
+        networkNodeList = film_offset.create_center3d_network(center3dLoc, active3dViewCamTrans, active3dViewCamShape, center3DcamShape)
+        if selComponentList: # Only the centroid needs re-keying.
+            addCenter3dBakeCallbacks(center3dLoc, active3dViewCamTrans, active3dViewCamShape, center3DcamShape, [], selComponentList, baked=False)
+
+    # Register every Center3D node, so "main" can remove them without a wildcard search.
+    curveList = mc.listConnections([center3dLoc, center3DcamShape], source=True, destination=False, type="animCurve") or []
+    registry.register_nodes("center3d", [center3dLoc, center3DcamTrans] + networkNodeList + curveList)
 
     # Select Center3D Loc ##
     mc.select(center3dLoc, replace=True)
@@ -198,8 +437,10 @@ def center3d():
 
 def main():
 
-    if mc.objExists("*center3d*") == True:
-        mc.delete("*center3d*") # Delete all Center3D nodes
+    registry.adopt_legacy_nodes("center3d", "*center3d*") # Made before the registry.
+    if registry.get_registered_nodes("center3d"):
+        removeCenter3dBakeCallbacks()
+        registry.delete_registered_nodes("center3d") # Delete all Center3D nodes
         return
 
     center3d()
@@ -62,6 +62,16 @@ tloc.main()
 """
 
 # Versions
+# 0.2.1 - TLOC and Center3D locators are created by hkLib.nodes.
+# 0.2.0 - Cached meshes have no node dirty callbacks. Their bounding boxes are read on each snap instead.
+# 0.1.9 - TLOC ray helpers come from hkLib.tloc_ray.
+# 0.1.8 - Registry helpers come from hkLib.registry. Center3Ds of older scenes are found by name once, so the hotkey still removes them.
+# 0.1.7 - TLOC is an "hkScreenLocator"(hkToolsNodes plug-in), drawn at a constant size in pixels. No more scale continuity expression.
+# 0.1.6 - TLOC Depth tool replaces Drag Attr Context. Draws the epipolar line of the Reference Frame and sets depth directly while dragging.
+# 0.1.5 - Snap to the mesh(or nearest vertex) under the cursor with "toggleTlocSnap". Mesh intersection data is cached between TLOCs.
+# 0.1.4 - Cursor position is computed from the camera. No more Near Clip Plane change and viewport refresh on TLOC creation.
+# 0.1.3 - Center3D nodes are registered in "hkTools_center3d_set". The hotkey deletes only those, instead of everything named "*center3d*".
+# 0.1.2 - Center3D film offset is driven by utility nodes instead of an expression. No MEL or Python per frame.
 # 0.1.1 - Added if __name__ == "__main__":
 # 0.1.0 - Initial Release (2020.04.05)
 # 0.0.5 - TLOC scale continuity.
@@ -74,6 +84,7 @@ tloc.main()
 import maya.cmds as mc
 import maya.OpenMaya as om
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om2
 
 
 try:
@@ -84,6 +95,28 @@ except ImportError:
 
 import random
 
+from hkLib import film_offset
+from hkLib import nodes
+from hkLib import projection
+from hkLib import registry
+from hkLib import tloc_ray
+
+
+TLOC_PIXEL_SIZE = 20.0 # Size of a TLOC on screen when the camera's locatorScale is 1.
+
+TLOC_SNAP_OPTIONVAR = "hkToolsTlocSnap" # 0: Off, 1: Surface, 2: Vertex. Set by "toggleTlocSnap".
+
+# TLOC Depth tool state while dragging.
+if "tlocDepthDragState" not in globals():
+    tlocDepthDragState = {}
+
+TLOC_DEPTH_CONTEXT = "tlocDepthContext"
+TLOC_DEPTH_DRAG_SPEED = 200.0 # Pixels to drag for double(or half) the depth.
+
+# Ray cast cache. Stored in globals() so it survives re-running this runTimeCommand.
+if "tlocMeshCache" not in globals():
+    tlocMeshCache = {} # {mesh shape: {"fn", "dagPath", "bbox"}}
+
 
 def center3d(tlocTrans, zoom=0.15):
     """
@@ -106,7 +139,7 @@ def center3d(tlocTrans, zoom=0.15):
         active3dViewCamImgPlaneShape = None
 
     # Create Centroid
-    center3dLoc = mc.spaceLocator(name='center3d_#')[0]
+    center3dLoc = nodes.create_screen_locator('center3d_#')
     mc.setAttr(center3dLoc+'.v', 0)
     mc.pointConstraint(tlocTrans, center3dLoc, maintainOffset=False)
 
@@ -130,74 +163,96 @@ def center3d(tlocTrans, zoom=0.15):
     mc.connectAttr(active3dViewCamShape+'.nearClipPlane' , center3dCamShape+'.nearClipPlane')
     mc.connectAttr(active3dViewCamShape+'.farClipPlane' , center3dCamShape+'.farClipPlane')
 
-    # Center3D Expression
-    exp =  'global proc float[] cTtransformPoint(float $mtx[], float $pt[]) // multiply 4x4 matrix with 4x vector\n'
-    exp += '{\n'
-    exp += '    float $res[] = {};\n'
-    exp += '    if(`size $pt` == 3)\n'
-    exp += '    $pt[3] = 1.0;\n'
-    exp += '    for($i=0;$i<4;$i++){\n'
-    exp += '    float $tmp = 0;\n'
-    exp += '    for($k=0;$k<4;$k++){\n'
-    exp += '        $tmp += $pt[$k] * $mtx[$k * 4 + $i];\n'
-    exp += '    };\n'
-    exp += '    $res[$i] = $tmp;\n'
-    exp += '    };\n'
-    exp += '    return $res;\n'
-    exp += '};\n'
-
-    exp += 'global proc float[] cGetProjectionMatrix(string $shape) //get camera projection matrix\n'
-    exp += '{\n'
-    exp += '    float $res[] = {};\n'
-    exp += '    if(`objExists $shape` && `nodeType $shape` == "camera"){\n'
-    exp += '    python "import maya.OpenMaya as om";\n'
-    exp += '    python "list = om.MSelectionList()";\n'
-    exp += '    python (' + '"' + 'list.add(' + "'"+ '"' + '+ $shape + ' + '"' + "')" + '");\n'
-    exp += '    python "depNode = om.MObject()";\n'
-    exp += '    python "list.getDependNode(0, depNode)";\n'
-    exp += '    python "camFn = om.MFnCamera(depNode)";\n'
-    exp += '    python "pMtx = om.MFloatMatrix()";\n'
-    exp += '    python "pMtx = camFn.projectionMatrix()";\n'
-    exp += '    for($i=0;$i<=3;$i++){\n'
-    exp += '        for($k=0;$k<=3;$k++)\n'
-    exp += '        $res[`size $res`] = `python ("pMtx(" + $i + ", " + $k + ")")`;\n'
-    exp += '    };\n'
-    exp += '    };\n'
-    exp += '    return $res;\n'
-    exp += '};\n'
-
-    exp += 'global proc float[] cWorldSpaceToImageSpace(string $camera, float $worldPt[])\n'
-    exp += '{\n'
-    exp += '    string $camShape[] = `ls -dag -type "camera" $camera`;\n'
-    exp += '    if(! `size $camShape`)\n'
-    exp += '    return {};\n'
-    exp += '    string $cam[] = `listRelatives -p -f $camShape`;\n'
-    exp += '    float $cam_inverseMatrix[] = `getAttr ($cam[0] + ".worldInverseMatrix")`;\n'
-    exp += '    float $cam_projectionMatrix[] = `cGetProjectionMatrix $camShape[0]`;\n'
-    exp += '    float $ptInCamSpace[] = `cTtransformPoint $cam_inverseMatrix $worldPt`;\n'
-    exp += '    float $projectedPoint[] = `cTtransformPoint $cam_projectionMatrix $ptInCamSpace`;\n'
-    exp += '    float $resultX = (($projectedPoint[0] / $projectedPoint[3]));\n'
-    exp += '    float $resultY = (($projectedPoint[1] / $projectedPoint[3]));\n'
-    exp += '    return {$resultX, $resultY};\n'
-    exp += '};\n'
-
-    exp += 'float $xy[] = cWorldSpaceToImageSpace("' + active3dViewCamTrans +'", {'+ center3dLoc +'.translateX,'+center3dLoc+'.translateY,'+center3dLoc+'.translateZ});\n'
-    exp += center3dCamShape + '.horizontalFilmOffset = ($xy[0] *' + active3dViewCamShape + '.hfa)/2 ;\n'
-    exp += center3dCamShape + '.verticalFilmOffset = ($xy[1] *'+ active3dViewCamShape + '.vfa)/2 ;\n'
-
-    mc.expression(s=exp, object=center3dCamShape)
-
-
-def dragAttrContext(tlocTrans):
+    # Center3D Film Offset
+    networkNodeList = film_offset.create_center3d_network(center3dLoc, active3dViewCamTrans, active3dViewCamShape, center3dCamShape)
+
+    # Register every Center3D node, so "main" can remove them without a wildcard search.
+    registry.register_nodes("center3d", [center3dLoc, center3dCamTrans] + networkNodeList)
+
+
+def createEpipolarLine(tlocTrans):
     """
-    Set tool to Drag Attr Context.
-    Allows a user to manipulate TLOC's depth attribute by using a virtual slider within the viewport.
+    Draws the Reference Frame's ray as a line. Seen from any other frame(or camera) it is the epipolar line: TLOC lies on it at every depth.
+    The line is built in TLOC GRP's parent space, so it follows an animated parent(e.g. Object Point Group).
     """
-    dragAttrContextName = "dragAttrContext"
-    if not mc.dragAttrContext(dragAttrContextName, ex=True):
-        mc.dragAttrContext(dragAttrContextName)
-    mc.dragAttrContext(dragAttrContextName, e=True, ct=tlocTrans+".depth")
-    mc.setToolTo(dragAttrContextName)
+    referenceRay = tloc_ray.get_reference_ray(tlocTrans)
+    if referenceRay is None:
+        return None
+    origin, direction = referenceRay
+    referenceFrame = mc.keyframe(tlocTrans + ".rx", q=True)[0]
+
+    tlocGrp = mc.listRelatives(tlocTrans, parent=True, fullPath=True)[0]
+    tlocGrpParent = mc.listRelatives(tlocGrp, parent=True, fullPath=True)
+    if tlocGrpParent:
+        parentInverseMatrix = mc.getAttr(tlocGrpParent[0] + ".worldInverseMatrix", time=referenceFrame)
+    else:
+        parentInverseMatrix = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+
+    # From just in front of the camera to 100 times TLOC's depth.
+    pointList = [projection.transform_point(parentInverseMatrix, *[origin[axis] + direction[axis] * scale for axis in range(3)]) for scale in (0.01, 100.0)]
+    epipolarLine = mc.curve(name=tlocTrans.rsplit("|", 1)[-1] + "_epipolarLine", degree=1, point=pointList)
+    if tlocGrpParent:
+        epipolarLine = mc.parent(epipolarLine, tlocGrpParent[0], relative=True)[0]
+
+    tlocShape = mc.listRelatives(tlocTrans, shapes=True, fullPath=True)[0]
+    epipolarLineShape = mc.listRelatives(epipolarLine, shapes=True, fullPath=True)[0]
+    mc.setAttr(epipolarLineShape + ".overrideEnabled", 1)
+    mc.setAttr(epipolarLineShape + ".overrideDisplayType", 2) # Reference. Not selectable.
+    mc.setAttr(epipolarLineShape + ".overrideColor", mc.getAttr(tlocShape + ".overrideColor")) # Same Color as TLOC.
+
+    registry.register_nodes("tlocEpipolarLine", [epipolarLine])
+    return epipolarLine
+
+
+def getDepthPlug(tlocTrans):
+    sel = om2.MSelectionList()
+    sel.add(tlocTrans + ".depth")
+    return sel.getPlug(0)
+
+
+def tlocDepthPress():
+    tlocTrans = tlocDepthDragState["tlocTrans"]
+    if not mc.objExists(tlocTrans):
+        return
+    tlocDepthDragState["plug"] = getDepthPlug(tlocTrans)
+    tlocDepthDragState["startDepth"] = tlocDepthDragState["plug"].asFloat()
+    tlocDepthDragState["startX"] = mc.draggerContext(TLOC_DEPTH_CONTEXT, q=True, anchorPoint=True)[0]
+
+
+def tlocDepthDrag():
+    if "plug" not in tlocDepthDragState:
+        return
+    dragX = mc.draggerContext(TLOC_DEPTH_CONTEXT, q=True, dragPoint=True)[0]
+    depth = tlocDepthDragState["startDepth"] * 2.0 ** ((dragX - tlocDepthDragState["startX"]) / TLOC_DEPTH_DRAG_SPEED)
+    tlocDepthDragState["plug"].setFloat(depth) # Direct plug set. No command, no undo step per drag event.
+    mc.refresh(currentView=True)
+
+
+def tlocDepthRelease():
+    plug = tlocDepthDragState.pop("plug", None)
+    if plug is None:
+        return
+    depth = plug.asFloat()
+    plug.setFloat(tlocDepthDragState["startDepth"])
+    mc.setAttr(tlocDepthDragState["tlocTrans"] + ".depth", depth) # One undo step per drag.
+
+
+def tlocDepthContext(tlocTrans):
+    """
+    Set tool to TLOC Depth.
+    Drag left or right in the viewport to scale TLOC's depth. The Reference Frame's epipolar line shows where TLOC can be.
+    """
+    tlocDepthDragState.clear()
+    tlocDepthDragState["tlocTrans"] = tlocTrans
+    createEpipolarLine(tlocTrans)
+
+    if not mc.draggerContext(TLOC_DEPTH_CONTEXT, exists=True):
+        mc.draggerContext(TLOC_DEPTH_CONTEXT, cursor="hand", undoMode="step", space="screen")
+    mc.draggerContext(TLOC_DEPTH_CONTEXT, e=True,
+                      pressCommand=tlocDepthPress,
+                      dragCommand=tlocDepthDrag,
+                      releaseCommand=tlocDepthRelease)
+    mc.setToolTo(TLOC_DEPTH_CONTEXT)
 
 
 def getActive3dViewCam():
@@ -210,17 +265,146 @@ def getActive3dViewCam():
     return active3dViewCamShape, active3dViewCamTrans
 
 
+def getActive3dViewEye():
+    """
+    Returns (eye point, normalized view direction) of the active 3D view camera in world space.
+    """
+    active3dView = omui.M3dView.active3dView()
+    active3dViewCamDagPath = om.MDagPath()
+    active3dView.getCamera(active3dViewCamDagPath)
+    camFn = om.MFnCamera(active3dViewCamDagPath)
+    return camFn.eyePoint(om.MSpace.kWorld), camFn.viewDirection(om.MSpace.kWorld).normal()
+
+
+def getCursorPointAtDepth(depth):
+    """
+    Returns the world space point under the cursor, "depth" in front of the active 3D view camera(along its view direction).
+    Computed from the camera and the cursor ray, so nothing is redrawn and no camera attribute changes.
+    """
+    eyePoint, viewDirection = getActive3dViewEye()
+    position, direction = tloc_ray.get_cursor_ray()
+    position = om.MPoint(*position)
+    direction = om.MVector(*direction)
+
+    # Slide along the ray to the plane "depth" in front of the camera. MVector * MVector is the dot product.
+    t = (depth - (position - eyePoint) * viewDirection) / (direction * viewDirection)
+    return position + direction * t
+
+
+def getSnapMode():
+    if not mc.optionVar(exists=TLOC_SNAP_OPTIONVAR):
+        return 0
+    return mc.optionVar(q=TLOC_SNAP_OPTIONVAR)
+
+
+def getMeshCacheEntry(meshShape):
+    """
+    Returns the cached MFnMesh and world bounding box of a mesh.
+    Keeping the MFnMesh keeps Maya's intersection accelerator(uniform grid) alive between calls. Maya rebuilds it when the mesh changes.
+    The bounding box is read again on every snap. Maya caches it per shape, so this is cheap and needs no callback on the mesh.
+    """
+    entry = tlocMeshCache.get(meshShape)
+    if entry is None:
+        sel = om2.MSelectionList()
+        sel.add(meshShape)
+        dagPath = sel.getDagPath(0)
+        entry = tlocMeshCache[meshShape] = {"fn": om2.MFnMesh(dagPath), "dagPath": dagPath}
+
+    bbox = om2.MFnDagNode(entry["dagPath"]).boundingBox
+    bbox.transformUsing(entry["dagPath"].inclusiveMatrix())
+    entry["bbox"] = bbox
+    return entry
+
+
+def clearMeshCache(keepMeshShapeList=()):
+    # Drops meshes that were deleted or hidden. Maya frees their accelerators with the MFnMesh.
+    keepMeshShapeSet = set(keepMeshShapeList)
+    for meshShape in list(tlocMeshCache):
+        if meshShape not in keepMeshShapeSet:
+            entry = tlocMeshCache.pop(meshShape)
+            removeMeshCallback(entry)
+
+
+def removeMeshCallback(entry):
+    # Entries cached by TLOC 0.1.9 and below have a node dirty callback.
+    callbackId = entry.pop("callbackId", None)
+    if callbackId is None:
+        return
+    try:
+        om2.MMessage.removeCallback(callbackId)
+    except RuntimeError: # Mesh already deleted
+        pass
+
+
+# Drop the node dirty callbacks left by an older version of this runTimeCommand.
+for tlocMeshCacheEntry in tlocMeshCache.values():
+    removeMeshCallback(tlocMeshCacheEntry)
+
+
+def rayHitsBox(source, direction, bbox):
+    # Slab test. Returns False if the ray misses the box.
+    tMin, tMax = 0.0, float("inf")
+    for axis in range(3):
+        lower, upper = bbox.min[axis], bbox.max[axis]
+        if abs(direction[axis]) < 1e-12:
+            if source[axis] < lower or source[axis] > upper:
+                return False
+            continue
+        t1 = (lower - source[axis]) / direction[axis]
+        t2 = (upper - source[axis]) / direction[axis]
+        tMin = max(tMin, min(t1, t2))
+        tMax = min(tMax, max(t1, t2))
+        if tMin > tMax:
+            return False
+    return True
+
+
+def getSnapPoint(snapMode):
+    """
+    Casts the cursor ray against the visible meshes and returns the first hit(om.MPoint), or None.
+    snapMode 2 returns the vertex of the hit face closest to the hit instead.
+    """
+    source, rayDirection = tloc_ray.get_cursor_ray()
+
+    meshShapeList = mc.ls(type="mesh", visible=True, noIntermediate=True, long=True)
+    clearMeshCache(meshShapeList)
+
+    accelParams = om2.MFnMesh.autoUniformGridParams()
+    hitDistance = float("inf")
+    hit = None
+    for meshShape in meshShapeList:
+        entry = getMeshCacheEntry(meshShape)
+        if not rayHitsBox(source, rayDirection, entry["bbox"]):
+            continue
+        hitPoint, hitRayParam, hitFace, hitTriangle, hitBary1, hitBary2 = entry["fn"].closestIntersection(
+            om2.MFloatPoint(source), om2.MFloatVector(rayDirection), om2.MSpace.kWorld, 1e7, False, accelParams=accelParams)
+        if hitFace < 0 or hitRayParam >= hitDistance:
+            continue
+        hitDistance = hitRayParam
+        hit = (entry, hitPoint, hitFace)
+
+    if hit is None:
+        return None
+
+    entry, hitPoint, hitFace = hit
+    snapPoint = om2.MPoint(hitPoint)
+    if snapMode == 2: # Nearest vertex of the hit face
+        vertexPointList = [entry["fn"].getPoint(vertex, om2.MSpace.kWorld) for vertex in entry["fn"].getPolygonVertices(hitFace)]
+        snapPoint = min(vertexPointList, key=lambda point: point.distanceTo(snapPoint))
+    return om.MPoint(snapPoint.x, snapPoint.y, snapPoint.z)
+
+
 def pointTriangulationMode(tlocTrans):
     """
-    Center3D on TLOC and set tool to Drag Attr Context.
+    Center3D on TLOC and set tool to TLOC Depth.
     """
     # Center3D on TLOC
     center3d(tlocTrans)
     # Select TLOC
     mc.select(tlocTrans)
     mc.evalDeferred("import maya.cmds as mc;mc.outlinerEditor('outlinerPanel1', edit=True, showSelected=True)")
-    # Set Tool to "Drag Attr Context"
-    dragAttrContext(tlocTrans)
+    # Set Tool to "TLOC Depth"
+    tlocDepthContext(tlocTrans)
 
 
 def getClipboardText():
@@ -252,7 +436,7 @@ def createTloc(parent=""):
 
     Active View Camera's centerOfInterest determines TLOC's initial depth.
 
-    Active View Camera's locatorScale determines TLOC's initial scale.
+    Active View Camera's locatorScale determines TLOC's size on screen.
     """
 
     currentTime = int(mc.currentTime(q=True))
@@ -260,22 +444,39 @@ def createTloc(parent=""):
     random_index = random.choice(indexList)
 
 
-    # Create TLOC & TLOC GRP
-    tlocTrans = mc.spaceLocator(name="tloc_{}f_#".format(currentTime))[0]
-    tlocShape = mc.listRelatives(tlocTrans, shapes=True)[0]
-    tlocGrp = mc.group(tlocTrans, name="{}_grp".format(tlocTrans))
-
-
     # Get Active 3D View Camera
     active3dViewCamShape, active3dViewCamTrans = getActive3dViewCam()
 
     # Active View Camera's centerOfInterest determines TLOC's initial depth.
     initDepth = mc.getAttr(active3dViewCamShape+".centerOfInterest")
 
-    # Active View Camera's locatorScale determines TLOC's initial scale.
+    # Active View Camera's locatorScale determines TLOC's size on screen.
     tlocScale = mc.getAttr(active3dViewCamShape+".locatorScale")
 
 
+    # Create TLOC & TLOC GRP. Drawn at a constant size in pixels, whatever its depth(scale) is.
+    tlocTrans = nodes.create_screen_locator("tloc_{}f_#".format(currentTime), pixel_size=TLOC_PIXEL_SIZE * tlocScale)
+    tlocShape = mc.listRelatives(tlocTrans, shapes=True)[0]
+    tlocGrp = mc.group(tlocTrans, name="{}_grp".format(tlocTrans))
+
+    # Get world space scale of Active 3D View Camera
+    active3dViewCamWorldSpaceScale = mc.xform(active3dViewCamTrans, q=True, worldSpace=True, scale=True)[0] # Just return sx
+
+    # Get Cursor Position at initial depth(camera space, so it is scaled with the camera)
+    position = getCursorPointAtDepth(initDepth * active3dViewCamWorldSpaceScale)
+
+    # Snap to the mesh under the cursor. Initial depth becomes the depth of the hit.
+    snapMode = getSnapMode()
+    if snapMode:
+        snapPoint = getSnapPoint(snapMode)
+        if snapPoint is None:
+            mc.warning("TLOC Snap: No mesh under the cursor. Using centerOfInterest.")
+        else:
+            eyePoint, viewDirection = getActive3dViewEye()
+            position = snapPoint
+            initDepth = (snapPoint - eyePoint) * viewDirection / active3dViewCamWorldSpaceScale
+
+
     # Add Depth Attribute to TLOC
     mc.addAttr(tlocTrans, shortName="depth", longName="Depth", attributeType="float", defaultValue=initDepth)
     mc.setAttr(tlocTrans+".depth", keyable=True)
@@ -290,33 +491,6 @@ def createTloc(parent=""):
     mc.setAttr(tlocShape+".overrideColor", random_index)
 
 
-    # Get world space scale of Active 3D View Camera
-    active3dViewCamWorldSpaceScale = mc.xform(active3dViewCamTrans, q=True, worldSpace=True, scale=True)[0] # Just return sx
-
-    # Store Near Clip Plane value
-    nearClipPlaneStored = mc.getAttr(active3dViewCamShape+".nearClipPlane")
-
-    # Temporarily set Near Clip Plane
-    mc.setAttr(active3dViewCamShape+".nearClipPlane", initDepth)
-    mc.refresh(force=True) # Need to refresh the viewport to apply the new near clip plane value.
-
-
-    # Get Cursor Position
-    cursorPos = QtGui.QCursor.pos()
-    widget = QtWidgets.QApplication.widgetAt(cursorPos)
-    widgetHeight = widget.height()
-    relpos = widget.mapFromGlobal(cursorPos)
-
-    position = om.MPoint()  # 3D point with double-precision coordinates
-    direction = om.MVector()  # 3D vector with double-precision coordinates
-
-    omui.M3dView().active3dView().viewToWorld(
-        relpos.x(),
-        widgetHeight - relpos.y(), # The relpos.y() alone returns a mirrored position. Must subtract it with widgetHeight.
-        position,  # world point
-        direction)
-
-
     # Orient TLOC GRP to Camera
     oc = mc.orientConstraint(active3dViewCamTrans, tlocGrp, maintainOffset=False)
     mc.delete(oc)
@@ -350,15 +524,6 @@ def createTloc(parent=""):
     # Connect TLOC and TLOC GRP scale
     mc.connectAttr(tlocTrans+".s", tlocGrp+".s")
 
-    tlocInitScale = 50 # DO NOT TOUCH THIS. Manipulate scale with "tlocScale(locatorScale)" param.
-
-    # Expression for TLOC scale continuity.
-    mc.expression(s="""
-                    {0}.lsx = 1 / {1}.sx * {2} * {3} / {4} * {5};
-                    {0}.lsy = 1 / {1}.sy * {2} * {3} / {4} * {5};
-                    {0}.lsz = 0;
-                    """.format(tlocShape, tlocGrp, active3dViewCamWorldSpaceScale, initDepth, tlocInitScale, tlocScale), object=tlocGrp)
-
 
     # Just for marking the Reference Frame
     mc.setKeyframe(tlocTrans+".rx", value=0, time=[currentTime])
@@ -366,9 +531,6 @@ def createTloc(parent=""):
     # Jump to point triangulation mode
     pointTriangulationMode(tlocTrans)
 
-    # Set Near Clip Plane back to stored value
-    mc.setAttr(active3dViewCamShape+".nearClipPlane", nearClipPlaneStored)
-
 
 def main():
     """
@@ -382,8 +544,10 @@ def main():
     6. (While looking through shot cam) If "two or more" objects are selected, do nothing.
     """
 
-    if mc.objExists("*center3d*"):
-        mc.delete("*center3d*") # Delete all Center3D nodes
+    registry.adopt_legacy_nodes("center3d", "*center3d*") # Made before the registry.
+    if registry.get_registered_nodes("center3d"):
+        registry.delete_registered_nodes("center3d") # Delete all Center3D nodes
+        registry.delete_registered_nodes("tlocEpipolarLine")
 
         lastParent = getClipboardText()
         if lastParent != "":
@@ -401,7 +565,7 @@ def main():
         return
     elif len(sel) == 1: # If a single item is selected...
         objectType = getObjectType(sel)
-        if objectType == "locator" and "tloc" in sel[0]: # and it is a TLOC.
+        if objectType in ("locator", "hkScreenLocator") and "tloc" in sel[0]: # and it is a TLOC.
             pointTriangulationMode(sel[0]) # Jump to point triangulation mode.
             return
         elif objectType == "imagePlane": # and it is an image plane.
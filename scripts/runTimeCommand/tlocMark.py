@@ -0,0 +1,122 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation
+"""
+Adds an observation ray to the selected TLOC for "tlocSolve".
+
+1. Select a TLOC.
+2. Go to another frame(or look through another camera) where the point is visible.
+3. Hover the cursor over the point and execute the script with a HOTKEY(e.g. Alt + Shift + M).
+
+Marking the same camera at the same frame again replaces that ray.
+The TLOC's Reference Frame is always used as well, so one mark is enough to solve.
+"""
+
+# Usage
+# Execute the code below via Hotkey.
+# e.g) Alt + Shift + M
+"""
+import tlocMark
+tlocMark.main()
+"""
+
+# Versions
+# 0.1.3 - Marked TLOCs are registered in "hkTools_tlocMarked_set" for "tlocSolve".
+# 0.1.2 - TLOC ray helpers come from hkLib.tloc_ray.
+# 0.1.1 - Accepts TLOCs drawn by "hkScreenLocator".
+# 0.1.0 - Initial Release
+
+
+import maya.cmds as mc
+import maya.OpenMaya as om
+import maya.OpenMayaUI as omui
+
+from hkLib import registry
+from hkLib import tloc_ray
+
+
+def getActive3dViewCam():
+    active3dView = omui.M3dView.active3dView()
+    active3dViewCamDagPath = om.MDagPath()
+    active3dView.getCamera(active3dViewCamDagPath)
+    active3dViewCamShape = active3dViewCamDagPath.fullPathName()
+    active3dViewCamTrans = mc.listRelatives(active3dViewCamShape, parent=True, fullPath=True)[0]
+
+    return active3dViewCamShape, active3dViewCamTrans
+
+
+def addRayAttributes(tlocTrans):
+    if mc.attributeQuery("rayFrame", node=tlocTrans, exists=True):
+        return
+    registry.register_nodes("tlocMarked", [tlocTrans]) # Found by "tlocSolve" without scanning the scene.
+    for attr in ("rayOrigin", "rayDirection"):
+        mc.addAttr(tlocTrans, longName=attr, attributeType="double3", multi=True)
+        for axis in ("X", "Y", "Z"):
+            mc.addAttr(tlocTrans, longName=attr + axis, attributeType="double", parent=attr)
+    mc.addAttr(tlocTrans, longName="rayFrame", attributeType="double", multi=True)
+    mc.addAttr(tlocTrans, longName="rayCamera", dataType="string", multi=True)
+
+
+def markTloc(tlocTrans):
+    active3dViewCamShape, active3dViewCamTrans = getActive3dViewCam()
+    currentTime = mc.currentTime(q=True)
+    origin, direction = tloc_ray.get_cursor_ray()
+
+    addRayAttributes(tlocTrans)
+
+    # Replace the ray of this camera & frame, or add a new one.
+    indexList = mc.getAttr(tlocTrans + ".rayFrame", multiIndices=True) or []
+    rayIndex = max(indexList) + 1 if indexList else 0
+    for index in indexList:
+        if mc.getAttr("{0}.rayFrame[{1}]".format(tlocTrans, index)) == currentTime and mc.getAttr("{0}.rayCamera[{1}]".format(tlocTrans, index)) == active3dViewCamTrans:
+            rayIndex = index
+            break
+
+    mc.setAttr("{0}.rayOrigin[{1}]".format(tlocTrans, rayIndex), *origin)
+    mc.setAttr("{0}.rayDirection[{1}]".format(tlocTrans, rayIndex), *direction)
+    mc.setAttr("{0}.rayFrame[{1}]".format(tlocTrans, rayIndex), currentTime)
+    mc.setAttr("{0}.rayCamera[{1}]".format(tlocTrans, rayIndex), active3dViewCamTrans, type="string")
+
+    rayCount = len(mc.getAttr(tlocTrans + ".rayFrame", multiIndices=True) or [])
+    om.MGlobal.displayInfo("TLOC: {0} has {1} marked ray(s) + Reference Frame.".format(tlocTrans, rayCount))
+
+
+def main():
+    sel = mc.ls(selection=True, long=True)
+    if len(sel) != 1 or not tloc_ray.is_tloc(sel[0]):
+        mc.warning("Select one TLOC.")
+        return
+
+    markTloc(sel[0])
+
+
+if __name__ == "__main__":
+    main()
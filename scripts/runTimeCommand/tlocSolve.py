@@ -0,0 +1,145 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, Hyuk Ko
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Documentation
+"""
+Triangulates TLOCs from their rays by least-squares ray intersection.
+
+Rays are the TLOC's Reference Frame plus every ray added with "tlocMark".
+Creates(or moves) a "<TLOC>_solved" locator at the point closest to all rays.
+"residual" on the solved locator is the RMS distance from the point to the rays, in scene units.
+
+Solves the selected TLOCs, or every marked TLOC in the scene if nothing is selected.
+"""
+
+# Usage
+# Execute the code below via Hotkey.
+# e.g) Alt + Shift + S
+"""
+import tlocSolve
+tlocSolve.main()
+"""
+
+# Versions
+# 0.1.3 - Marked TLOCs come from "hkTools_tlocMarked_set"(tlocMark) instead of a scene-wide attribute scan.
+# 0.1.2 - TLOC ray helpers come from hkLib.tloc_ray.
+# 0.1.1 - Accepts TLOCs drawn by "hkScreenLocator".
+# 0.1.0 - Initial Release
+
+
+import maya.cmds as mc
+import maya.OpenMaya as om
+
+from hkLib import registry
+from hkLib import tloc_ray
+from hkLib import triangulation
+
+
+def getRays(tlocTrans):
+    origins = []
+    directions = []
+
+    referenceRay = tloc_ray.get_reference_ray(tlocTrans)
+    if referenceRay is not None:
+        origins.append(referenceRay[0])
+        directions.append(referenceRay[1])
+
+    if mc.attributeQuery("rayFrame", node=tlocTrans, exists=True):
+        for index in mc.getAttr(tlocTrans + ".rayFrame", multiIndices=True) or []:
+            origins.append(mc.getAttr("{0}.rayOrigin[{1}]".format(tlocTrans, index))[0])
+            directions.append(mc.getAttr("{0}.rayDirection[{1}]".format(tlocTrans, index))[0])
+    return origins, directions
+
+
+def createSolvedLoc(tlocTrans, point, residual, rayCount):
+    solvedLoc = tlocTrans.rsplit("|", 1)[-1] + "_solved"
+    if not mc.objExists(solvedLoc):
+        solvedLoc = mc.spaceLocator(name=solvedLoc)[0]
+        mc.addAttr(solvedLoc, longName="residual", attributeType="double")
+        mc.addAttr(solvedLoc, longName="rayCount", attributeType="long")
+        mc.setAttr(solvedLoc + ".residual", channelBox=True)
+        mc.setAttr(solvedLoc + ".rayCount", channelBox=True)
+        tlocShape = mc.listRelatives(tlocTrans, shapes=True, fullPath=True)[0]
+        solvedShape = mc.listRelatives(solvedLoc, shapes=True, fullPath=True)[0]
+        mc.setAttr(solvedShape + ".overrideEnabled", 1)
+        mc.setAttr(solvedShape + ".overrideColor", mc.getAttr(tlocShape + ".overrideColor")) # Same Color as TLOC.
+
+    mc.xform(solvedLoc, worldSpace=True, translation=point)
+    mc.setAttr(solvedLoc + ".residual", residual)
+    mc.setAttr(solvedLoc + ".rayCount", rayCount)
+    return solvedLoc
+
+
+def solveTlocs(tlocTransList):
+    """
+    Gathers the rays of every TLOC, solves them all in one batch, then creates the solved locators.
+    Prints one line per TLOC. Returns the solved locators.
+    """
+    rayList = [getRays(tlocTrans) for tlocTrans in tlocTransList]
+    resultList = triangulation.triangulate_batch(rayList)
+
+    solvedLocList = []
+    report = ["TLOC Solve", "{0:>12} {1:>5}  {2}".format("Residual", "Rays", "TLOC")]
+    for tlocTrans, (origins, directions), (point, residual) in zip(tlocTransList, rayList, resultList):
+        if point is None:
+            report.append("{0:>12} {1:>5}  {2}".format("-", len(origins), tlocTrans))
+            continue
+        solvedLocList.append(createSolvedLoc(tlocTrans, point, residual, len(origins)))
+        report.append("{0:12.6f} {1:5d}  {2}".format(residual, len(origins), tlocTrans))
+    print("\n".join(report))
+
+    om.MGlobal.displayInfo("TLOC Solve: {0} of {1} solved. Needs two rays that are not parallel. See Script Editor for residuals.".format(len(solvedLocList), len(tlocTransList)))
+    return solvedLocList
+
+
+def main():
+    sel = mc.ls(selection=True, long=True)
+    if sel:
+        tlocTransList = [tlocTrans for tlocTrans in sel if tloc_ray.is_tloc(tlocTrans)]
+    else:
+        registry.adopt_legacy_nodes("tlocMarked", "*.rayFrame") # Marked before the registry.
+        tlocTransList = [tlocTrans for tlocTrans in mc.ls(registry.get_registered_nodes("tlocMarked"), long=True) if tloc_ray.is_tloc(tlocTrans)] # Marked TLOCs
+
+    if len(tlocTransList) == 0:
+        mc.warning("Select TLOCs marked with \"tlocMark\".")
+        return
+
+    mc.undoInfo(openChunk=True)
+    try:
+        solvedLocList = solveTlocs(tlocTransList)
+    finally:
+        mc.undoInfo(closeChunk=True)
+
+    if solvedLocList:
+        mc.select(solvedLocList, replace=True)
+
+
+if __name__ == "__main__":
+    main()
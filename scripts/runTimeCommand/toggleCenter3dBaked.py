@@ -0,0 +1,22 @@
+# Author : HYUK KO | kohyuk91@gmail.com | github.com/kohyuk91
+
+
+import maya.cmds as mc
+import maya.OpenMaya as om
+
+
+CENTER3D_BAKED_OPTIONVAR = "hkToolsCenter3dBaked" # Read by "center3d".
+
+
+def main():
+    """
+    Toggles Center3D between "Live"(film offset computed by nodes) and "Baked"(film offset baked to curves).
+    Applies to Center3Ds created afterwards.
+    """
+    baked = mc.optionVar(exists=CENTER3D_BAKED_OPTIONVAR) and mc.optionVar(q=CENTER3D_BAKED_OPTIONVAR) == 1
+    mc.optionVar(intValue=(CENTER3D_BAKED_OPTIONVAR, int(not baked)))
+    om.MGlobal.displayInfo("Center3D: {0}".format("Live" if baked else "Baked"))
+
+
+if __name__ == "__main__":
+    main()
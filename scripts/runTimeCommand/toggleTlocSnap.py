@@ -0,0 +1,24 @@
+# Author : HYUK KO | kohyuk91@gmail.com | github.com/kohyuk91
+
+
+import maya.cmds as mc
+import maya.OpenMaya as om
+
+
+TLOC_SNAP_OPTIONVAR = "hkToolsTlocSnap" # Read by "tloc".
+TLOC_SNAP_MODE_LIST = ["Off", "Surface", "Vertex"]
+
+
+def main():
+    """
+    Cycles TLOC Snap: Off >> Surface >> Vertex >> Off.
+    Surface places new TLOCs on the first mesh hit under the cursor, Vertex on the nearest vertex of the hit face.
+    """
+    snapMode = mc.optionVar(q=TLOC_SNAP_OPTIONVAR) if mc.optionVar(exists=TLOC_SNAP_OPTIONVAR) else 0
+    snapMode = (snapMode + 1) % len(TLOC_SNAP_MODE_LIST)
+    mc.optionVar(intValue=(TLOC_SNAP_OPTIONVAR, snapMode))
+    om.MGlobal.displayInfo("TLOC Snap: {0}".format(TLOC_SNAP_MODE_LIST[snapMode]))
+
+
+if __name__ == "__main__":
+    main()
@@ -25,22 +25,32 @@ except ImportError:
 
 import os
 import re
+import traceback
 from functools import wraps
 
+from hkLib import bake
+from hkLib import bulk_edit
+
 
 # Decorator for undo support.
 def openCloseChunk(func):
     @wraps(func)
     def wrapper(*args, **kargs):
         action = None
+        cancelled = False
         try:
             mc.undoInfo(openChunk=True)
             action = func(*args, **kargs)
+        except bake.BakeCancelled:
+            cancelled = True
         except:
             print(traceback.format_exc())
             pass
         finally:
             mc.undoInfo(closeChunk=True)
+            if cancelled:
+                mc.undo() # Roll back everything the cancelled bake did.
+                mc.warning("Bake cancelled.")
             return action
 
     return wrapper
@@ -68,6 +78,16 @@ class BakeCam(QtWidgets.QDialog):
         self.options_resetScale_cb = QtWidgets.QCheckBox("Reset Scale")
         self.options_resetScale_cb.setChecked(True)
 
+        self.sampling_mode_cmb = QtWidgets.QComboBox()
+        self.sampling_mode_cmb.addItems(["Step", "Source Keys"])
+        self.sampling_mode_cmb.setToolTip("Step: every N frames(below 1 for sub-frames). Source Keys: key times of the camera and its parents.")
+        self.sampling_step_sb = QtWidgets.QDoubleSpinBox()
+        self.sampling_step_sb.setRange(0.05, 100.0)
+        self.sampling_step_sb.setSingleStep(0.5)
+        self.sampling_step_sb.setValue(1.0)
+        self.sampling_skipUnchanged_cb = QtWidgets.QCheckBox("Skip Unchanged")
+        self.sampling_skipUnchanged_cb.setToolTip("Drops keys in the middle of holds.")
+
         self.bake_reparentToWorld_btn = QtWidgets.QPushButton("BAKE CAMERA")
         self.bake_reparentToWorld_btn.setStyleSheet("QPushButton {background-color: #EC5f67;}")
 
@@ -77,6 +97,13 @@ class BakeCam(QtWidgets.QDialog):
         options_layout.addWidget(self.options_resetScale_cb, 0, 0)
         options_groupbox.setLayout(options_layout)
 
+        sampling_groupbox = QtWidgets.QGroupBox("Sampling")
+        sampling_layout = QtWidgets.QGridLayout()
+        sampling_layout.addWidget(self.sampling_mode_cmb, 0, 0)
+        sampling_layout.addWidget(self.sampling_step_sb, 0, 1)
+        sampling_layout.addWidget(self.sampling_skipUnchanged_cb, 1, 0, 1, 2)
+        sampling_groupbox.setLayout(sampling_layout)
+
         bake_groupbox = QtWidgets.QGroupBox()
         bake_layout = QtWidgets.QGridLayout()
         bake_layout.addWidget(self.bake_reparentToWorld_btn, 0, 0)
@@ -84,11 +111,13 @@ class BakeCam(QtWidgets.QDialog):
 
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.addWidget(options_groupbox)
+        main_layout.addWidget(sampling_groupbox)
         main_layout.addWidget(bake_groupbox)
 
     def create_connections(self):
         #self.bake_duplicate_btn.clicked.connect(lambda: self.bake("duplicate"))
         self.bake_reparentToWorld_btn.clicked.connect(lambda: self.bake("reparentToWorld"))
+        self.sampling_mode_cmb.currentIndexChanged.connect(lambda index: self.sampling_step_sb.setEnabled(index == 0))
 
     def getObjectType(self, sel):
         selShape = mc.listRelatives(sel, fullPath=True, shapes=True) # Get selected object's shape node.
@@ -97,10 +126,23 @@ class BakeCam(QtWidgets.QDialog):
 
     def saveSettings(self):
         mc.optionVar(intValue=("bakeCam_options_resetScale_cb", self.options_resetScale_cb.isChecked()))
+        mc.optionVar(intValue=("bakeCam_sampling_mode_cmb", self.sampling_mode_cmb.currentIndex()))
+        mc.optionVar(floatValue=("bakeCam_sampling_step_sb", self.sampling_step_sb.value()))
+        mc.optionVar(intValue=("bakeCam_sampling_skipUnchanged_cb", self.sampling_skipUnchanged_cb.isChecked()))
 
     def loadSettings(self):
         if mc.optionVar(exists="bakeCam_options_resetScale_cb"):
             self.options_resetScale_cb.setChecked(True) if mc.optionVar(q="bakeCam_options_resetScale_cb") else self.options_resetScale_cb.setChecked(False)
+        if mc.optionVar(exists="bakeCam_sampling_mode_cmb"):
+            self.sampling_mode_cmb.setCurrentIndex(mc.optionVar(q="bakeCam_sampling_mode_cmb"))
+        if mc.optionVar(exists="bakeCam_sampling_step_sb"):
+            self.sampling_step_sb.setValue(mc.optionVar(q="bakeCam_sampling_step_sb"))
+        if mc.optionVar(exists="bakeCam_sampling_skipUnchanged_cb"):
+            self.sampling_skipUnchanged_cb.setChecked(bool(mc.optionVar(q="bakeCam_sampling_skipUnchanged_cb")))
+
+    def getSampleFrames(self, minTime, maxTime, sourceList):
+        mode = bake.SAMPLE_KEYS if self.sampling_mode_cmb.currentIndex() == 1 else bake.SAMPLE_STEP
+        return bake.get_sample_frames(minTime, maxTime, mode, self.sampling_step_sb.value(), sourceList)
 
     @openCloseChunk
     def bake(self, method):
@@ -135,28 +177,27 @@ class BakeCam(QtWidgets.QDialog):
         #    print "WIP"
 
         if method == "reparentToWorld":
-            worldLoc = mc.spaceLocator(name="worldLoc")[0]
+            # Sample the camera's world space motion directly. No locator, constraint or stepping through the scene.
             selCamRotateOrder = mc.getAttr(selCamTrans+".rotateOrder")
-            mc.setAttr(worldLoc+".rotateOrder", selCamRotateOrder)
-
-            pc = mc.parentConstraint(selCamTrans, worldLoc, maintainOffset=False)
-
-            mc.ogs(pause=True)
-            mc.bakeResults(worldLoc, simulation=True, attribute=["tx","ty","tz","rx","ry","rz"], time=(minTime, maxTime))
-            mc.ogs(pause=True)
-
-            mc.delete(pc) # Delete parent constraint.
+            frames = self.getSampleFrames(minTime, maxTime, [selCamTrans])
+            progress = bake.Progress("Bake Cam", bake.get_chunk_count(frames))
+            try:
+                frames, channelDict = bake.sample_channels(selCamTrans, None, frames, selCamRotateOrder, ["tx","ty","tz","rx","ry","rz"],
+                                                           self.sampling_skipUnchanged_cb.isChecked(), progress)
+            except bake.BakeCancelled:
+                mc.warning("Bake cancelled.")
+                return # Nothing has been changed yet.
+            finally:
+                progress.close()
 
             # Delete selected camera's translation and rotation attributes.
             mm.eval('cutKey -time ":" -hierarchy none  -at "tx" -at "ty" -at "tz" -at "rx" -at "ry" -at "rz" {cam};'.format(cam=selCamTrans))
             # Unparent selected camera to world
             unparentedSelCamTrans = mc.parent(selCamTrans, world=True)[0]
 
-            # Cut worldLoc transform keys.
-            mm.eval('cutKey -time ":" -hierarchy none  -at "tx" -at "ty" -at "tz" -at "rx" -at "ry" -at "rz" {loc};'.format(loc=worldLoc))
-            # Paste worldLoc transform keys to unparentedSelCamTrans
-            mm.eval('pasteKey -option replaceCompletely -copies 1 -connect 0 -timeOffset 0 -floatOffset 0 -valueOffset 0 "{cam}";'.format(cam=unparentedSelCamTrans))
-            mc.delete(worldLoc)
+            # Key the world space motion on the unparented camera
+            with bulk_edit.BulkEdit() as edit:
+                bake.write_channels(unparentedSelCamTrans, frames, channelDict, edit)
 
             # If Reset Scale is checked, set unparentedSelCamTrans scaleXYZ value to 1.
             if self.options_resetScale_cb.isChecked():
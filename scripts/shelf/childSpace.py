@@ -23,22 +23,31 @@ except ImportError:
     from PySide2 import QtGui, QtCore, QtWidgets
     import shiboken2 as shiboken
 
+import traceback
 from functools import wraps
 
+from hkLib import bake
+
 
 # Decorator for undo support.
 def openCloseChunk(func):
     @wraps(func)
     def wrapper(*args, **kargs):
         action = None
+        cancelled = False
         try:
             mc.undoInfo(openChunk=True)
             action = func(*args, **kargs)
+        except bake.BakeCancelled:
+            cancelled = True
         except:
             print(traceback.format_exc())
             pass
         finally:
             mc.undoInfo(closeChunk=True)
+            if cancelled:
+                mc.undo() # Roll back everything the cancelled bake did.
+                mc.warning("Bake cancelled.")
             return action
 
     return wrapper
@@ -87,6 +96,16 @@ class ChildSpace(QtWidgets.QDialog):
         self.objectPointGroupList_remove_btn = QtWidgets.QPushButton("REMOVE")
         self.objectPointGroupList_remove_btn.setStyleSheet("QPushButton {background-color: #EC5f67;}")
 
+        self.sampling_mode_cmb = QtWidgets.QComboBox()
+        self.sampling_mode_cmb.addItems(["Step", "Source Keys"])
+        self.sampling_mode_cmb.setToolTip("Step: every N frames(below 1 for sub-frames). Source Keys: key times of the camera, the object point group and their parents.")
+        self.sampling_step_sb = QtWidgets.QDoubleSpinBox()
+        self.sampling_step_sb.setRange(0.05, 100.0)
+        self.sampling_step_sb.setSingleStep(0.5)
+        self.sampling_step_sb.setValue(1.0)
+        self.sampling_skipUnchanged_cb = QtWidgets.QCheckBox("Skip Unchanged")
+        self.sampling_skipUnchanged_cb.setToolTip("Drops keys in the middle of holds.")
+
         self.childSpace_btn = QtWidgets.QPushButton("CHILD SPACE")
         self.childSpace_btn.setFont(self.big_font)
         self.childSpace_btn.setStyleSheet("QPushButton {background-color: #EC5f67;}")
@@ -105,6 +124,13 @@ class ChildSpace(QtWidgets.QDialog):
         objectPointGroupList_layout.addWidget(self.objectPointGroupList_remove_btn, 1, 1)
         objectPointGroupList_groupbox.setLayout(objectPointGroupList_layout)
 
+        sampling_groupbox = QtWidgets.QGroupBox("Sampling")
+        sampling_layout = QtWidgets.QGridLayout()
+        sampling_layout.addWidget(self.sampling_mode_cmb, 0, 0)
+        sampling_layout.addWidget(self.sampling_step_sb, 0, 1)
+        sampling_layout.addWidget(self.sampling_skipUnchanged_cb, 1, 0, 1, 2)
+        sampling_groupbox.setLayout(sampling_layout)
+
         childSpace_groupbox = QtWidgets.QGroupBox("Step 3. Run")
         childSpace_layout = QtWidgets.QGridLayout()
         childSpace_layout.addWidget(self.childSpace_btn, 0, 0)
@@ -113,6 +139,7 @@ class ChildSpace(QtWidgets.QDialog):
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.addWidget(camera_groupbox)
         main_layout.addWidget(objectPointGroupList_groupbox)
+        main_layout.addWidget(sampling_groupbox)
         main_layout.addWidget(childSpace_groupbox)
 
     def create_connections(self):
@@ -120,6 +147,7 @@ class ChildSpace(QtWidgets.QDialog):
         self.objectPointGroupList_remove_btn.clicked.connect(lambda: self.removeCurrentItem(self.objectPointGroupList_lw))
         self.camera_get_btn.clicked.connect(self.setCameraLabel)
         self.childSpace_btn.clicked.connect(self.childSpace)
+        self.sampling_mode_cmb.currentIndexChanged.connect(lambda index: self.sampling_step_sb.setEnabled(index == 0))
 
     def getSelections(self):
         sel = mc.ls(selection=True, long=True)
@@ -167,6 +195,10 @@ class ChildSpace(QtWidgets.QDialog):
         camera = sel[0]
         self.camera_lb.setText(camera)
 
+    def getSampleFrames(self, minTime, maxTime, sourceList):
+        mode = bake.SAMPLE_KEYS if self.sampling_mode_cmb.currentIndex() == 1 else bake.SAMPLE_STEP
+        return bake.get_sample_frames(minTime, maxTime, mode, self.sampling_step_sb.value(), sourceList)
+
     @openCloseChunk
     def childSpace(self):
         camera = self.camera_lb.text()
@@ -179,22 +211,28 @@ class ChildSpace(QtWidgets.QDialog):
             mc.warning("'Step 2. Get Object Point Group List' is empty")
             return
 
+        minTime = mc.playbackOptions(q=True, minTime=True)
+        maxTime = mc.playbackOptions(q=True, maxTime=True)
+
+        jobList = []
         for objectPointGroup in objectPointGroupList:
             parentGrpTrans = mc.group(name=objectPointGroup+"_ctrl", empty=True)
             childGrpTrans = mc.duplicate(objectPointGroup, name=objectPointGroup+"_dup")[0]
-            mc.parent(childGrpTrans, parentGrpTrans)
+            childGrpTrans = mc.ls(mc.parent(childGrpTrans, parentGrpTrans), long=True)[0]
 
             ### Add Constraints ###
             parentGrpPC = mc.parentConstraint(camera, parentGrpTrans, maintainOffset=False)
-            childGrpPC = mc.parentConstraint(objectPointGroup, childGrpTrans, maintainOffset=False)
 
-            ### Bake ###
-            minTime = mc.playbackOptions(q=True, minTime=True)
-            maxTime = mc.playbackOptions(q=True, maxTime=True)
-            mc.bakeResults(childGrpTrans, attribute=["tx","ty","tz","rx","ry","rz"], time=(minTime, maxTime))
-            mc.delete(childGrpPC)
+            # Object point group's world motion in the camera's space. Sampled directly, no constraint on the child.
+            frames = self.getSampleFrames(minTime, maxTime, [camera, objectPointGroup])
+            jobList.append((objectPointGroup, childGrpTrans, frames, mc.getAttr(childGrpTrans+".rotateOrder"), ["tx","ty","tz","rx","ry","rz"],
+                            self.sampling_skipUnchanged_cb.isChecked()))
+
+        ### Bake ###
+        bake.bake_targets(jobList, title="Child Space")
 
-            ### Hide Original ###
+        ### Hide Original ###
+        for objectPointGroup in objectPointGroupList:
             mc.hide(objectPointGroup)
 
         # Close window
@@ -4,6 +4,8 @@ import maya.cmds as mc
 import maya.OpenMaya as om
 import maya.OpenMayaUI as omui
 
+from hkLib import registry
+
 
 def getActive3dViewCam():
     active3dView = omui.M3dView.active3dView()
@@ -16,8 +18,9 @@ def getActive3dViewCam():
 
 
 def main():
-    if mc.objExists("*dualImagePlane*"):
-        mc.delete("*dualImagePlane*") # Delete existing "dualImagePlane"
+    registry.adopt_legacy_nodes("dualImage", "*dualImagePlane*") # Made before the registry.
+    if registry.get_registered_nodes("dualImage"):
+        registry.delete_registered_nodes("dualImage") # Delete existing "dualImagePlane"
         return
 
     active3dViewCamShape, active3dViewCamTrans = getActive3dViewCam()
@@ -37,7 +40,9 @@ def main():
     mc.setAttr(dualImagePlaneShape+'.alphaGain', 0.5)
 
     # Depth Expression
-    mc.expression(s="{0}.depth = {1}.nearClipPlane + 1".format(dualImagePlaneShape, active3dViewCamShape), object=dualImagePlaneTrans)
+    dualImagePlaneExp = mc.expression(s="{0}.depth = {1}.nearClipPlane + 1".format(dualImagePlaneShape, active3dViewCamShape), object=dualImagePlaneTrans)
+
+    registry.register_nodes("dualImage", [dualImagePlaneTrans, dualImagePlaneExp])
 
 
     mc.AttributeEditor()
@@ -4,6 +4,8 @@ import maya.cmds as mc
 import maya.OpenMaya as om
 import maya.OpenMayaUI as omui
 
+from hkLib import registry
+
 
 def getActive3dViewCam():
     active3dView = omui.M3dView.active3dView()
@@ -16,8 +18,9 @@ def getActive3dViewCam():
 
 
 def main():
-    if mc.objExists("*horizonLine*"):
-        mc.delete("*horizonLine*") # Delete existing "horizonLine"
+    registry.adopt_legacy_nodes("horizonLine", "*horizonLine*") # Made before the registry.
+    if registry.get_registered_nodes("horizonLine"):
+        registry.delete_registered_nodes("horizonLine") # Delete existing "horizonLine"
         return
 
     active3dViewCamShape, active3dViewCamTrans = getActive3dViewCam()
@@ -25,7 +28,7 @@ def main():
     horizonLineTrans = mc.circle(name='horizonLine', radius=2, normal=(0,1,0), sections=32)[0]
     horizonLineShape = mc.listRelatives(horizonLineTrans, shapes=True, fullPath=True)[0]
 
-    mc.expression(s="""
+    horizonLineExp = mc.expression(s="""
                     {0}.sx = {1}.nearClipPlane;
                     {0}.sy = {1}.nearClipPlane;
                     {0}.sz = {1}.nearClipPlane;
@@ -34,7 +37,9 @@ def main():
     mc.setAttr(horizonLineShape + '.overrideEnabled', 1)
     mc.setAttr(horizonLineShape + '.overrideColor', 14)
 
-    mc.pointConstraint(active3dViewCamTrans, horizonLineTrans, maintainOffset=False)
+    horizonLinePointConstraint = mc.pointConstraint(active3dViewCamTrans, horizonLineTrans, maintainOffset=False)[0]
+
+    registry.register_nodes("horizonLine", [horizonLineTrans, horizonLineExp, horizonLinePointConstraint])
 
     mc.select(clear=True)
 
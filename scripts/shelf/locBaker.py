@@ -54,28 +54,113 @@ import maya.cmds as mc
 import maya.OpenMaya as om
 import maya.OpenMayaUI as omui
 
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import traceback
 from functools import wraps
 
+from hkLib import bake
+from hkLib import bake_worker
+from hkLib import bulk_edit
+
+
+OFFLOAD_WORKER_COUNT = max(1, multiprocessing.cpu_count() - 1) # mayapy workers for "Offload". One core is left to the UI.
+OFFLOAD_POLL_MS = 500
+
 
 # Decorator for undo support.
 def openCloseChunk(func):
     @wraps(func)
     def wrapper(*args, **kargs):
         action = None
+        cancelled = False
         try:
             mc.undoInfo(openChunk=True)
             action = func(*args, **kargs)
+        except bake.BakeCancelled:
+            cancelled = True
         except:
             print(traceback.format_exc())
             pass
         finally:
             mc.undoInfo(closeChunk=True)
+            if cancelled:
+                mc.undo() # Roll back everything the cancelled bake did.
+                mc.warning("Bake cancelled.")
             return action
 
     return wrapper
 
 
+# Running Offload bake. Kept at module level(and across "reload"), so it is still merged after the dialog is closed or relaunched.
+if "offloadState" not in globals():
+    offloadState = {"jobs": [], "dir": None, "timer": None} # jobs: [(process, curve file path, log file path, locators)]
+
+
+def start_offload(jobList, offloadDir):
+    offloadState["jobs"] = jobList
+    offloadState["dir"] = offloadDir
+    if offloadState["timer"] is None:
+        timer = QtCore.QTimer() # No parent: the dialog can be deleted while the workers run.
+        timer.setInterval(OFFLOAD_POLL_MS)
+        timer.timeout.connect(poll_offload)
+        offloadState["timer"] = timer
+    offloadState["timer"].start()
+
+
+def poll_offload():
+    if any(job[0].poll() is None for job in offloadState["jobs"]):
+        return
+    offloadState["timer"].stop()
+
+    try:
+        merge_offload(offloadState["jobs"])
+    finally:
+        shutil.rmtree(offloadState["dir"], ignore_errors=True)
+        offloadState["jobs"] = []
+        offloadState["dir"] = None
+
+
+@openCloseChunk
+def merge_offload(jobList):
+    """
+    Writes the curves baked by the workers. This is an undo step of its own, after the one that created the locators.
+    Locators of a failed worker are deleted, since they would stay unkeyed. Locators deleted in the meantime are skipped.
+    """
+    failedLocList = []
+    with bulk_edit.BulkEdit() as edit: # All workers' curves undo in one step.
+        for process, output, log, locList in jobList:
+            if process.returncode != 0 or not os.path.isfile(output):
+                with open(log, "r") as f:
+                    print(f.read())
+                om.MGlobal.displayError("Loc Baker: A worker failed. See the Script Editor for its log. Its locators are deleted.")
+                failedLocList += locList
+                continue
+
+            frameDict = {}
+            channelDict = {}
+            for node, channel, frames, values in bake_worker.read_curves(output):
+                frameDict[node] = list(frames) # Every channel of a node has the same frames.
+                channelDict.setdefault(node, {})[channel] = values
+            for node in channelDict:
+                if not mc.objExists(node):
+                    continue
+                if len(frameDict[node]) == 1:
+                    bake.set_channels(node, channelDict[node], edit)
+                else:
+                    bake.write_channels(node, frameDict[node], channelDict[node], edit)
+
+    failedLocList = [loc for loc in failedLocList if mc.objExists(loc)]
+    if failedLocList:
+        mc.delete(failedLocList)
+    om.MGlobal.displayInfo("Loc Baker: Offload bake merged.")
+
+
 class LocBaker(QtWidgets.QDialog):
     @classmethod
     def maya_main_window(cls):
@@ -145,6 +230,24 @@ class LocBaker(QtWidgets.QDialog):
         self.rotateOrder_yxz_rb = QtWidgets.QRadioButton("YXZ")
         self.rotateOrder_zyx_rb = QtWidgets.QRadioButton("ZYX")
 
+        self.method_direct_rb = QtWidgets.QRadioButton("Direct")
+        self.method_direct_rb.setToolTip("Samples world matrices without constraints or stepping through the scene.")
+        self.method_direct_rb.toggle()
+        self.method_constraint_rb = QtWidgets.QRadioButton("Constraint")
+        self.method_constraint_rb.setToolTip("Point, orient & scale constraints baked with bakeResults.")
+        self.method_offload_rb = QtWidgets.QRadioButton("Offload")
+        self.method_offload_rb.setToolTip("Direct bake in background mayapy workers. Maya stays usable, curves are merged when they finish.")
+
+        self.sampling_mode_cmb = QtWidgets.QComboBox()
+        self.sampling_mode_cmb.addItems(["Step", "Source Keys"])
+        self.sampling_mode_cmb.setToolTip("Step: every N frames(below 1 for sub-frames). Source Keys: key times of the source and its parents.")
+        self.sampling_step_sb = QtWidgets.QDoubleSpinBox()
+        self.sampling_step_sb.setRange(0.05, 100.0)
+        self.sampling_step_sb.setSingleStep(0.5)
+        self.sampling_step_sb.setValue(1.0)
+        self.sampling_skipUnchanged_cb = QtWidgets.QCheckBox("Skip Unchanged")
+        self.sampling_skipUnchanged_cb.setToolTip("Drops keys in the middle of holds. Direct & Offload only.")
+
         self.apply_btn = QtWidgets.QPushButton("Apply")
         self.bake_btn = QtWidgets.QPushButton("Bake")
 
@@ -199,6 +302,20 @@ class LocBaker(QtWidgets.QDialog):
         rotateOrder_layout.addWidget(self.rotateOrder_zyx_rb, 2, 2)
         rotateOrder_groupbox.setLayout(rotateOrder_layout)
 
+        sampling_groupbox = QtWidgets.QGroupBox("Sampling")
+        sampling_layout = QtWidgets.QGridLayout()
+        sampling_layout.addWidget(self.sampling_mode_cmb, 0, 0)
+        sampling_layout.addWidget(self.sampling_step_sb, 0, 1)
+        sampling_layout.addWidget(self.sampling_skipUnchanged_cb, 1, 0, 1, 2)
+        sampling_groupbox.setLayout(sampling_layout)
+
+        method_groupbox = QtWidgets.QGroupBox("Method")
+        method_layout = QtWidgets.QHBoxLayout()
+        method_layout.addWidget(self.method_direct_rb)
+        method_layout.addWidget(self.method_constraint_rb)
+        method_layout.addWidget(self.method_offload_rb)
+        method_groupbox.setLayout(method_layout)
+
         bake_groupbox = QtWidgets.QGroupBox()
         bake_layout = QtWidgets.QHBoxLayout()
         bake_layout.addWidget(self.apply_btn)
@@ -211,6 +328,8 @@ class LocBaker(QtWidgets.QDialog):
         main_layout.addWidget(self.orient_groupbox)
         main_layout.addWidget(self.scale_groupbox)
         main_layout.addWidget(rotateOrder_groupbox)
+        main_layout.addWidget(sampling_groupbox)
+        main_layout.addWidget(method_groupbox)
         main_layout.addWidget(bake_groupbox)
 
     def create_connections(self):
@@ -220,6 +339,15 @@ class LocBaker(QtWidgets.QDialog):
         self.end_frame_update_btn.clicked.connect(lambda: self.update("end"))
         self.apply_btn.clicked.connect(lambda: self.bake("apply"))
         self.bake_btn.clicked.connect(lambda: self.bake("bake"))
+        self.sampling_mode_cmb.currentIndexChanged.connect(self.update_sampling)
+        self.method_constraint_rb.toggled.connect(self.update_sampling)
+
+    def update_sampling(self, *args):
+        # bakeResults only steps. With Constraint, "Source Keys" and "Skip Unchanged" are disabled instead of ignored.
+        constraint = self.method_constraint_rb.isChecked()
+        self.sampling_mode_cmb.setEnabled(not constraint)
+        self.sampling_step_sb.setEnabled(constraint or self.sampling_mode_cmb.currentIndex() == 0)
+        self.sampling_skipUnchanged_cb.setEnabled(not constraint)
 
     def update(self, mode):
         if mode == "this":
@@ -233,8 +361,121 @@ class LocBaker(QtWidgets.QDialog):
             self.start_frame_le.setText(str(int(mc.playbackOptions(q=True, minTime=True))))
             self.end_frame_le.setText(str(int(mc.playbackOptions(q=True, maxTime=True))))
 
+    def create_locator(self, trans):
+        # Create Locator
+        #loc = mc.spaceLocator(name="baked{0}".format(trans))[0]
+        loc = mc.spaceLocator(name="bakerLoc_#")[0]
+
+        # Set Rotate Order
+        if self.rotateOrder_inherit_rb.isChecked(): mc.setAttr(loc+".rotateOrder", mc.getAttr(trans+".rotateOrder"))
+        if self.rotateOrder_xyz_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 0)
+        if self.rotateOrder_yzx_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 1)
+        if self.rotateOrder_zxy_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 2)
+        if self.rotateOrder_xzy_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 3)
+        if self.rotateOrder_yxz_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 4)
+        if self.rotateOrder_zyx_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 5)
+
+        return loc
+
+    def get_channel_list(self):
+        """
+        Returns the channels to bake. Unchecked groups and axes are skipped, like the constraints' "skip" flag.
+        """
+        channel_list = []
+        for groupbox, attr, cb_list in ((self.point_groupbox, "t", (self.point_x_cb, self.point_y_cb, self.point_z_cb)),
+                                        (self.orient_groupbox, "r", (self.orient_x_cb, self.orient_y_cb, self.orient_z_cb)),
+                                        (self.scale_groupbox, "s", (self.scale_x_cb, self.scale_y_cb, self.scale_z_cb))):
+            if groupbox.isChecked():
+                channel_list += [attr + axis for axis, cb in zip("xyz", cb_list) if cb.isChecked()]
+        return channel_list
+
+    def get_sample_frames(self, sourceList):
+        mode = bake.SAMPLE_KEYS if self.sampling_mode_cmb.currentIndex() == 1 else bake.SAMPLE_STEP
+        return bake.get_sample_frames(int(self.start_frame_le.text()), int(self.end_frame_le.text()), mode, self.sampling_step_sb.value(), sourceList)
+
     @openCloseChunk
     def bake(self, mode):
+        if self.method_offload_rb.isChecked():
+            if offloadState["jobs"]:
+                mc.warning("Loc Baker: An Offload bake is still running.")
+                return
+            self.bake_offload() # Merged by "poll_offload", even if this dialog is closed.
+        elif self.method_direct_rb.isChecked():
+            self.bake_direct()
+        else:
+            self.bake_constraint()
+
+        mc.select(clear=True)
+
+
+        ## Close Window ##
+        if mode == "bake":
+            self.close()
+            self.deleteLater()
+
+    def bake_direct(self):
+        """
+        Samples each selected transform's world matrix for the range and writes the locator's curves directly.
+        No constraints are created and the scene is not stepped through frame by frame.
+        A single frame range(Start == End) places the locators without keys.
+        """
+        # Get List of selected Transform Nodes
+        selTransList = mc.ls(selection=True, transforms=True, long=True)
+
+        channel_list = self.get_channel_list()
+        skipUnchanged = self.sampling_skipUnchanged_cb.isChecked()
+
+        jobList = []
+        for trans in selTransList:
+            loc = self.create_locator(trans)
+            jobList.append((trans, loc, self.get_sample_frames([trans]), mc.getAttr(loc+".rotateOrder"), channel_list, skipUnchanged))
+
+        bake.bake_targets(jobList, title="Loc Baker")
+
+    def bake_offload(self):
+        """
+        Creates the locators, saves a snapshot of the scene and splits the selection across mayapy workers.
+        Each worker bakes its objects for the whole range(so the euler filter is not broken at slice boundaries).
+        "poll_offload" merges the results. It runs at module level, so the dialog can be closed or relaunched meanwhile.
+        """
+        # Get List of selected Transform Nodes
+        selTransList = mc.ls(selection=True, transforms=True, long=True)
+        if not selTransList:
+            return
+
+        frames = self.get_sample_frames(selTransList) # Shared by every worker. With "Source Keys", the key times of all selected objects.
+        channel_list = self.get_channel_list()
+
+        pairList = []
+        for trans in selTransList:
+            loc = mc.ls(self.create_locator(trans), long=True)[0]
+            pairList.append([trans, loc, mc.getAttr(loc+".rotateOrder")])
+
+        offloadDir = tempfile.mkdtemp(prefix="locBaker_")
+        scene = mc.file(os.path.join(offloadDir, "snapshot.mb"), exportAll=True, type="mayaBinary", force=True)
+
+        mayapy = os.path.join(os.environ["MAYA_LOCATION"], "bin", "mayapy.exe" if sys.platform == "win32" else "mayapy")
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join([os.path.dirname(os.path.dirname(bake.__file__)), env.get("PYTHONPATH", "")])
+
+        workerCount = min(OFFLOAD_WORKER_COUNT, len(pairList))
+        jobList = []
+        for i in range(workerCount):
+            jobPath = os.path.join(offloadDir, "worker_{0}.json".format(i))
+            output = os.path.join(offloadDir, "worker_{0}.hkcurve".format(i))
+            log = os.path.join(offloadDir, "worker_{0}.log".format(i))
+            with open(jobPath, "w") as f:
+                json.dump({"scene": scene, "output": output, "frames": frames, "channels": channel_list,
+                           "skip_unchanged": self.sampling_skipUnchanged_cb.isChecked(),
+                           "pairs": pairList[i::workerCount]}, f)
+            with open(log, "w") as f:
+                process = subprocess.Popen([mayapy, "-m", "hkLib.bake_worker", jobPath], env=env, stdout=f, stderr=subprocess.STDOUT)
+            jobList.append((process, output, log, [pair[1] for pair in pairList[i::workerCount]]))
+
+        start_offload(jobList, offloadDir)
+        om.MGlobal.displayInfo("Loc Baker: Offloaded {0} object(s) to {1} worker(s).".format(len(pairList), workerCount))
+
+    def bake_constraint(self):
         # Get List of selected Transform Nodes
         selTransList = mc.ls(selection=True, transforms=True, long=True)
 
@@ -243,20 +484,9 @@ class LocBaker(QtWidgets.QDialog):
         ocList = []
         scList = []
         for trans in selTransList:
-            # Create Locator
-            #loc = mc.spaceLocator(name="baked{0}".format(trans))[0]
-            loc = mc.spaceLocator(name="bakerLoc_#")[0]
+            loc = self.create_locator(trans)
             locList.append(loc)
 
-            # Set Rotate Order
-            if self.rotateOrder_inherit_rb.isChecked(): mc.setAttr(loc+".rotateOrder", mc.getAttr(trans+".rotateOrder"))
-            if self.rotateOrder_xyz_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 0)
-            if self.rotateOrder_yzx_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 1)
-            if self.rotateOrder_zxy_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 2)
-            if self.rotateOrder_xzy_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 3)
-            if self.rotateOrder_yxz_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 4)
-            if self.rotateOrder_zyx_rb.isChecked(): mc.setAttr(loc+".rotateOrder", 5)
-
             if self.point_groupbox.isChecked():
                 pskip = ""
                 if self.point_x_cb.isChecked() == False: pskip += ", skip='x'"
@@ -281,9 +511,22 @@ class LocBaker(QtWidgets.QDialog):
 
         # Bake
         if self.start_frame_le.text() != self.end_frame_le.text(): # If Start & End Frame is not same, Bake.
+            # One bakeResults per chunk of frames, so the bake shows progress and can be cancelled(Esc).
+            startFrame = int(self.start_frame_le.text())
+            endFrame = int(self.end_frame_le.text())
+            step = self.sampling_step_sb.value() # Source Keys is not supported by bakeResults.
+            chunkList = bake.get_chunks(bake.get_sample_frames(startFrame, endFrame, step=step))
+
+            progress = bake.Progress("Loc Baker", len(chunkList))
             mc.ogs(pause=True)
-            mc.bakeResults(locList, simulation=True, attribute=["tx","ty","tz","rx","ry","rz","sx","sy","sz"], time=(self.start_frame_le.text(), self.end_frame_le.text()))
-            mc.ogs(pause=True)
+            try:
+                for chunkFrames in chunkList:
+                    progress.step()
+                    mc.bakeResults(locList, simulation=True, attribute=["tx","ty","tz","rx","ry","rz","sx","sy","sz"], time=(chunkFrames[0], chunkFrames[-1]),
+                                   sampleBy=step, preserveOutsideKeys=True)
+            finally:
+                mc.ogs(pause=True)
+                progress.close()
 
         # Delete Constraints
         for pc in pcList:
@@ -302,14 +545,6 @@ class LocBaker(QtWidgets.QDialog):
             except:
                 pass
 
-        mc.select(clear=True)
-
-
-        ## Close Window ##
-        if mode == "bake":
-            self.close()
-            self.deleteLater()
-
 
 if __name__ == "__main__":
     try:
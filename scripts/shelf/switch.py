@@ -63,22 +63,31 @@ import maya.OpenMaya as om
 import maya.OpenMayaUI as omui
 
 
+import traceback
 from functools import wraps
 
+from hkLib import bake
+
 
 # Decorator for undo support.
 def openCloseChunk(func):
     @wraps(func)
     def wrapper(*args, **kargs):
         action = None
+        cancelled = False
         try:
             mc.undoInfo(openChunk=True)
             action = func(*args, **kargs)
+        except bake.BakeCancelled:
+            cancelled = True
         except:
             print(traceback.format_exc())
             pass
         finally:
             mc.undoInfo(closeChunk=True)
+            if cancelled:
+                mc.undo() # Roll back everything the cancelled bake did.
+                mc.warning("Bake cancelled.")
             return action
 
     return wrapper
@@ -132,6 +141,18 @@ class Switch(QtWidgets.QDialog):
         self.dynamic_object_btn.setMinimumWidth(40)
         #### Static & Dynamic Object ####
 
+        #### Sampling ####
+        self.sampling_mode_cmb = QtWidgets.QComboBox()
+        self.sampling_mode_cmb.addItems(["Step", "Source Keys"])
+        self.sampling_mode_cmb.setToolTip("Step: every N frames(below 1 for sub-frames). Source Keys: key times of both objects and their parents.")
+        self.sampling_step_sb = QtWidgets.QDoubleSpinBox()
+        self.sampling_step_sb.setRange(0.05, 100.0)
+        self.sampling_step_sb.setSingleStep(0.5)
+        self.sampling_step_sb.setValue(1.0)
+        self.sampling_skip_unchanged_cb = QtWidgets.QCheckBox("Skip Unchanged")
+        self.sampling_skip_unchanged_cb.setToolTip("Drops keys in the middle of holds.")
+        #### Sampling ####
+
         #### Switch ####
         self.switch_btn = QtWidgets.QPushButton("Switch")
         self.switch_btn.setFont(self.big_font)
@@ -152,14 +173,25 @@ class Switch(QtWidgets.QDialog):
         static_dynamic_object_GroupBox.setLayout(static_dynamic_object_Layout)
         #### Static & Dynamic Object ####
 
+        #### Sampling ####
+        sampling_GroupBox = QtWidgets.QGroupBox()
+        sampling_Layout = QtWidgets.QGridLayout()
+        sampling_Layout.addWidget(self.sampling_mode_cmb, 0, 0)
+        sampling_Layout.addWidget(self.sampling_step_sb, 0, 1)
+        sampling_Layout.addWidget(self.sampling_skip_unchanged_cb, 1, 0, 1, 2)
+        sampling_GroupBox.setLayout(sampling_Layout)
+        #### Sampling ####
+
         main_Layout = QtWidgets.QHBoxLayout(self)
         main_Layout.addWidget(static_dynamic_object_GroupBox)
+        main_Layout.addWidget(sampling_GroupBox)
         main_Layout.addWidget(self.switch_btn)
 
     def create_connections(self):
         self.static_object_btn.clicked.connect(lambda: self.get_object("static"))
         self.dynamic_object_btn.clicked.connect(lambda: self.get_object("dynamic"))
         self.switch_btn.clicked.connect(self.switch_motion)
+        self.sampling_mode_cmb.currentIndexChanged.connect(lambda index: self.sampling_step_sb.setEnabled(index == 0))
 
     def get_object(self, mode):
         sel_trans = mc.ls(selection=True, long=True)
@@ -172,6 +204,10 @@ class Switch(QtWidgets.QDialog):
             om.MGlobal.displayError("Please select exactly 'one' object.")
             return None
 
+    def get_sample_frames(self, start_frame, end_frame, source_list):
+        mode = bake.SAMPLE_KEYS if self.sampling_mode_cmb.currentIndex() == 1 else bake.SAMPLE_STEP
+        return bake.get_sample_frames(start_frame, end_frame, mode, self.sampling_step_sb.value(), source_list)
+
     @openCloseChunk
     def switch_motion(self):
         if self.dynamic_object_input_lb.text() != "" or self.static_object_input_lb.text() != "":
@@ -181,26 +217,26 @@ class Switch(QtWidgets.QDialog):
 
             dynamic_trans = self.dynamic_object_input_lb.text()
             static_trans = self.static_object_input_lb.text()
+            skip_unchanged = self.sampling_skip_unchanged_cb.isChecked()
+            frames = self.get_sample_frames(start_frame, end_frame, [dynamic_trans, static_trans])
 
             dynamic_grp = mc.group(name="dynamic_grp", empty=True)
             static_grp = mc.group(name="static_grp", empty=True)
-            mc.parent(static_grp, dynamic_grp)
+            static_grp = mc.ls(mc.parent(static_grp, dynamic_grp), long=True)[0]
 
             dynamic_group_pc = mc.parentConstraint(dynamic_trans, dynamic_grp, maintainOffset=False)[0]
-            static_group_pc = mc.parentConstraint(static_trans, static_grp, maintainOffset=False)[0]
-
-            mc.bakeResults(static_grp, attribute=attr_list, time=(start_frame, end_frame))
 
-            mc.delete(static_group_pc)
+            # Static Object's motion relative to the Dynamic Object. Sampled directly, no constraint on Static Group.
+            bake.bake_targets([(static_trans, static_grp, frames, mc.getAttr(static_grp + ".rotateOrder"), attr_list, skip_unchanged)], title="Switch(1/2)")
 
             # Mute Dynamic Object & Dynamic Group
             for attr in attr_list:
                 mc.mute("{0}.{1}".format(dynamic_trans, attr))
                 mc.mute("{0}.{1}".format(dynamic_grp, attr))
 
-            static_trans_pc = mc.parentConstraint(static_grp, static_trans, maintainOffset=False)[0] # Parent Constraint Static Object to Static Group
-            mc.bakeResults(static_trans, attribute=attr_list, time=(start_frame, end_frame))
-            mc.delete(static_trans_pc, dynamic_grp)
+            # Static Object follows Static Group
+            bake.bake_targets([(static_grp, static_trans, frames, mc.getAttr(static_trans + ".rotateOrder"), attr_list, skip_unchanged)], title="Switch(2/2)")
+            mc.delete(dynamic_grp)
         else:
             om.MGlobal.displayError("Staic Object or Dynamic Object is empty.")
             return None
@@ -33,6 +33,21 @@
 # Find out more at https://github.com/kohyuk91/zloc
 #
 # Versions:
+# 0.2.8 - ZLOCs store the prefix & suffix they were imported with. "Update Existing" and "Remove Missing" only touch ZLOCs with the same ones.
+# 0.2.7 - Keys filled by "Progressive" and their checksums are part of the import's undo step. Undoing before the fill is done finishes it first.
+# 0.2.6 - Curves and keys of an import are one "hkBulkEdit" undo step. Undo and redo are instant, however many ZLOCs were imported.
+# 0.2.5 - ZLOCs are "hkScreenLocator"s, drawn at a constant size in pixels. No more scale hack to keep them small.
+# 0.2.4 - "Triangulate" solves a 3D locator for every ZLOC of the selected camera, with residual and reprojection error.
+# 0.2.3 - "Export" projects locators through the camera and writes a .zloc(.zlocb) for the playback range. No timeline stepping.
+# 0.2.2 - "Progressive" keys a window around the current frame first, then fills the rest in idle time. Can be cancelled.
+# 0.2.1 - "Live Link" watches quick.zloc(or a chosen folder) and updates existing ZLOCs on every write.
+# 0.2.0 - "Batch" imports several files into one or more cameras. Files are parsed concurrently, and timings are printed.
+# 0.1.9 - "Update Existing" re-imports into existing ZLOCs by name and only rewrites changed tracks. "Remove Missing" deletes vanished ones.
+# 0.1.8 - Reads the binary ".zlocb" format(memory-mapped). "Manual" accepts .zloc and .zlocb. "Quick" uses the newer of quick.zloc and quick.zlocb.
+# 0.1.7 - One "zlocRays" node per camera draws every Projection Ray, instead of a curve and an aimConstraint per ZLOC.
+# 0.1.6 - One "zlocProjector" node per camera replaces the two expressions each ZLOC had.
+# 0.1.5 - .zloc files are read line by line into per-track arrays(hkLib.zloc_file).
+# 0.1.4 - "U" & "V" keys are written in one batch per curve instead of one setKeyframe call per key.
 # 0.1.3 - All versions does not require "Qt.py" anymore. Added 'if __name__ == "__main__": statement'.
 # 0.1.2 - Maya 2017 and above does not require "Qt.py" anymore.
 # 0.1.1 - Naming correction. "Epipolar Line" to "Projection Ray".
@@ -62,13 +77,40 @@ except ImportError:
 import maya.cmds as mc
 import maya.OpenMaya as om
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+import maya.utils
 
 import os
 import random
+from array import array
+from bisect import bisect_left, bisect_right
 import tempfile
+import threading
+import time
 import traceback
+import zlib
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 from functools import wraps
 
+from hkLib import bake
+from hkLib import bulk_edit
+from hkLib import nodes
+from hkLib import projection
+from hkLib import triangulation
+from hkLib import zloc_file
+
+
+ZLOC_PIXEL_SIZE = 12.0 # Size of a ZLOC on screen.
+
+ZLOC_FILE_FILTER = "ZLOC (*.zloc *.zlocb);;ZLOC Text (*.zloc);;ZLOC Binary (*.zlocb)"
+
+PROGRESSIVE_WINDOW = 50 # Frames keyed on each side of the current frame before a "Progressive" import returns.
+PROGRESSIVE_CHUNK_SIZE = 500 # Keys per curve written by one fill step.
+PROGRESSIVE_TICK_MS = 20 # Time spent filling keys per idle tick. Lower keeps the UI smoother, higher finishes sooner.
+
+LIVE_DEBOUNCE_MS = 300 # Wait this long after the last write before reloading. Exporters write in several steps.
 
 TEMPDIR = tempfile.gettempdir() # Get the path of the system's temp directory
 # print(TEMPDIR):
@@ -93,6 +135,67 @@ def openCloseChunk(func):
     return wrapper
 
 
+def set_keys(node, attr, times, values, edit):
+    """
+    Keys "node.attr" with all times and values at once, instead of one setKeyframe call per key.
+    "times" must be sorted and unique.
+
+    The curve(if missing) and keys are made through "edit"(bulk_edit.BulkEdit), so a whole import is one undo step.
+    Keys are written with the "Global" tangent type, which is what setKeyframe uses.
+    """
+    edit.set_keys(bake.get_plug("{0}.{1}".format(node, attr)), times, values)
+
+
+def add_keys(node, attr, times, values, edit):
+    """
+    Adds keys to the existing curve of "node.attr" through "edit"(bulk_edit.BulkEdit). Keys already on the curve are kept.
+    """
+    edit.set_keys(bake.get_plug("{0}.{1}".format(node, attr)), times, values, keep_existing=True)
+
+
+def split_progressive(frames, current, window, chunk_size):
+    """
+    Splits the sorted "frames" for a progressive import.
+    Returns (start, end) of the keys within "window" frames of "current", and the (rank, start, end) chunks for the rest.
+    Chunks with a lower rank are nearer to "current". Each rank has at most one chunk after the window and one before it.
+    If no key is within the window, the window is the nearest key, so the curve can still be created.
+    """
+    start = bisect_left(frames, current - window)
+    end = bisect_right(frames, current + window)
+    if start == end:
+        if start == len(frames) or (start > 0 and current - frames[start - 1] < frames[start] - current):
+            start -= 1
+        end = start + 1
+
+    chunk_list = []
+    for rank, chunk_start in enumerate(range(end, len(frames), chunk_size)): # After the window
+        chunk_list.append((rank, chunk_start, min(chunk_start + chunk_size, len(frames))))
+    for rank, chunk_end in enumerate(range(start, 0, -chunk_size)): # Before the window
+        chunk_list.append((rank, max(chunk_end - chunk_size, 0), chunk_end))
+    return start, end, chunk_list
+
+
+def set_zloc_naming(zloc_trans, prefix, suffix):
+    """
+    Stores the prefix & suffix a ZLOC was imported with. "Update Existing" and "Remove Missing" only touch ZLOCs with the same ones.
+    """
+    for attr, value in (("zlocPrefix", prefix), ("zlocSuffix", suffix)):
+        if not mc.attributeQuery(attr, node=zloc_trans, exists=True):
+            mc.addAttr(zloc_trans, longName=attr, dataType="string")
+        mc.setAttr(zloc_trans + "." + attr, value, type="string")
+
+
+def track_checksum(track, frame_offset, flip_u, flip_v, hfa, vfa):
+    """
+    Returns a short string that changes when the track's samples or the import options that shape its keys change.
+    """
+    checksum = zlib.crc32(repr((frame_offset, flip_u, flip_v, hfa, vfa)).encode("utf-8"))
+    for column in (track.frames, track.u, track.v):
+        data = column.tobytes() if hasattr(column, "tobytes") else column.tostring() # Python 3 or 2
+        checksum = zlib.crc32(data, checksum)
+    return "{0:08x}".format(checksum & 0xffffffff)
+
+
 class ZLOC(QtWidgets.QDialog):
     @classmethod
     def maya_main_window(cls):
@@ -166,6 +269,10 @@ class MainTab(QtWidgets.QWidget):
         self.random_color_cb = QtWidgets.QCheckBox()
         self.projection_ray_cb = QtWidgets.QCheckBox()
         self.projection_ray_cb.toggle() # Default is "ON".
+        self.update_cb = QtWidgets.QCheckBox() # Re-import into existing ZLOCs.
+        self.remove_missing_cb = QtWidgets.QCheckBox()
+        self.remove_missing_cb.setEnabled(False) # Only with "Update Existing".
+        self.progressive_cb = QtWidgets.QCheckBox() # Key around the current frame first, the rest in idle time.
 
         #### Rename ####
         self.prefix_lb = QtWidgets.QLabel("Prefix")
@@ -182,9 +289,41 @@ class MainTab(QtWidgets.QWidget):
         #### Manual Import ####
         self.manual_import_btn = QtWidgets.QPushButton("Manual")
 
+        #### Batch Import ####
+        self.batch_import_btn = QtWidgets.QPushButton("Batch")
+
         #### Create Null ####
         self.create_null_btn = QtWidgets.QPushButton("Null")
 
+        #### Export ####
+        self.export_btn = QtWidgets.QPushButton("Export") # Selected locators >> .zloc
+
+        #### Triangulate ####
+        self.triangulate_btn = QtWidgets.QPushButton("Triangulate") # ZLOCs + solved camera >> 3D locators
+
+        #### Live Link ####
+        self.live_cb = QtWidgets.QCheckBox("Live") # Watch "quick.zloc" and update ZLOCs on every write.
+        self.live_folder_le = QtWidgets.QLineEdit()
+        self.live_folder_le.setText(TEMPDIR)
+        self.live_folder_btn = QtWidgets.QPushButton("...")
+        self.live_folder_btn.setMaximumWidth(30)
+        self.live_watcher = QtCore.QFileSystemWatcher(self)
+        self.live_timer = QtCore.QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_DEBOUNCE_MS)
+        self.live_camTrans = None
+        self.live_mtime = None
+
+        #### Progressive Fill ####
+        self.fill_progress_bar = QtWidgets.QProgressBar()
+        self.fill_cancel_btn = QtWidgets.QPushButton("Cancel")
+        self.fill_timer = QtCore.QTimer(self)
+        self.fill_timer.setInterval(0) # Runs whenever Maya is idle.
+        self.fill_queue = [] # [(rank, uuid, frames, u_values, v_values, start, end)], nearest chunks last.
+        self.fill_checksum_dict = {} # {uuid: checksum}. Written when the fill is done.
+        self.fill_edit = None # BulkEdit of the import being filled. Filled keys and checksums are added to it.
+        self.fill_total = 0
+
     def create_layouts(self):
         #### Options ####
         options_flip_Layout = QtWidgets.QHBoxLayout()
@@ -197,6 +336,9 @@ class MainTab(QtWidgets.QWidget):
         options_Layout.addRow("Flip", options_flip_Layout)
         options_Layout.addRow("Random Color", self.random_color_cb)
         options_Layout.addRow("Projection Ray", self.projection_ray_cb)
+        options_Layout.addRow("Update Existing", self.update_cb)
+        options_Layout.addRow("Remove Missing", self.remove_missing_cb)
+        options_Layout.addRow("Progressive", self.progressive_cb)
         options_GroupBox.setLayout(options_Layout)
 
         #### Rename ####
@@ -220,23 +362,73 @@ class MainTab(QtWidgets.QWidget):
         manual_import_Layout.addWidget(self.manual_import_btn)
         manual_import_GroupBox.setLayout(manual_import_Layout)
 
+        #### Batch Import ####
+        batch_import_GroupBox = QtWidgets.QGroupBox("")
+        batch_import_Layout = QtWidgets.QHBoxLayout()
+        batch_import_Layout.addWidget(self.batch_import_btn)
+        batch_import_GroupBox.setLayout(batch_import_Layout)
+
         #### Create Null ####
         create_null_GroupBox = QtWidgets.QGroupBox("")
         create_null_Layout = QtWidgets.QHBoxLayout()
         create_null_Layout.addWidget(self.create_null_btn)
         create_null_GroupBox.setLayout(create_null_Layout)
 
+        #### Export ####
+        export_GroupBox = QtWidgets.QGroupBox("")
+        export_Layout = QtWidgets.QHBoxLayout()
+        export_Layout.addWidget(self.export_btn)
+        export_GroupBox.setLayout(export_Layout)
+
+        #### Triangulate ####
+        triangulate_GroupBox = QtWidgets.QGroupBox("")
+        triangulate_Layout = QtWidgets.QHBoxLayout()
+        triangulate_Layout.addWidget(self.triangulate_btn)
+        triangulate_GroupBox.setLayout(triangulate_Layout)
+
+        #### Live Link ####
+        live_GroupBox = QtWidgets.QGroupBox("Live Link")
+        live_Layout = QtWidgets.QHBoxLayout()
+        live_Layout.addWidget(self.live_cb)
+        live_Layout.addWidget(self.live_folder_le)
+        live_Layout.addWidget(self.live_folder_btn)
+        live_GroupBox.setLayout(live_Layout)
+
+        #### Progressive Fill ####
+        self.fill_GroupBox = QtWidgets.QGroupBox("Filling Keys")
+        fill_Layout = QtWidgets.QHBoxLayout()
+        fill_Layout.addWidget(self.fill_progress_bar)
+        fill_Layout.addWidget(self.fill_cancel_btn)
+        self.fill_GroupBox.setLayout(fill_Layout)
+        self.fill_GroupBox.hide() # Only while filling.
+
         main_Layout = QtWidgets.QVBoxLayout(self)
         main_Layout.addWidget(options_GroupBox)
         main_Layout.addWidget(rename_GroupBox)
         main_Layout.addWidget(quick_import_GroupBox)
         main_Layout.addWidget(manual_import_GroupBox)
+        main_Layout.addWidget(batch_import_GroupBox)
         main_Layout.addWidget(create_null_GroupBox)
+        main_Layout.addWidget(export_GroupBox)
+        main_Layout.addWidget(triangulate_GroupBox)
+        main_Layout.addWidget(live_GroupBox)
+        main_Layout.addWidget(self.fill_GroupBox)
 
     def create_connections(self):
         self.quick_import_btn.clicked.connect(lambda: self.create_zloc("quick"))
         self.manual_import_btn.clicked.connect(lambda: self.create_zloc("manual"))
+        self.batch_import_btn.clicked.connect(self.batch_dialog)
         self.create_null_btn.clicked.connect(lambda: self.create_zloc("null"))
+        self.export_btn.clicked.connect(self.export_dialog)
+        self.triangulate_btn.clicked.connect(self.triangulate_dialog)
+        self.update_cb.toggled.connect(self.remove_missing_cb.setEnabled)
+        self.live_cb.toggled.connect(self.toggle_live)
+        self.live_folder_btn.clicked.connect(self.set_live_folder)
+        self.live_watcher.directoryChanged.connect(lambda _: self.live_timer.start()) # Restarting the timer debounces.
+        self.live_watcher.fileChanged.connect(lambda _: self.live_timer.start())
+        self.live_timer.timeout.connect(self.live_reload)
+        self.fill_timer.timeout.connect(self.fill_step)
+        self.fill_cancel_btn.clicked.connect(self.cancel_fill)
 
     @openCloseChunk
     def create_zloc(self, mode):
@@ -245,32 +437,14 @@ class MainTab(QtWidgets.QWidget):
             return
 
         selCamTrans = mc.ls(selection=True, long=True)[0]
-        selCamShape = mc.listRelatives(selCamTrans, shapes=True, fullPath=True)[0]
-        selCamHFA = mc.camera(selCamShape, q=True, hfa=True)
-        selCamVFA = mc.camera(selCamShape, q=True, vfa=True)
-        selCamUUID = mc.ls(selCamTrans, uuid=True)[0]
-        selCamUUID_underscore = selCamUUID.replace("-", "_")
-        selCamZLocGrp = "zloc_grp_{0}".format(selCamUUID_underscore)
-        selCamZLocProjectionRayGrp = "zloc_projection_ray_grp_{0}".format(selCamUUID_underscore)
-
-        ## Options ##
-        frame_offset = int(self.frame_offset_le.text())
-        flip_u = self.flip_checked("flip_u_cb") # If checked returns -1, else 1.
-        flip_v = self.flip_checked("flip_v_cb") # If checked returns -1, else 1.
-        random_color = self.random_color_cb.isChecked()
-        projection_ray = self.projection_ray_cb.isChecked()
-
-        ## Rename ##
-        prefix = self.get_prefix()
-        suffix = self.get_suffix()
 
         if mode == "quick":
-            path = os.path.join(TEMPDIR, "quick.zloc")
+            path = self.get_quick_path()
             # print(path)
-            # c:\users\<USER>\appdata\local\temp\zloc_quick.txt
+            # c:\users\<USER>\appdata\local\temp\quick.zloc
         elif mode == "manual":
             try:
-                path = mc.fileDialog2(fileFilter='*.zloc', dialogStyle=2, fileMode=1)[0]
+                path = mc.fileDialog2(fileFilter=ZLOC_FILE_FILTER, dialogStyle=2, fileMode=1)[0]
             except:
                 return None
         elif mode == "null":
@@ -281,56 +455,312 @@ class MainTab(QtWidgets.QWidget):
             return
 
         if mode == "null":
-            word_list = ["null_zloc#", "1", "0.000000000000000", "0.000000000000000", "3"]
-            # <name> + # to avoid name collision.
+            track_list = [zloc_file.ZlocTrack("null_zloc#", 3)] # <name> + # to avoid name collision. No keys.
+        else:
+            track_list = zloc_file.read(path) # .zloc(text) or .zlocb(binary, memory-mapped)
+            """
+            print(track_list):
+            [ZlocTrack('zloc01', color=0, samples=3), ZlocTrack('zloc02', color=1, samples=3)]
+            Sorted by name. Each track holds its own frame, U and V arrays.
+            """
+
+        options = self.get_options()
+        if mode == "null":
+            options["update"] = False # Null ZLOCs are always new.
+
+        result = self.import_tracks(selCamTrans, track_list, options)
+        if result is None:
+            return
+        if options["update"]:
+            om.MGlobal.displayInfo("ZLOC: {created} created, {updated} updated, {unchanged} unchanged, {removed} removed.".format(**result))
+
+        # Select Camera in the end
+        mc.select(selCamTrans, replace=True)
+
+    def batch_dialog(self):
+        """
+        Pairs the picked files with the selected cameras, then imports them all with "batch_import".
+        One selected camera: every file goes to it.
+        Several selected cameras: files(sorted by name) go to cameras in selection order. Counts must match.
+        """
+        camTransList = [sel for sel in mc.ls(selection=True, long=True) if mc.listRelatives(sel, shapes=True, type="camera")]
+        if len(camTransList) == 0:
+            om.MGlobal.displayError("Please select one or more cameras.")
+            return
+
+        path_list = mc.fileDialog2(fileFilter=ZLOC_FILE_FILTER, dialogStyle=2, fileMode=4)
+        if not path_list:
+            return
+        path_list = sorted(path_list)
+
+        if len(camTransList) == 1:
+            pair_list = [(path, camTransList[0]) for path in path_list]
+        elif len(camTransList) == len(path_list):
+            pair_list = list(zip(path_list, camTransList))
+        else:
+            om.MGlobal.displayError("Select one camera, or as many cameras as files. {0} cameras, {1} files.".format(len(camTransList), len(path_list)))
+            return
+
+        self.batch_import(pair_list)
+
+    @openCloseChunk
+    def batch_import(self, pair_list):
+        """
+        Imports a list of (path, camera transform) pairs with the current options.
+        Files are parsed concurrently on a thread pool, then all scene edits are applied in one pass(and one undo chunk).
+        Prints parse and apply timings per file.
+        """
+        def parse(path):
+            start = time.time()
+            return zloc_file.read(path), time.time() - start
+
+        path_list = sorted(set(path for path, _ in pair_list))
+        pool = ThreadPool(max(1, min(len(path_list), cpu_count())))
+        try:
+            parse_result_dict = dict(zip(path_list, pool.map(parse, path_list)))
+        finally:
+            pool.close()
+
+        options = self.get_options()
+        report = ["ZLOC Batch Import", "{0:>8} {1:>8}  {2}".format("Parse(s)", "Apply(s)", "File >> Camera")]
+        for path, camTrans in pair_list:
+            track_list, parse_time = parse_result_dict[path]
+            start = time.time()
+            result = self.import_tracks(camTrans, track_list, options)
+            apply_time = time.time() - start
+            if result is None:
+                om.MGlobal.displayError("Stopped at {0}. Nothing after it was imported.".format(path))
+                break
+            report.append("{0:8.3f} {1:8.3f}  {2} >> {3}".format(parse_time, apply_time, path, camTrans))
+        print("\n".join(report))
+
+        mc.select([camTrans for _, camTrans in pair_list], replace=True)
+
+    def export_dialog(self):
+        """
+        Select the camera first, then the locators(any transforms) to export.
+        """
+        selList = mc.ls(selection=True, long=True, transforms=True)
+        if len(selList) < 2 or not mc.listRelatives(selList[0], shapes=True, type="camera"):
+            om.MGlobal.displayError("Please select a camera, then the locators to export.")
+            return
+
+        try:
+            path = mc.fileDialog2(fileFilter=ZLOC_FILE_FILTER, dialogStyle=2, fileMode=0)[0]
+        except:
+            return None
+
+        start = time.time()
+        track_list = self.export_tracks(selList[0], selList[1:], self.get_options())
+        zloc_file.write(path, track_list)
+        om.MGlobal.displayInfo("ZLOC Export: {0} tracks, {1} samples to {2} in {3:.2f}s.".format(
+            len(track_list), sum(len(track) for track in track_list), path, time.time() - start))
+
+    def export_tracks(self, camTrans, locTransList, options):
+        """
+        Projects each locator through the camera for the playback range, the inverse of "import_tracks".
+        Camera, locators and focal length are sampled in one pass, then projected with the ZLOC import conventions.
+        "Frame Offset" is subtracted and "Flip" is applied, so importing the result with the same options gives the locators back.
+        Frames where a locator is behind the camera are left out.
+        Returns a list of ZlocTrack.
+        """
+        camShape = mc.listRelatives(camTrans, shapes=True, fullPath=True)[0]
+        start_frame = int(mc.playbackOptions(q=True, minTime=True))
+        end_frame = int(mc.playbackOptions(q=True, maxTime=True))
+        frames = list(range(start_frame, end_frame + 1))
+
+        plug_list = [bake.get_plug(camTrans + '.worldInverseMatrix[0]'), bake.get_plug(camShape + '.focalLength')]
+        plug_list += [bake.get_plug(locTrans + '.worldMatrix[0]') for locTrans in locTransList]
+        sample_list = bake.sample_plugs(plug_list, frames)
+        cam_inverse_matrices, focal_lengths = sample_list[:2]
+
+        file_frames = [frame - options["frame_offset"] for frame in frames]
+        track_list = []
+        for locTrans, point_matrices in zip(locTransList, sample_list[2:]):
+            track = zloc_file.ZlocTrack(locTrans.rsplit("|", 1)[-1], self.get_locator_color(locTrans))
+            track.frames, track.u, track.v = projection.project_samples(file_frames, cam_inverse_matrices, focal_lengths, point_matrices)
+            if options["flip_u"] == -1:
+                track.u = array("d", [-u for u in track.u])
+            if options["flip_v"] == -1:
+                track.v = array("d", [-v for v in track.v])
+            track_list.append(track)
+        return track_list
+
+    def triangulate_dialog(self):
+        if self.one_camera_selected() == False: # Select "One" "Camera" type object.
+            om.MGlobal.displayError("Please select a camera.")
+            return
+
+        selCamTrans = mc.ls(selection=True, long=True)[0]
+        self.triangulate_zlocs(selCamTrans)
+
+    @openCloseChunk
+    def triangulate_zlocs(self, selCamTrans):
+        """
+        Triangulates every ZLOC of the camera into a "<ZLOC>_tri" locator under "zloc_tri_grp_<uuid>".
+        Each "U" & "V" key is a ray from the camera. The point closest to all rays of a ZLOC is its 3D position.
+        The camera is sampled once for all key frames of all ZLOCs, then every ZLOC is solved from those samples.
+        "residual" is the RMS ray distance(scene units), "reprojectionError" the RMS 2D error(pixels).
+        """
+        start = time.time()
+
+        selCamShape = mc.listRelatives(selCamTrans, shapes=True, fullPath=True)[0]
+        selCamUUID_underscore = mc.ls(selCamTrans, uuid=True)[0].replace("-", "_")
+        selCamZLocGrp = "zloc_grp_{0}".format(selCamUUID_underscore)
+        selCamZLocTriGrp = "zloc_tri_grp_{0}".format(selCamUUID_underscore)
+
+        existing_zloc_dict = self.get_existing_zlocs(selCamZLocGrp)
+        if not existing_zloc_dict:
+            om.MGlobal.displayError("No ZLOCs found on {0}.".format(selCamTrans))
+            return
+
+        # Keys of every ZLOC. One query per curve.
+        key_dict = {}
+        for zloc, zlocTrans in sorted(existing_zloc_dict.items()):
+            frames = mc.keyframe(zlocTrans + '.U', q=True, timeChange=True) or []
+            u_values = mc.keyframe(zlocTrans + '.U', q=True, valueChange=True) or []
+            v_dict = dict(zip(mc.keyframe(zlocTrans + '.V', q=True, timeChange=True) or [],
+                              mc.keyframe(zlocTrans + '.V', q=True, valueChange=True) or []))
+            samples = [(frame, u, v_dict[frame]) for frame, u in zip(frames, u_values) if frame in v_dict]
+            key_dict[zloc] = samples
+
+        # Camera at every key frame, in one pass.
+        frame_list = sorted(set(frame for samples in key_dict.values() for frame, _, _ in samples))
+        plug_list = [bake.get_plug(selCamTrans + '.worldMatrix[0]'), bake.get_plug(selCamTrans + '.worldInverseMatrix[0]'),
+                     bake.get_plug(selCamShape + '.focalLength'), bake.get_plug(selCamShape + '.hfa'), bake.get_plug(selCamShape + '.vfa')]
+        cam_matrices, cam_inverse_matrices, focal_lengths, hfa_list, vfa_list = bake.sample_plugs(plug_list, frame_list)
+        frame_index_dict = dict((frame, i) for i, frame in enumerate(frame_list))
+
+        width = mc.getAttr("defaultResolution.width")
+        if not mc.objExists(selCamZLocTriGrp):
+            mc.group(name=selCamZLocTriGrp, empty=True)
+
+        report = ["ZLOC Triangulate", "{0:>12} {1:>12} {2:>6}  {3}".format("Residual", "Reproj(px)", "Keys", "ZLOC")]
+        solved_count = 0
+        for zloc, samples in sorted(key_dict.items()):
+            zlocTrans = existing_zloc_dict[zloc]
+            index_list = [frame_index_dict[frame] for frame, _, _ in samples]
+            offset_u = self.get_offset_samples(zlocTrans, 'OffsetU', [frame for frame, _, _ in samples])
+            offset_v = self.get_offset_samples(zlocTrans, 'OffsetV', [frame for frame, _, _ in samples])
+
+            # Key values are U & V divided by hfa & vfa. Film back position in inches:
+            film_u = [(u + offset) * hfa_list[i] for (_, u, _), offset, i in zip(samples, offset_u, index_list)]
+            film_v = [(v + offset) * vfa_list[i] for (_, _, v), offset, i in zip(samples, offset_v, index_list)]
+            point, residual, error_px = triangulation.triangulate_film_track(
+                film_u, film_v,
+                [cam_matrices[i] for i in index_list], [cam_inverse_matrices[i] for i in index_list], [focal_lengths[i] for i in index_list],
+                [width / hfa_list[i] for i in index_list]) # inch >> pixel, with each sample's filmback
+
+            if point is None: # No parallax, or behind the camera.
+                report.append("{0:>12} {1:>12} {2:6d}  {3}".format("-", "-", len(samples), zloc))
+                continue
+            self.create_tri_loc(zlocTrans, selCamZLocTriGrp, point, residual, error_px)
+            report.append("{0:12.6f} {1:12.4f} {2:6d}  {3}".format(residual, error_px, len(samples), zloc))
+            solved_count += 1
+        print("\n".join(report))
+
+        om.MGlobal.displayInfo("ZLOC Triangulate: {0} of {1} solved in {2:.2f}s. See Script Editor for errors.".format(
+            solved_count, len(key_dict), time.time() - start))
+        mc.select(selCamZLocTriGrp, replace=True)
+
+    def get_offset_samples(self, zlocTrans, attr, frames):
+        # "OffsetU"/"OffsetV" at each frame. Usually static, so the curve is only evaluated when it is keyed.
+        if not mc.keyframe(zlocTrans + '.' + attr, q=True, keyframeCount=True):
+            return [mc.getAttr(zlocTrans + '.' + attr)] * len(frames)
+        curve = oma2.MFnAnimCurve(bake.get_plug(zlocTrans + '.' + attr))
+        uiUnit = om2.MTime.uiUnit()
+        return [curve.evaluate(om2.MTime(frame, uiUnit)) for frame in frames]
+
+    def create_tri_loc(self, zlocTrans, triGrp, point, residual, reprojection_error):
+        tri_loc = zlocTrans.rsplit("|", 1)[-1] + "_tri"
+        tri_loc_long = "{0}|{1}".format(mc.ls(triGrp, long=True)[0], tri_loc)
+        if mc.objExists(tri_loc_long): # Triangulated before. Move it.
+            tri_loc = tri_loc_long
         else:
-            with open(path,'r') as f:
-                """
-                print(f):
-                zloc01 1 0.100000000000000 0.100000000000000 0
-                zloc01 2 0.200000000000000 0.200000000000000 0
-                zloc01 3 0.300000000000000 0.300000000000000 0
-                zloc02 1 -0.100000000000000 -0.100000000000000 1
-                zloc02 2 -0.200000000000000 -0.200000000000000 1
-                zloc02 3 -0.300000000000000 -0.300000000000000 1
-                """
-                # About ZLOC Format
-                # <name> <frame> <U> <V> <3DE4_color_index>
-
-                word_list = [word for line in f for word in line.split()]
-                """
-                print(word_list):
-                ["zloc01", "1", "0.100000000000000", "0.100000000000000", "0",
-                 "zloc01", "2", "0.200000000000000", "0.200000000000000", "0",
-                 "zloc01", "3", "0.300000000000000", "0.300000000000000", "0",
-                 "zloc02", "1", "-0.100000000000000", "-0.100000000000000", "1",
-                 "zloc02", "2", "-0.200000000000000", "-0.200000000000000", "1",
-                 "zloc02", "3", "-0.300000000000000", "-0.300000000000000", "1"]
-                """
-        zloc_list = sorted(set(zip(word_list[0::5], word_list[4::5])))
-        # Zip is for pairing every "0"th(Name) and "4"th(3DE4 Color Index) item.
-        # Set is for removing dulplicates.
-        # Sorted is for reordering items in alphabetical and numerical order.
-        """
-        print(zloc_list):
-        [("zloc01","0"), ("zloc02","1")]
-        """
-        group_word_by_five_list = [word_list[i:i+5] for i in range(0, len(word_list), 5)]
-        # "group_word_by_five_list" Result:
-        """
-        [["zloc01", "1", "0.100000000000000", "0.100000000000000", "0"],
-         ["zloc01", "2", "0.200000000000000", "0.200000000000000", "0"],
-         ["zloc01", "3", "0.300000000000000", "0.300000000000000", "0"],
-         ["zloc02", "1", "-0.100000000000000", "-0.100000000000000", "1"],
-         ["zloc02", "2", "-0.200000000000000", "-0.200000000000000", "1"],
-         ["zloc02", "3", "-0.300000000000000", "-0.300000000000000", "1"]]
+            tri_loc = mc.spaceLocator(name=tri_loc)[0]
+            mc.addAttr(tri_loc, longName='residual', attributeType='double')
+            mc.addAttr(tri_loc, longName='reprojectionError', attributeType='double')
+            mc.setAttr(tri_loc + '.residual', channelBox=True)
+            mc.setAttr(tri_loc + '.reprojectionError', channelBox=True)
+            zlocShape = mc.listRelatives(zlocTrans, shapes=True, fullPath=True)[0]
+            tri_loc_shape = mc.listRelatives(tri_loc, shapes=True, fullPath=True)[0]
+            mc.setAttr(tri_loc_shape + '.overrideEnabled', 1)
+            mc.setAttr(tri_loc_shape + '.overrideColor', mc.getAttr(zlocShape + '.overrideColor')) # Same Color as ZLOC.
+            tri_loc = mc.parent(tri_loc, triGrp)[0]
+        mc.xform(tri_loc, worldSpace=True, translation=point)
+        mc.setAttr(tri_loc + '.residual', residual)
+        mc.setAttr(tri_loc + '.reprojectionError', reprojection_error)
+
+    def get_locator_color(self, locTrans):
+        # 3DE4 color index of the locator's override color. Red if it has none.
+        for locShape in mc.listRelatives(locTrans, shapes=True, fullPath=True) or []:
+            if mc.getAttr(locShape + '.overrideEnabled'):
+                return self.get_index_from_color(mc.getAttr(locShape + '.overrideColor'))
+        return 0
+
+    def get_options(self):
+        options = {
+            "frame_offset": int(self.frame_offset_le.text()),
+            "flip_u": self.flip_checked("flip_u_cb"), # If checked returns -1, else 1.
+            "flip_v": self.flip_checked("flip_v_cb"), # If checked returns -1, else 1.
+            "random_color": self.random_color_cb.isChecked(),
+            "projection_ray": self.projection_ray_cb.isChecked(),
+            "update": self.update_cb.isChecked(),
+            "remove_missing": self.update_cb.isChecked() and self.remove_missing_cb.isChecked(),
+            "progressive": self.progressive_cb.isChecked(),
+            "prefix": self.get_prefix(),
+            "suffix": self.get_suffix(),
+        }
+        return options
+
+    def import_tracks(self, selCamTrans, track_list, options):
         """
+        Creates a ZLOC for each track under the camera's ZLOC Group.
+
+        If options["update"] is on, tracks are matched by name with the ZLOCs already in the ZLOC Group.
+        Only ZLOCs whose samples(or import options) changed get new keys. Unknown tracks are created.
+        If options["remove_missing"] is also on, ZLOCs that are not in "track_list" are deleted.
+        If options["progressive"] is on, only the keys around the current frame are set here. The rest are filled in idle time.
+
+        Returns {"created": int, "updated": int, "unchanged": int, "removed": int}, or None on name collision.
+        """
+        selCamShape = mc.listRelatives(selCamTrans, shapes=True, fullPath=True)[0]
+        selCamHFA = mc.camera(selCamShape, q=True, hfa=True)
+        selCamVFA = mc.camera(selCamShape, q=True, vfa=True)
+        selCamUUID = mc.ls(selCamTrans, uuid=True)[0]
+        selCamUUID_underscore = selCamUUID.replace("-", "_")
+        selCamZLocGrp = "zloc_grp_{0}".format(selCamUUID_underscore)
+        selCamZLocProjector = "zloc_projector_{0}".format(selCamUUID_underscore)
+        selCamZLocProjectionRayGrp = "zloc_projection_ray_grp_{0}".format(selCamUUID_underscore)
+        selCamZLocRays = "zloc_rays_{0}".format(selCamUUID_underscore)
+
+        ## Options ##
+        frame_offset = options["frame_offset"]
+        flip_u = options["flip_u"]
+        flip_v = options["flip_v"]
+        random_color = options["random_color"]
+        projection_ray = options["projection_ray"]
+
+        ## Rename ##
+        prefix = options["prefix"]
+        suffix = options["suffix"]
+
+        result = {"created": 0, "updated": 0, "unchanged": 0, "removed": 0}
+
+        # Finish the keys of the last progressive import first, so they do not land on top of these.
+        self.flush_fill()
+
+        # ZLOCs already in the ZLOC Group, by name. Only used when updating.
+        existing_zloc_dict = {}
+        if options["update"]:
+            existing_zloc_dict = self.get_existing_zlocs(selCamZLocGrp, (prefix, suffix), [track.name for track in track_list])
 
         # Check for name collision
-        for zloc, _ in zloc_list:
-            if mc.objExists(prefix + zloc + suffix):
+        for track in track_list:
+            zloc = prefix + track.name + suffix
+            if zloc not in existing_zloc_dict and mc.objExists(zloc):
                 om.MGlobal.displayError("Name collision detected. Please rename by using prefix and suffix.")
-                return
+                return None
 
         # Create ZLOC Group
         if mc.objExists(selCamZLocGrp): # ZLOC Group Exists
@@ -340,6 +770,16 @@ class MainTab(QtWidgets.QWidget):
             mc.parentConstraint(selCamTrans, selCamZLocGrp, maintainOffset=False)
             mc.scaleConstraint(selCamTrans, selCamZLocGrp, maintainOffset=True)
 
+        # Create ZLOC Projector. One node computes every ZLOC position of this camera.
+        nodes.load_plugin()
+        if not mc.objExists(selCamZLocProjector):
+            mc.createNode("zlocProjector", name=selCamZLocProjector)
+            mc.connectAttr(selCamShape + '.hfa', selCamZLocProjector + '.hfa')
+            mc.connectAttr(selCamShape + '.vfa', selCamZLocProjector + '.vfa')
+            mc.connectAttr(selCamShape + '.fl', selCamZLocProjector + '.fl')
+        track_index_list = mc.getAttr(selCamZLocProjector + '.track', multiIndices=True) or []
+        track_index = max(track_index_list) + 1 if track_index_list else 0
+
         # Create ZLOC Projection Ray Group
         if projection_ray: # If Projection Ray checkbox is checked
             if mc.objExists(selCamZLocProjectionRayGrp): # ZLOC Projection Ray Group Exists
@@ -349,62 +789,329 @@ class MainTab(QtWidgets.QWidget):
                 mc.hide(selCamZLocProjectionRayGrp) # Hide ZLOC Projection Ray Group.
                 mc.parentConstraint(selCamTrans, selCamZLocProjectionRayGrp, maintainOffset=False)
                 mc.scaleConstraint(selCamTrans, selCamZLocProjectionRayGrp, maintainOffset=True)
+            # Create ZLOC Rays. One node draws every Projection Ray of this camera.
+            if not mc.objExists(selCamZLocRays):
+                zlocRaysTrans = mc.createNode("transform", name=selCamZLocRays, parent=selCamZLocProjectionRayGrp)
+                mc.createNode("zlocRays", name=selCamZLocRays + "Shape", parent=zlocRaysTrans)
+
+        with bulk_edit.BulkEdit() as edit: # Every curve and key below is one undo step.
+            for track in track_list:
+                checksum = track_checksum(track, frame_offset, flip_u, flip_v, selCamHFA, selCamVFA)
+
+                # Update ZLOC
+                zlocTrans = existing_zloc_dict.pop(prefix + track.name + suffix, None)
+                if zlocTrans is not None:
+                    if not mc.attributeQuery('zlocPrefix', node=zlocTrans, exists=True): # Imported before the naming was stored.
+                        set_zloc_naming(zlocTrans, prefix, suffix)
+                    if not mc.attributeQuery('zlocChecksum', node=zlocTrans, exists=True): # Imported before "Update Existing" existed.
+                        mc.addAttr(zlocTrans, longName='zlocChecksum', dataType='string')
+                    elif mc.getAttr(zlocTrans + '.zlocChecksum') == checksum:
+                        result["unchanged"] += 1
+                        continue
+                    frames = [frame + frame_offset for frame in track.frames]
+                    u_values = [u / selCamHFA * flip_u for u in track.u]
+                    v_values = [v / selCamVFA * flip_v for v in track.v]
+                    self.key_zloc(zlocTrans, frames, u_values, v_values, checksum, options["progressive"], edit)
+                    result["updated"] += 1
+                    continue
+
+                # Create ZLOC
+                zlocTrans = nodes.create_screen_locator(prefix + track.name + suffix, ZLOC_PIXEL_SIZE)
+                zlocShape = mc.listRelatives(zlocTrans, shapes=True, fullPath=True)[0]
+
+                # Set ZLOC Color
+                if random_color: # If Random Color checkbox is checked
+                    zloc_color = random.choice(self.colorIndexList) # Pick a random index from "colorIndexList"
+                else:
+                    zloc_color = self.get_color_from_index(track.color)
+                mc.setAttr(zlocShape + '.overrideEnabled', 1) # Enable Color Override
+                mc.setAttr(zlocShape + '.overrideColor', zloc_color) # Set Color
+
+                # Add & Set Attributes
+                mc.addAttr(zlocTrans, longName='U', attributeType='double', defaultValue=0)
+                mc.addAttr(zlocTrans, longName='V', attributeType='double', defaultValue=0)
+                mc.addAttr(zlocTrans, longName='OffsetU', attributeType='double', defaultValue=0) # Simillar to "Animation Layer".
+                mc.addAttr(zlocTrans, longName='OffsetV', attributeType='double', defaultValue=0) # Simillar to "Animation Layer".
+                mc.addAttr(zlocTrans, longName='zlocChecksum', dataType='string') # Samples & options of the last import. Used by "Update Existing".
+                set_zloc_naming(zlocTrans, prefix, suffix)
+                mc.setAttr(zlocTrans + '.U', keyable=True)
+                mc.setAttr(zlocTrans + '.V', keyable=True)
+                mc.setAttr(zlocTrans + '.OffsetU', keyable=True)
+                mc.setAttr(zlocTrans + '.OffsetV', keyable=True)
+                mc.setAttr(zlocTrans + '.tz', -10)
+
+                # Set Keyframe for "U" & "V" attributes. One batch per curve.
+                frames = [frame + frame_offset for frame in track.frames]
+                u_values = [u / selCamHFA * flip_u for u in track.u]
+                v_values = [v / selCamVFA * flip_v for v in track.v]
+                self.key_zloc(zlocTrans, frames, u_values, v_values, checksum, options["progressive"], edit)
+
+                # Projection. Same math as the old expressions:
+                # tx = hfa * 2.54 * tz / (fl / 10) * -1 * (U + OffsetU)
+                # ty = vfa * 2.54 * tz / (fl / 10) * -1 * (V + OffsetV)
+                projectorTrack = "{0}.track[{1}]".format(selCamZLocProjector, track_index)
+                projectorOut = "{0}.outTranslate[{1}]".format(selCamZLocProjector, track_index)
+                mc.connectAttr(zlocTrans + '.U', projectorTrack + '.trackU')
+                mc.connectAttr(zlocTrans + '.V', projectorTrack + '.trackV')
+                mc.connectAttr(zlocTrans + '.OffsetU', projectorTrack + '.trackOffsetU')
+                mc.connectAttr(zlocTrans + '.OffsetV', projectorTrack + '.trackOffsetV')
+                mc.connectAttr(zlocTrans + '.tz', projectorTrack + '.trackDepth')
+                mc.connectAttr(projectorOut + '.outTranslateX', zlocTrans + '.tx')
+                mc.connectAttr(projectorOut + '.outTranslateY', zlocTrans + '.ty')
+
+                mc.parent(zlocTrans, selCamZLocGrp, relative=True) # Parent ZLOC to ZLOC Group
+
+                # Projection Ray
+                if projection_ray: # If Projection Ray checkbox is checked.
+                    mc.connectAttr(zlocTrans + '.translate', "{0}Shape.point[{1}]".format(selCamZLocRays, track_index)) # Ray goes through ZLOC.
+                    mc.setAttr("{0}Shape.color[{1}]".format(selCamZLocRays, track_index), *mc.colorIndex(zloc_color, q=True)) # Same Color as ZLOC.
+
+                track_index += 1
+                result["created"] += 1
+
+            if self.fill_queue: # Filled in idle time, but undone(and redone) with this import.
+                self.fill_edit = edit
+                edit.defer(lambda: self.fill_keys(float("inf")))
+
+        # Remove ZLOCs that are not in the file anymore.
+        if options["remove_missing"]:
+            for zlocTrans in existing_zloc_dict.values():
+                self.delete_zloc(zlocTrans)
+                result["removed"] += 1
+
+        self.start_fill()
+
+        return result
+
+    def key_zloc(self, zlocTrans, frames, u_values, v_values, checksum, progressive, edit):
+        """
+        Keys "U" & "V" of a ZLOC and stores "checksum".
+        When "progressive", only the keys within PROGRESSIVE_WINDOW frames of the current frame are set now.
+        The rest are queued for "fill_step", and the checksum is stored once they are all set.
+        Until then the ZLOC counts as changed, so "Update Existing" rewrites a cancelled one.
+        Keys set now go through "edit"(bulk_edit.BulkEdit). Filled keys and the checksum are added to it by "fill_keys".
+        """
+        if not progressive or len(frames) <= 2 * PROGRESSIVE_WINDOW + 1:
+            set_keys(zlocTrans, "U", frames, u_values, edit)
+            set_keys(zlocTrans, "V", frames, v_values, edit)
+            mc.setAttr(zlocTrans + '.zlocChecksum', checksum, type="string")
+            return
 
-        for zloc, tde4_color_index in zloc_list:
-            # Create ZLOC
-            zlocTrans = mc.spaceLocator(name=prefix + zloc + suffix)[0]
-            zlocShape = mc.listRelatives(zlocTrans, shapes=True, fullPath=True)[0]
+        start, end, chunk_list = split_progressive(frames, mc.currentTime(q=True), PROGRESSIVE_WINDOW, PROGRESSIVE_CHUNK_SIZE)
+        set_keys(zlocTrans, "U", frames[start:end], u_values[start:end], edit)
+        set_keys(zlocTrans, "V", frames[start:end], v_values[start:end], edit)
+        mc.setAttr(zlocTrans + '.zlocChecksum', "", type="string")
 
-            # Set ZLOC Color
-            if random_color: # If Random Color checkbox is checked
-                zloc_color = random.choice(self.colorIndexList) # Pick a random index from "colorIndexList"
-            else:
-                zloc_color = self.get_color_from_index(tde4_color_index)
-            mc.setAttr(zlocShape + '.overrideEnabled', 1) # Enable Color Override
-            mc.setAttr(zlocShape + '.overrideColor', zloc_color) # Set Color
-
-            # Add & Set Attributes
-            mc.addAttr(zlocTrans, longName='U', attributeType='double', defaultValue=0)
-            mc.addAttr(zlocTrans, longName='V', attributeType='double', defaultValue=0)
-            mc.addAttr(zlocTrans, longName='OffsetU', attributeType='double', defaultValue=0) # Simillar to "Animation Layer".
-            mc.addAttr(zlocTrans, longName='OffsetV', attributeType='double', defaultValue=0) # Simillar to "Animation Layer".
-            mc.setAttr(zlocTrans + '.U', keyable=True)
-            mc.setAttr(zlocTrans + '.V', keyable=True)
-            mc.setAttr(zlocTrans + '.OffsetU', keyable=True)
-            mc.setAttr(zlocTrans + '.OffsetV', keyable=True)
-            mc.setAttr(zlocTrans + '.sx', 0.1)
-            mc.setAttr(zlocTrans + '.sy', 0.1)
-            mc.setAttr(zlocTrans + '.sz', 0.001)
-            mc.setAttr(zlocTrans + '.tz', -10)
-
-            # Expressions
-            mc.expression(s="{0}.tx = {1}.hfa * 2.54 * {0}.tz / ({1}.fl / 10) * -1 * ({0}.U + {0}.OffsetU);".format(zlocTrans, selCamTrans), object=zlocTrans, alwaysEvaluate=True, unitConversion='all')
-            mc.expression(s="{0}.ty = {1}.vfa * 2.54 * {0}.tz / ({1}.fl / 10) * -1 * ({0}.V + {0}.OffsetV);".format(zlocTrans, selCamTrans), object=zlocTrans, alwaysEvaluate=True, unitConversion='all')
-
-            mc.parent(zlocTrans, selCamZLocGrp, relative=True) # Parent ZLOC to ZLOC Group
-
-            # Projection Ray
-            if projection_ray: # If Projection Ray checkbox is checked.
-                projectionRayTrans = mc.curve(name= zlocTrans + "_projectionRay", degree=1, point=[(0,0,0),(0,0,-1000)]) # Create a Nurbs Curve. Length is 1000.
-                projectionRayShape = mc.listRelatives(projectionRayTrans, shapes=True, fullPath=True)[0] # Get Shape Node's name.
-
-                # Set Projection Ray Color
-                mc.setAttr(projectionRayShape + '.overrideEnabled', 1) # Enable Color Override.
-                mc.setAttr(projectionRayShape + '.overrideColor', zloc_color) # Set Color. Same Color as ZLOC.
-
-                mc.aimConstraint(zlocTrans, projectionRayTrans, aimVector=[0.0, 0.0, -1.0], maintainOffset=False) # Aim Projection Ray to ZLOC.
-
-                mc.parent(projectionRayTrans, selCamZLocProjectionRayGrp, relative=True)
-
-        if mode != "null": # If mode is "null", skip this loop.
-            # Set Keyframe for each ZLOC's "U" & "V" attributes.
-            for i in range(len(group_word_by_five_list)):
-                mc.setKeyframe(prefix + group_word_by_five_list[i][0] + suffix, t=int(group_word_by_five_list[i][1]) + frame_offset, v=float(group_word_by_five_list[i][2])/selCamHFA*flip_u, at='U')
-                mc.setKeyframe(prefix + group_word_by_five_list[i][0] + suffix, t=int(group_word_by_five_list[i][1]) + frame_offset, v=float(group_word_by_five_list[i][3])/selCamVFA*flip_v, at='V')
+        zlocUUID = mc.ls(zlocTrans, uuid=True)[0] # Survives parenting and renaming.
+        self.fill_checksum_dict[zlocUUID] = checksum
+        for rank, chunk_start, chunk_end in chunk_list:
+            self.fill_queue.append((rank, zlocUUID, frames, u_values, v_values, chunk_start, chunk_end))
 
-        # Select Camera in the end
-        mc.select(selCamTrans, replace=True)
+    def start_fill(self):
+        if not self.fill_queue or self.fill_timer.isActive():
+            return
+        self.fill_queue.sort(key=lambda chunk: -chunk[0]) # Nearest chunks last, so "pop" takes them first. Stable, so tracks take turns.
+        self.fill_total = len(self.fill_queue)
+        self.fill_progress_bar.setRange(0, self.fill_total)
+        self.fill_progress_bar.setValue(0)
+        self.fill_GroupBox.show()
+        self.fill_timer.start()
+
+    def fill_keys(self, deadline):
+        """
+        Sets queued keys until "deadline". Once every key is set, the checksums are stored and the import's edit is finished.
+        Everything goes into the import's BulkEdit, so it is undone(and redone) with the import.
+        Touches no widget, so the import's undo can run it even if the window is gone.
+        """
+        while self.fill_queue and time.time() < deadline:
+            _, zlocUUID, frames, u_values, v_values, start, end = self.fill_queue.pop()
+            zlocTrans = mc.ls(zlocUUID, long=True)
+            if not zlocTrans: # Deleted since the import.
+                continue
+            add_keys(zlocTrans[0], "U", frames[start:end], u_values[start:end], self.fill_edit)
+            add_keys(zlocTrans[0], "V", frames[start:end], v_values[start:end], self.fill_edit)
+
+        if self.fill_queue or self.fill_edit is None:
+            return
+        for zlocUUID, checksum in self.fill_checksum_dict.items():
+            zlocTrans = mc.ls(zlocUUID, long=True)
+            if zlocTrans:
+                self.fill_edit.set_string(bake.get_plug(zlocTrans[0] + '.zlocChecksum'), checksum)
+        self.fill_checksum_dict = {}
+        self.fill_edit.defer(None)
+        self.fill_edit = None
+
+    def fill_step(self, deadline=None):
+        """
+        Sets queued keys until "deadline"(PROGRESSIVE_TICK_MS from now by default). Called by "fill_timer" whenever Maya is idle.
+        """
+        if deadline is None:
+            deadline = time.time() + PROGRESSIVE_TICK_MS / 1000.0
+        self.fill_keys(deadline)
+
+        self.fill_progress_bar.setValue(self.fill_total - len(self.fill_queue))
+        if not self.fill_queue: # Done here, or by undoing the import.
+            self.fill_timer.stop()
+            self.fill_GroupBox.hide()
+
+    def flush_fill(self):
+        # Sets every queued key right away.
+        if self.fill_queue:
+            self.fill_step(deadline=float("inf"))
+
+    def cancel_fill(self):
+        """
+        Stops filling. ZLOCs keep the keys set so far, and "Update Existing" rewrites them on the next import.
+        """
+        self.fill_timer.stop()
+        self.fill_queue = []
+        self.fill_checksum_dict = {}
+        if self.fill_edit is not None:
+            self.fill_edit.defer(None) # Undo takes back the keys set so far.
+            self.fill_edit = None
+        self.fill_GroupBox.hide()
+        mc.warning("ZLOC: Progressive import cancelled. Re-import with \"Update Existing\" to finish the keys.")
+
+    def get_existing_zlocs(self, zlocGrp, naming=None, track_name_list=()):
+        """
+        Returns {name: long name} of the ZLOCs in "zlocGrp".
+        With "naming"((prefix, suffix)), only the ZLOCs that were imported with that prefix and suffix(see "set_zloc_naming").
+        ZLOCs imported before the naming was stored are only returned if they are named after a track in "track_name_list",
+        so they are updated but never removed as missing.
+        """
+        existing_zloc_dict = {}
+        if not mc.objExists(zlocGrp):
+            return existing_zloc_dict
+
+        if naming is not None:
+            prefix, suffix = naming
+            legacy_zloc_set = set(prefix + name + suffix for name in track_name_list)
+
+        for zlocTrans in mc.listRelatives(zlocGrp, children=True, type="transform", fullPath=True) or []:
+            if not mc.attributeQuery("U", node=zlocTrans, exists=True):
+                continue
+            zloc = zlocTrans.rsplit("|", 1)[-1]
+            if naming is not None:
+                if mc.attributeQuery("zlocPrefix", node=zlocTrans, exists=True):
+                    if (mc.getAttr(zlocTrans + ".zlocPrefix") or "", mc.getAttr(zlocTrans + ".zlocSuffix") or "") != (prefix, suffix):
+                        continue
+                elif zloc not in legacy_zloc_set:
+                    continue
+            existing_zloc_dict[zloc] = zlocTrans
+        return existing_zloc_dict
+
+    def delete_zloc(self, zlocTrans):
+        """
+        Deletes a ZLOC and its elements on the camera's "zlocProjector" and "zlocRays", so they stop computing and drawing it.
+        """
+        for attr, nodeType in (("U", "zlocProjector"), ("translate", "zlocRays")):
+            for plug in mc.listConnections(zlocTrans + '.' + attr, source=False, destination=True, plugs=True, type=nodeType) or []:
+                element = plug.rsplit(".", 1)[0] if nodeType == "zlocProjector" else plug # "track[i].trackU" >> "track[i]"
+                mc.removeMultiInstance(element, b=True)
+        for plug in mc.listConnections(zlocTrans + '.tx', source=True, destination=False, plugs=True, type="zlocProjector") or []:
+            mc.removeMultiInstance(plug.rsplit(".", 1)[0], b=True) # "outTranslate[i].outTranslateX" >> "outTranslate[i]"
+        mc.delete(zlocTrans)
+
+    def set_live_folder(self):
+        folder = mc.fileDialog2(dialogStyle=2, fileMode=3, startingDirectory=self.live_folder_le.text())
+        if not folder:
+            return
+        self.live_folder_le.setText(folder[0])
+        if self.live_cb.isChecked():
+            self.toggle_live(True) # Watch the new folder.
 
+    def toggle_live(self, checked):
+        """
+        Starts or stops watching "quick.zloc"("quick.zlocb") in the Live Link folder.
+        Each new write updates the ZLOCs of the camera that was selected when Live was turned on, like "Update Existing".
+        """
+        watched = self.live_watcher.files() + self.live_watcher.directories()
+        if watched:
+            self.live_watcher.removePaths(watched)
+        self.live_timer.stop()
+        self.live_camTrans = None
+
+        if not checked:
+            return
+
+        folder = self.live_folder_le.text()
+        if self.one_camera_selected() == False or not os.path.isdir(folder):
+            om.MGlobal.displayError("Please select a camera and an existing Live Link folder.")
+            self.live_cb.setChecked(False)
+            return
+
+        self.live_camTrans = mc.ls(selection=True, long=True)[0]
+        self.live_mtime = self.get_live_mtime()
+        self.watch_live_paths()
+        om.MGlobal.displayInfo("ZLOC Live Link: watching {0} for {1}.".format(folder, self.live_camTrans))
+
+    def watch_live_paths(self):
+        # Files replaced by rename drop out of the watcher, so they are added again after every change.
+        # The folder itself catches files that did not exist yet.
+        folder = self.live_folder_le.text()
+        path_list = [folder] + [os.path.join(folder, name) for name in ("quick.zloc", "quick.zlocb")]
+        watched = self.live_watcher.files() + self.live_watcher.directories()
+        path_list = [path for path in path_list if os.path.exists(path) and path not in watched]
+        if path_list:
+            self.live_watcher.addPaths(path_list)
+
+    def get_live_mtime(self):
+        path = self.get_quick_path(self.live_folder_le.text())
+        return os.path.getmtime(path) if os.path.exists(path) else None
+
+    def live_reload(self):
+        """
+        Called once writes have settled. Parses in a background thread so the UI does not block.
+        """
+        self.watch_live_paths()
+        mtime = self.get_live_mtime()
+        if mtime is None or mtime == self.live_mtime:
+            return
+        self.live_mtime = mtime
+
+        path = self.get_quick_path(self.live_folder_le.text())
+        thread = threading.Thread(target=self.live_parse, args=(path,))
+        thread.daemon = True
+        thread.start()
+
+    def live_parse(self, path):
+        # Runs in a background thread. Scene edits must happen on the main thread.
+        start = time.time()
+        try:
+            track_list = zloc_file.read(path)
+        except (IOError, OSError, ValueError): # Half written file. The next write event tries again.
+            self.live_mtime = None
+            return
+        maya.utils.executeDeferred(self.live_apply, track_list, time.time() - start)
+
+    @openCloseChunk
+    def live_apply(self, track_list, parse_time):
+        if not self.live_cb.isChecked() or self.live_camTrans is None or not mc.objExists(self.live_camTrans):
+            return
+
+        options = self.get_options()
+        options["update"] = True
+
+        start = time.time()
+        result = self.import_tracks(self.live_camTrans, track_list, options)
+        if result is None:
+            return
+        result["parse"] = parse_time * 1000
+        result["apply"] = (time.time() - start) * 1000
+        om.MGlobal.displayInfo("ZLOC Live Link: {created} created, {updated} updated, {unchanged} unchanged, {removed} removed. Parse {parse:.0f}ms, Apply {apply:.0f}ms.".format(**result))
+
+    def get_quick_path(self, folder=TEMPDIR):
+        """
+        Returns "quick.zlocb" if it is newer than "quick.zloc", otherwise "quick.zloc".
+        Binary files are memory-mapped instead of parsed, so exporters should write "quick.zlocb" when they can.
+        """
+        text_path = os.path.join(folder, "quick.zloc")
+        binary_path = os.path.join(folder, "quick.zlocb")
+        if not os.path.exists(binary_path):
+            return text_path
+        if os.path.exists(text_path) and os.path.getmtime(text_path) > os.path.getmtime(binary_path):
+            return text_path
+        return binary_path
 
     def one_camera_selected(self):
         selList = mc.ls(selection=True, long=True)
@@ -437,22 +1144,28 @@ class MainTab(QtWidgets.QWidget):
     def get_color_from_index(self, tde4_color_index):
         color_dict = {
         # 3DE4 Color Index : Maya Color Index
-        "0": 13, # Red
-        "1": 14, # Green
-        "2": 6, # Blue
-        "3": 17, # Yellow
-        "4": 1, # Black
-        "5": 16, # White
-        "6": 2, # Gray
-        "7": 9, # Purple
-        "8": 18, # Cyan
-        "9": 20, # Light Red
-        "10": 19, # Light Green
-        "11": 30 # Light Blue
+        0: 13, # Red
+        1: 14, # Green
+        2: 6, # Blue
+        3: 17, # Yellow
+        4: 1, # Black
+        5: 16, # White
+        6: 2, # Gray
+        7: 9, # Purple
+        8: 18, # Cyan
+        9: 20, # Light Red
+        10: 19, # Light Green
+        11: 30 # Light Blue
         }
         maya_color_index = color_dict[tde4_color_index]
         return maya_color_index
 
+    def get_index_from_color(self, maya_color_index):
+        for tde4_color_index in range(12):
+            if self.get_color_from_index(tde4_color_index) == maya_color_index:
+                return tde4_color_index
+        return 0 # Red
+
 class AboutTab(QtWidgets.QWidget):
 
     def __init__(self, parent=None):